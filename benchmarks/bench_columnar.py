@@ -0,0 +1,110 @@
+"""Peak RSS of accumulating results: pydantic models in a list versus ResultColumns.
+
+    python benchmarks/bench_columnar.py [--results 1000000]
+
+Each store runs in a fresh interpreter, appending synthetic results (half domains with
+WHOIS, half IPs with geolocation, drawn from realistic pools of registrars, nameservers,
+ASNs and cities). Prints one JSON object with peak RSS and seconds per store, plus the
+CSV export time for the columnar store.
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import subprocess
+import sys
+import time
+from collections.abc import Iterator
+from datetime import datetime, timezone
+from typing import Any
+
+from wib.columnar import ResultColumns
+from wib.models.common import DomainData, DomainWhois, IpData, IpGeo
+
+if sys.platform != "win32":
+    import resource
+
+STORES = ("models", "columns")
+
+
+def _results(n: int) -> Iterator[tuple[str, IpData | DomainData]]:
+    for i in range(n):
+        if i % 2:
+            ip = f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}"
+            geo = IpGeo(
+                ip=ip,
+                asn=str(64500 + i % 3000),
+                org=f"Org {i % 3000}",
+                country=("US", "DE", "NL", "SG")[i % 4],
+                city=f"City {i % 800}",
+                lat=float(i % 90),
+                lon=float(i % 180),
+            )
+            yield "ip", IpData(ip=ip, geo=geo)
+        else:
+            domain = f"example{i}.com"
+            host = f"host{i % 900}.net"
+            whois = DomainWhois(
+                domain=domain,
+                registrar=f"Registrar {i % 500}",
+                nameservers=[f"ns1.{host}", f"ns2.{host}"],
+                created=datetime(2000 + i % 20, 1 + i % 12, 1 + i % 28, tzinfo=timezone.utc),
+                expires=datetime(2030, 1, 1, tzinfo=timezone.utc),
+            )
+            yield "domain", DomainData(domain=domain, whois=whois)
+
+
+def _peak_rss_mb() -> float | None:
+    if sys.platform == "win32":
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1e6 if sys.platform == "darwin" else 1e3), 1)
+
+
+def _run_store(store: str, n: int) -> dict[str, Any]:
+    started = time.perf_counter()
+    result: dict[str, Any] = {}
+    if store == "columns":
+        columns = ResultColumns()
+        for kind, data in _results(n):
+            columns.append(kind, data)
+        result["append_s"] = round(time.perf_counter() - started, 1)
+        result["peak_rss_mb"] = _peak_rss_mb()
+        started = time.perf_counter()
+        out = io.StringIO()
+        columns.to_csv(out)
+        result["csv_s"] = round(time.perf_counter() - started, 1)
+        result["csv_mb"] = round(len(out.getvalue()) / 1e6, 1)
+    else:
+        models = list(_results(n))
+        result["append_s"] = round(time.perf_counter() - started, 1)
+        result["peak_rss_mb"] = _peak_rss_mb()
+        del models
+    return result
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--results", type=int, default=1_000_000)
+    p.add_argument("--store", choices=STORES, help=argparse.SUPPRESS)
+    ns = p.parse_args()
+
+    if ns.store:
+        print(json.dumps(_run_store(ns.store, ns.results)))
+        return
+    report: dict[str, Any] = {"benchmark": "columnar", "results": ns.results}
+    for store in STORES:
+        proc = subprocess.run(
+            [sys.executable, __file__, "--store", store, "--results", str(ns.results)],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        report[store] = json.loads(proc.stdout)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Offline geo table lookup throughput over a synthetic dataset.
+
+    python benchmarks/bench_geo_lookup.py [--ranges 500000] [--seconds 2]
+
+Builds a table of adjacent IPv4 and IPv6 ranges in a temp dir, then prints one JSON
+object: build time, table size and lookups/s for IPv4 and IPv6 addresses, both as raw
+table records and as the IpGeo models wib emits.
+"""
+
+from __future__ import annotations
+
+import argparse
+import ipaddress
+import json
+import random
+import tempfile
+import time
+from collections.abc import Callable, Iterator
+from pathlib import Path
+
+from wib.clients.offline_geo import GeoTable, OfflineGeoClient, Record, build_table
+
+_V4_SPAN = 256
+_V6_SPAN = 1 << 80
+_V6_BASE = int(ipaddress.IPv6Address("2000::"))
+
+
+def _ranges(n: int) -> Iterator[tuple[int, int, int, Record]]:
+    for i in range(n):
+        record: Record = (
+            str(i % 60_000),
+            f"AS-ORG-{i % 60_000}",
+            None,
+            "US",
+            None,
+            None,
+            None,
+            None,
+        )
+        yield 4, i * _V4_SPAN, (i + 1) * _V4_SPAN - 1, record
+        start = _V6_BASE + i * _V6_SPAN
+        yield 6, start, start + _V6_SPAN - 1, record
+
+
+def _measure(lookup: Callable[[str], object], ips: list[str], seconds: float) -> float:
+    n = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline:
+        for ip in ips:
+            lookup(ip)
+        n += len(ips)
+    return n / (time.perf_counter() - started)
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--ranges", type=int, default=500_000, help="Ranges per address family")
+    p.add_argument("--seconds", type=float, default=1.0, help="Time spent per address family")
+    ns = p.parse_args()
+
+    rng = random.Random(0)
+    v4 = [str(ipaddress.IPv4Address(rng.randrange(ns.ranges * _V4_SPAN))) for _ in range(10_000)]
+    v6 = [
+        str(ipaddress.IPv6Address(_V6_BASE + rng.randrange(ns.ranges * _V6_SPAN)))
+        for _ in range(10_000)
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.wibgeo"
+        started = time.perf_counter()
+        build_table(_ranges(ns.ranges), path)
+        build_s = time.perf_counter() - started
+        client = OfflineGeoClient(GeoTable(path))
+        try:
+            result = {
+                "benchmark": "geo_lookup",
+                "ranges_per_family": ns.ranges,
+                "build_s": round(build_s, 2),
+                "table_mb": round(path.stat().st_size / 1e6, 1),
+                "ipv4_records_per_s": round(_measure(client.table.lookup, v4, ns.seconds)),
+                "ipv6_records_per_s": round(_measure(client.table.lookup, v6, ns.seconds)),
+                "ipv4_models_per_s": round(_measure(client.lookup, v4, ns.seconds)),
+                "ipv6_models_per_s": round(_measure(client.lookup, v6, ns.seconds)),
+            }
+        finally:
+            client.close()
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""JSON/YAML output throughput: the model_dump() path versus wib.serialize.
+
+    python benchmarks/bench_serialize.py [--results 20000] [--yaml-results 5000]
+
+Serializes a synthetic batch of domain and IP results (half each) and prints one JSON
+object with seconds and MB/s per encoder:
+
+- json_legacy: json.dumps([... model_dump() ...], indent=2, default=str), the old path
+- json_indent / json_compact: wib.serialize.dumps_records
+- json_orjson: orjson over model_dump(mode="json") with OPT_INDENT_2, if orjson is installed
+- yaml_legacy: yaml.safe_dump (pure Python); yaml: wib.serialize.dumps_yaml (libyaml)
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import time
+from collections.abc import Callable
+from datetime import datetime, timezone
+from typing import Any
+
+import yaml
+from pydantic import BaseModel
+
+from wib.models.common import DnsRecordMx, DomainData, DomainDns, DomainWhois, IpData, IpGeo
+from wib.serialize import dumps_records, dumps_yaml
+
+
+def _results(n: int) -> list[tuple[str, BaseModel]]:
+    created = datetime(2001, 2, 3, 4, 5, 6, tzinfo=timezone.utc)
+    out: list[tuple[str, BaseModel]] = []
+    for i in range(n // 2):
+        domain = f"example{i}.com"
+        whois = DomainWhois(
+            domain=domain,
+            registrar="Example Registrar, Inc.",
+            nameservers=[f"ns1.{domain}", f"ns2.{domain}"],
+            dnssec=False,
+            created=created,
+            updated=created,
+            expires=created,
+        )
+        dns = DomainDns(
+            a=["192.0.2.1"],
+            aaaa=["2001:db8::1"],
+            ns=[f"ns1.{domain}", f"ns2.{domain}"],
+            mx=[DnsRecordMx(preference=10, exchange=f"mail.{domain}")],
+            txt=["v=spf1 -all"],
+        )
+        out.append(("domain", DomainData(domain=domain, whois=whois, dns=dns)))
+        ip = f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}"
+        geo = IpGeo(ip=ip, asn="64500", org="Example", country="US", lat=34.05, lon=-118.24)
+        out.append(("ip", IpData(ip=ip, geo=geo)))
+    return out
+
+
+def _measure(encode: Callable[[], bytes | str]) -> dict[str, float]:
+    started = time.perf_counter()
+    size = len(encode())
+    elapsed = time.perf_counter() - started
+    return {"seconds": round(elapsed, 3), "mb_per_s": round(size / 1e6 / elapsed, 1)}
+
+
+def _legacy_objects(results: list[tuple[str, BaseModel]]) -> list[dict[str, Any]]:
+    return [{"kind": k, "data": d.model_dump()} for k, d in results]
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--results", type=int, default=20_000, help="Results for the JSON encoders")
+    p.add_argument("--yaml-results", type=int, default=5_000, help="Results for YAML")
+    ns = p.parse_args()
+
+    results = _results(ns.results)
+    encoders: dict[str, Callable[[], bytes | str]] = {
+        "json_legacy": lambda: json.dumps(_legacy_objects(results), indent=2, default=str),
+        "json_indent": lambda: dumps_records(results, indent=2),
+        "json_compact": lambda: dumps_records(results),
+    }
+    try:
+        orjson = importlib.import_module("orjson")
+    except ImportError:
+        orjson = None
+    if orjson is not None:
+        encoders["json_orjson"] = lambda: orjson.dumps(
+            [{"kind": k, "data": d.model_dump(mode="json")} for k, d in results],
+            option=orjson.OPT_INDENT_2,
+        )
+
+    few = results[: ns.yaml_results]
+    encoders["yaml_legacy"] = lambda: yaml.safe_dump(_legacy_objects(few), sort_keys=False)
+    encoders["yaml"] = lambda: dumps_yaml(_legacy_objects(few)) or ""
+
+    report: dict[str, Any] = {
+        "benchmark": "serialize",
+        "results": ns.results,
+        "yaml_results": ns.yaml_results,
+        "libyaml": bool(getattr(yaml, "__with_libyaml__", False)),
+    }
+    report.update({name: _measure(encode) for name, encode in encoders.items()})
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,410 @@
+"""End-to-end lookup throughput against local stand-ins for the providers.
+
+    python benchmarks/bench_throughput.py [--batch 200 1000] [--concurrency 10 50]
+        [--workers 1 2 4] [--workload ip domain port43 dns] [--driver main handlers]
+        [--latency-ms 20] [--error-rate 0.0] [--baseline previous.json [--tolerance 0.2]]
+
+Starts an HTTP server standing in for ipwho.is, RDAP and DNS over HTTPS (JSON API) and
+a TCP port 43 WHOIS server. Each answers after --latency-ms and fails --error-rate of
+requests (HTTP 503, or a dropped port 43 connection). Workloads:
+
+- ip: IP geolocation through the ipwho.is stand-in
+- domain: domain WHOIS over RDAP
+- port43: RDAP answers 404, so WHOIS falls back to port 43
+- dns: domain WHOIS over RDAP plus DNS over HTTPS (--dns)
+
+Every (driver, workload, batch, concurrency, workers) scenario runs in a fresh
+interpreter with an empty cache dir. The main driver runs `wib.main.main` with ndjson
+output (argument parsing, lookups and serialization); the handlers driver runs a
+LookupSession through iter_lookups, or a WorkerPool with --workers above 1. Prints one
+JSON object with entities/s, p50/p95/p99 per-entity latency (not measured across worker
+processes) and peak RSS of the parent process for each scenario. With --baseline (a previous run's output), exits 1 if
+any scenario's entities/s is more than --tolerance below the baseline's.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import functools
+import itertools
+import json
+import os
+import random
+import socketserver
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+from wib.clients.ipwhois import IpWhoisClient
+from wib.clients.whois import Port43WhoisClient
+from wib.config import load_config
+from wib.main import main as wib_main
+from wib.pipeline import iter_lookups
+from wib.session import LookupSession
+from wib.workers import WorkerPool
+
+if sys.platform != "win32":
+    import resource
+
+WORKLOADS = ("ip", "domain", "port43", "dns")
+DRIVERS = ("main", "handlers")
+_TLD = "test"  # reserved (RFC 2606), absent from the bundled registries
+_SCENARIO_TIMEOUT = 600.0
+
+
+# --- stand-in servers --------------------------------------------------------------------
+
+
+class _Faults:
+    def __init__(self, latency: float, error_rate: float) -> None:
+        self.latency = latency
+        self.error_rate = error_rate
+        self._rng = random.Random(0)
+        self._lock = threading.Lock()
+
+    def wait_and_fail(self) -> bool:
+        """Sleep for the configured latency; True if this request should fail."""
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            return self._rng.random() < self.error_rate
+
+
+def _ipwho(ip: str) -> dict[str, Any]:
+    return {
+        "success": True,
+        "ip": ip,
+        "connection": {"asn": 64500, "isp": "Stand-in ISP"},
+        "org": "Stand-in Org",
+        "country": "United States",
+        "region": "California",
+        "city": "Los Angeles",
+        "latitude": 34.05,
+        "longitude": -118.24,
+    }
+
+
+def _rdap(domain: str) -> dict[str, Any]:
+    return {
+        "ldhName": domain,
+        "events": [
+            {"eventAction": "registration", "eventDate": "2001-02-03T04:05:06Z"},
+            {"eventAction": "expiration", "eventDate": "2031-02-03T04:05:06Z"},
+        ],
+        "entities": [
+            {"roles": ["registrar"], "vcardArray": ["vcard", [["fn", {}, "text", "Stand-in"]]]}
+        ],
+        "nameservers": [{"ldhName": f"ns1.{domain}"}, {"ldhName": f"ns2.{domain}"}],
+        "secureDNS": {"zoneSigned": False},
+    }
+
+
+_DOH_ANSWERS = {
+    "A": (1, "192.0.2.1"),
+    "AAAA": (28, "2001:db8::1"),
+    "NS": (2, "ns1.example.test."),
+    "MX": (15, "10 mail.example.test."),
+    "TXT": (16, "v=spf1 -all"),
+}
+
+
+def _doh(name: str, rrtype: str) -> dict[str, Any]:
+    answer = _DOH_ANSWERS.get(rrtype)
+    if answer is None:
+        return {"Status": 0}
+    code, data = answer
+    return {"Status": 0, "Answer": [{"name": name, "type": code, "TTL": 300, "data": data}]}
+
+
+def _whois_text(domain: str) -> str:
+    return (
+        f"Domain Name: {domain.upper()}\r\n"
+        "Registrar: Stand-in Registrar\r\n"
+        f"Name Server: NS1.{domain.upper()}\r\n"
+        f"Name Server: NS2.{domain.upper()}\r\n"
+        "DNSSEC: unsigned\r\n"
+        "Creation Date: 2001-02-03T04:05:06Z\r\n"
+        "Updated Date: 2021-02-03T04:05:06Z\r\n"
+        "Registry Expiry Date: 2031-02-03T04:05:06Z\r\n"
+    )
+
+
+def _http_handler(faults: _Faults) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real providers
+        # Headers and body go out in separate writes; don't let Nagle hold the body back
+        disable_nagle_algorithm = True
+
+        def do_GET(self) -> None:  # noqa: N802 - http.server naming
+            url = urlsplit(self.path)
+            if faults.wait_and_fail():
+                self._reply(503, {"error": "stand-in failure"})
+            elif url.path.startswith("/ipwho/"):
+                self._reply(200, _ipwho(url.path.removeprefix("/ipwho/")))
+            elif url.path.startswith("/rdap/domain/"):
+                self._reply(200, _rdap(url.path.removeprefix("/rdap/domain/")))
+            elif url.path == "/resolve":
+                query = parse_qs(url.query)
+                self._reply(200, _doh(query["name"][0], query["type"][0]))
+            else:
+                self._reply(404, {"error": "not found"})
+
+        def _reply(self, status: int, body: dict[str, Any]) -> None:
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+            pass
+
+    return Handler
+
+
+def _whois_handler(faults: _Faults) -> type[socketserver.StreamRequestHandler]:
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self) -> None:
+            query = self.rfile.readline().decode("latin-1").strip()
+            if not faults.wait_and_fail():
+                self.wfile.write(_whois_text(query).encode("latin-1"))
+
+    return Handler
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class _WhoisServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 1024
+
+
+class _StandIns:
+    """The stand-in servers, each serving from its own thread on an ephemeral port."""
+
+    def __init__(self, faults: _Faults) -> None:
+        self.http = _HTTPServer(("127.0.0.1", 0), _http_handler(faults))
+        self.whois = _WhoisServer(("127.0.0.1", 0), _whois_handler(faults))
+        self.http_url = f"http://127.0.0.1:{self.http.server_address[1]}"
+        self.whois_port = self.whois.server_address[1]
+
+    def __enter__(self) -> _StandIns:
+        for server in (self.http, self.whois):
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        for server in (self.http, self.whois):
+            server.shutdown()
+            server.server_close()
+
+
+# --- one scenario (child process) --------------------------------------------------------
+
+
+def _entities(workload: str, n: int) -> Iterator[str]:
+    for i in range(n):
+        if workload == "ip":
+            yield f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}"
+        else:
+            yield f"d{i}.{_TLD}"
+
+
+def _point_clients_at(spec: dict[str, Any]) -> None:
+    """Route wib's providers to the stand-ins through its own extension points."""
+    IpWhoisClient.BASE = f"{spec['http']}/ipwho/"
+    Port43WhoisClient.PORT = spec["whois_port"]
+
+
+def _point_wib_at(spec: dict[str, Any], cache: Path) -> None:
+    _point_clients_at(spec)
+    # Worker processes start from a fresh import and repoint themselves
+    WorkerPool.initializer = functools.partial(_point_clients_at, spec)
+    # The port43 workload points RDAP at a path the stand-in answers with 404
+    rdap = f"{spec['http']}/{'missing' if spec['workload'] == 'port43' else 'rdap'}/"
+    cache.mkdir(parents=True, exist_ok=True)
+    bootstrap = {"services": [[[_TLD], [rdap]]]}
+    (cache / "rdap_dns.json").write_text(json.dumps(bootstrap), encoding="utf-8")
+    servers = {"servers": {_TLD: ["127.0.0.1", time.time()]}}
+    (cache / "whois_servers.json").write_text(json.dumps(servers), encoding="utf-8")
+
+
+def _lookup_args(spec: dict[str, Any]) -> list[str]:
+    args = ["--concurrency", str(spec["concurrency"]), "--timeout", "30"]
+    args += ["--workers", str(spec["workers"])]
+    if spec["workload"] == "dns":
+        args += ["--dns", "--doh-url", f"{spec['http']}/resolve"]
+    return args
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def _peak_rss_mb() -> float | None:
+    if sys.platform == "win32":
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1e6 if sys.platform == "darwin" else 1e3), 1)
+
+
+async def _drive_handlers(entities: list[str], args: list[str]) -> None:
+    cfg = load_config(args)
+    if cfg.workers > 1:
+        async with WorkerPool(cfg, cfg.workers) as pool:
+            async for _ in pool.lookups(entities):
+                pass
+        return
+    async with LookupSession(cfg) as session:
+        async for _ in iter_lookups(session, entities, concurrency=cfg.concurrency):
+            pass
+
+
+def _run_scenario(spec: dict[str, Any]) -> dict[str, Any]:
+    cache = Path(os.environ["WIB_CACHE_DIR"])
+    _point_wib_at(spec, cache)
+    latencies: list[float] = []
+    lookup = LookupSession.lookup
+
+    async def timed_lookup(self: LookupSession, entity: str) -> Any:
+        started = time.perf_counter()
+        try:
+            return await lookup(self, entity)
+        finally:
+            latencies.append(time.perf_counter() - started)
+
+    LookupSession.lookup = timed_lookup  # type: ignore[method-assign]
+
+    entities = list(_entities(spec["workload"], spec["batch"]))
+    args = _lookup_args(spec)
+    started = time.perf_counter()
+    if spec["driver"] == "main":
+        source = cache.parent / "entities.txt"
+        source.write_text("\n".join(entities) + "\n", encoding="utf-8")
+        out = cache.parent / "out.ndjson"
+        rc = wib_main(["-i", str(source), "--output", "ndjson", "--out-file", str(out), *args])
+        if rc != 0:
+            raise SystemExit(f"wib exited with {rc}")
+    else:
+        asyncio.run(_drive_handlers(entities, args))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()  # empty with workers: lookups ran in other processes
+    return {
+        "entities": len(entities),
+        "seconds": round(elapsed, 3),
+        "entities_per_s": round(len(entities) / elapsed, 1),
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 1),
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000, 1),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 1),
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+# --- sweep (parent process) --------------------------------------------------------------
+
+
+def _spawn(spec: dict[str, Any]) -> dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {**os.environ, "WIB_CACHE_DIR": str(Path(tmp) / "cache")}
+        env.pop("WIB_DEFAULTS", None)
+        proc = subprocess.run(
+            [sys.executable, __file__, "--scenario", json.dumps(spec)],
+            env=env,
+            capture_output=True,
+            text=True,
+            timeout=_SCENARIO_TIMEOUT,
+            check=False,
+        )
+    if proc.returncode != 0:
+        raise SystemExit(f"scenario {spec} failed:\n{proc.stderr}")
+    result: dict[str, Any] = json.loads(proc.stdout.splitlines()[-1])
+    return result
+
+
+_KEY = ("driver", "workload", "batch", "concurrency", "workers")
+
+
+def _key(result: dict[str, Any]) -> tuple[Any, ...]:
+    # Baselines from before --workers existed ran one process
+    return tuple(result.get(k, 1) for k in _KEY)
+
+
+def _rate(result: dict[str, Any]) -> dict[str, Any]:
+    return {"entities_per_s": result["entities_per_s"]}
+
+
+def _regressions(
+    results: list[dict[str, Any]], baseline_path: str, tolerance: float
+) -> list[dict[str, Any]]:
+    baseline = json.loads(Path(baseline_path).read_text(encoding="utf-8"))
+    before = {_key(r): r["entities_per_s"] for r in baseline.get("results", [])}
+    out = []
+    for r in results:
+        was = before.get(_key(r))
+        if was and r["entities_per_s"] < was * (1 - tolerance):
+            key = dict(zip(_KEY, _key(r), strict=True))
+            out.append({**key, "baseline_entities_per_s": was, **_rate(r)})
+    return out
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--batch", type=int, nargs="+", default=[200, 1000])
+    p.add_argument("--concurrency", type=int, nargs="+", default=[10, 50])
+    p.add_argument("--workers", type=int, nargs="+", default=[1], help="Processes per run")
+    p.add_argument("--workload", nargs="+", choices=WORKLOADS, default=["ip", "domain"])
+    p.add_argument("--driver", nargs="+", choices=DRIVERS, default=["main"])
+    p.add_argument("--latency-ms", type=float, default=20.0, help="Stand-in response delay")
+    p.add_argument("--error-rate", type=float, default=0.0, help="Share of failed requests")
+    p.add_argument("--baseline", help="Previous output to compare entities/s against")
+    p.add_argument("--tolerance", type=float, default=0.2, help="Allowed entities/s drop")
+    p.add_argument("--scenario", help=argparse.SUPPRESS)
+    ns = p.parse_args()
+
+    if ns.scenario:
+        print(json.dumps(_run_scenario(json.loads(ns.scenario))))
+        return
+
+    results = []
+    with _StandIns(_Faults(ns.latency_ms / 1000, ns.error_rate)) as stand_ins:
+        sweep = itertools.product(ns.driver, ns.workload, ns.batch, ns.concurrency, ns.workers)
+        for values in sweep:
+            spec: dict[str, Any] = dict(zip(_KEY, values, strict=True))
+            spec.update(http=stand_ins.http_url, whois_port=stand_ins.whois_port)
+            measured = _spawn(spec)
+            del spec["http"], spec["whois_port"]
+            results.append({**spec, **measured})
+
+    report: dict[str, Any] = {
+        "benchmark": "throughput",
+        "latency_ms": ns.latency_ms,
+        "error_rate": ns.error_rate,
+        "python": sys.version.split()[0],
+        "results": results,
+    }
+    if ns.baseline:
+        report["regressions"] = _regressions(results, ns.baseline, ns.tolerance)
+    print(json.dumps(report, indent=2))
+    if report.get("regressions"):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
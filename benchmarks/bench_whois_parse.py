@@ -0,0 +1,67 @@
+"""Port 43 WHOIS parse throughput over the stored response corpus.
+
+    python benchmarks/bench_whois_parse.py [--seconds 2]
+
+Prints one JSON object: responses/s and MB/s per corpus file and overall.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+from wib.clients.whois_parser import parse_whois_text, template_for
+
+CORPUS = Path(__file__).resolve().parent.parent / "tests" / "data" / "whois"
+
+
+def _measure(domain: str, text: str, seconds: float) -> tuple[int, float]:
+    template = template_for(domain.rsplit(".", 1)[-1])
+    n = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            parse_whois_text(domain, text, template)
+        n += 100
+    return n, time.perf_counter() - started
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--seconds", type=float, default=1.0, help="Time spent per corpus file")
+    ns = p.parse_args()
+
+    per_file: dict[str, dict[str, float]] = {}
+    total_n = 0
+    total_bytes = 0
+    total_s = 0.0
+    for path in sorted(CORPUS.glob("*.txt")):
+        domain = path.name.removesuffix(".txt")
+        text = path.read_text(encoding="utf-8")
+        n, elapsed = _measure(domain, text, ns.seconds)
+        size = len(text.encode("utf-8"))
+        per_file[domain] = {
+            "responses_per_s": round(n / elapsed, 1),
+            "mb_per_s": round(n * size / elapsed / 1e6, 2),
+        }
+        total_n += n
+        total_bytes += n * size
+        total_s += elapsed
+    print(
+        json.dumps(
+            {
+                "benchmark": "whois_parse",
+                "responses_per_s": round(total_n / total_s, 1),
+                "mb_per_s": round(total_bytes / total_s / 1e6, 2),
+                "files": per_file,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
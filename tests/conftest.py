@@ -0,0 +1,19 @@
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from wib.clients.rdap_bootstrap import RdapBootstrap
+from wib.clients.whois_servers import WhoisServerTable
+from wib.metrics import MetricsRegistry
+from wib.utils.psl import PublicSuffixList
+
+
+@pytest.fixture(autouse=True)
+def _isolated_cache_dir(monkeypatch: Any, tmp_path: Path) -> None:
+    # Keep the persistent caches out of the real user cache dir and fresh per test.
+    monkeypatch.setenv("WIB_CACHE_DIR", str(tmp_path / "cache"))
+    WhoisServerTable._shared = None
+    RdapBootstrap._shared = None
+    PublicSuffixList._shared = None
+    MetricsRegistry._shared = None
@@ -0,0 +1,72 @@
+import asyncio
+from collections.abc import AsyncIterator
+
+import pytest
+import respx
+from httpx import Response
+
+import wib
+from wib.config import AppConfig
+from wib.models.common import IpData
+
+IPS = ["1.1.1.1", "8.8.8.8", "9.9.9.9"]
+
+
+def _mock_ipwho() -> None:
+    for ip in IPS:
+        respx.get(f"https://ipwho.is/{ip}").mock(
+            return_value=Response(200, json={"success": True, "ip": ip})
+        )
+
+
+async def _slowly(entities: list[str]) -> AsyncIterator[str]:
+    for entity in entities:
+        await asyncio.sleep(0)
+        yield entity
+
+
+@respx.mock
+def test_lookup_many_accepts_sync_and_async_iterables() -> None:
+    _mock_ipwho()
+
+    async def run() -> tuple[list[str], list[tuple[str, str]], str]:
+        async with wib.Wib(AppConfig(concurrency=2)) as w:
+            ordered = [d.ip for _, d in _ips([r async for r in w.lookup_many(IPS, ordered=True)])]
+            streamed = [(e, d.ip) for e, d in _ips([r async for r in w.lookup_many(_slowly(IPS))])]
+            kind, _ = await w.lookup("1[.]1[.]1[.]1")
+        return ordered, streamed, kind
+
+    ordered, streamed, kind = asyncio.run(run())
+    assert ordered == IPS
+    # each result comes with the entity it answers, whatever order they complete in
+    assert sorted(streamed) == [(ip, ip) for ip in sorted(IPS)]
+    assert kind == "ip"
+
+
+def _ips(results: list[tuple[str, tuple[str, object]]]) -> list[tuple[str, IpData]]:
+    assert all(k == "ip" and isinstance(d, IpData) for _, (k, d) in results)
+    return [(e, d) for e, (_, d) in results if isinstance(d, IpData)]
+
+
+@respx.mock
+def test_stopping_early_and_invalid_entities() -> None:
+    _mock_ipwho()
+
+    async def run() -> None:
+        async with wib.Wib() as w:
+            stream = w.lookup_many(IPS * 100)
+            async for _ in stream:
+                break  # the open stream is closed with the Wib
+            with pytest.raises(ValueError):
+                [r async for r in w.lookup_many(["not an ip"])]
+            failed: list[str] = []
+            results = w.lookup_many(
+                ["1.1.1.1", "not an ip", "8.8.8.8"],
+                ordered=True,
+                on_error=lambda entity, exc: failed.append(entity),
+            )
+            assert [e async for e, _ in results] == ["1.1.1.1", "8.8.8.8"]
+            assert failed == ["not an ip"]
+        assert w._session is None
+
+    asyncio.run(run())
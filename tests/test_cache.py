@@ -0,0 +1,78 @@
+import json
+from pathlib import Path
+from typing import Any
+
+import respx
+from httpx import Response
+
+from wib.cache import CacheTtls, ResultCache
+from wib.main import main
+from wib.metrics import MetricsRegistry
+from wib.models.common import IpGeo
+
+
+def test_result_cache_roundtrip_and_expiry(tmp_path: Path) -> None:
+    cache = ResultCache(tmp_path / "c.sqlite3")
+    geo = IpGeo(ip="1.1.1.1", country="Australia")
+    cache.put("geo", "1.1.1.1", geo, ttl=60)
+    cache.put("geo", "8.8.8.8", IpGeo(ip="8.8.8.8"), ttl=-1)
+    assert cache.get("geo", "1.1.1.1", IpGeo) == geo
+    assert cache.get("geo", "8.8.8.8", IpGeo) is None
+    cache.close()
+
+    refreshed = ResultCache(tmp_path / "c.sqlite3", refresh=True)
+    assert refreshed.get("geo", "1.1.1.1", IpGeo) is None
+    refreshed.close()
+
+
+def test_result_cache_has_neither_touches_nor_counts(tmp_path: Path) -> None:
+    cache = ResultCache(tmp_path / "c.sqlite3", metrics=MetricsRegistry())
+    cache.put("geo", "1.1.1.1", IpGeo(ip="1.1.1.1"), ttl=60)
+    cache.put("geo", "8.8.8.8", IpGeo(ip="8.8.8.8"), ttl=-1)
+    (accessed,) = cache._db.execute("SELECT accessed FROM results WHERE key = '1.1.1.1'").fetchone()
+    assert cache.has("geo", "1.1.1.1")
+    assert not cache.has("geo", "8.8.8.8")
+    assert not cache.has("geo", "9.9.9.9")
+    assert cache.metrics.counter("wib_cache_requests_total") == 0
+    assert cache._db.execute("SELECT accessed FROM results WHERE key = '1.1.1.1'").fetchone() == (
+        accessed,
+    )
+    cache.close()
+
+
+def test_result_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    cache = ResultCache(tmp_path / "c.sqlite3", max_entries=2)
+    for i in range(3):
+        cache.put("geo", f"10.0.0.{i}", IpGeo(ip=f"10.0.0.{i}"), ttl=60)
+    cache.close()
+    cache = ResultCache(tmp_path / "c.sqlite3", max_entries=2)
+    assert cache.get("geo", "10.0.0.0", IpGeo) is None
+    assert cache.get("geo", "10.0.0.2", IpGeo) is not None
+    cache.close()
+
+
+def test_dns_ttl_is_clamped() -> None:
+    default, low, high = 300.0, 30.0, 3600.0
+    ttls = CacheTtls(dns_default=default, dns_min=low, dns_max=high)
+    assert ttls.dns(None) == default
+    assert ttls.dns(5) == low
+    assert ttls.dns(600) == 600.0  # noqa: PLR2004
+    assert ttls.dns(86400) == high
+
+
+@respx.mock
+def test_repeated_lookup_is_served_from_cache(capsys: Any) -> None:
+    route = respx.get("https://ipwho.is/1.1.1.1").mock(
+        return_value=Response(200, json={"success": True, "ip": "1.1.1.1", "country": "AU"})
+    )
+    assert main(["1.1.1.1", "--output", "json"]) == 0
+    assert main(["1.1.1.1", "--output", "json"]) == 0
+    calls = route.call_count
+    assert calls == 1
+    assert main(["1.1.1.1", "--output", "json", "--refresh"]) == 0
+    assert route.call_count == calls + 1
+    assert main(["1.1.1.1", "--output", "json"]) == 0
+    capsys.readouterr()
+    assert main(["1.1.1.1", "--output", "json", "--no-cache"]) == 0
+    assert route.call_count == calls + 2
+    assert json.loads(capsys.readouterr().out)["data"]["geo"]["country"] == "AU"
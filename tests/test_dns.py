@@ -0,0 +1,66 @@
+import asyncio
+import base64
+import struct
+from typing import Any
+
+import httpx
+import respx
+from httpx import Response
+
+from wib.clients.dns import DnsClient
+from wib.clients.dnswire import RR_TYPES, build_query, parse_response
+from wib.http.request import RequestManager
+
+_QNAME_PTR = b"\xc0\x0c"  # compression pointer to the question name at offset 12
+
+
+def _answer(rrtype: str, ttl: int, rdata: bytes) -> bytes:
+    return _QNAME_PTR + struct.pack("!HHIH", RR_TYPES[rrtype], 1, ttl, len(rdata)) + rdata
+
+
+def _fake_response(query: bytes) -> bytes:
+    qtype = struct.unpack("!H", query[-4:-2])[0]
+    answers = {
+        RR_TYPES["A"]: [_answer("A", 300, bytes([93, 184, 216, 34]))],
+        RR_TYPES["MX"]: [_answer("MX", 60, struct.pack("!H", 10) + b"\x04mail" + _QNAME_PTR)],
+        # two character-strings, concatenated by the decoder
+        RR_TYPES["TXT"]: [_answer("TXT", 120, b"\x05v=spf\x031 -")],
+    }.get(qtype, [])
+    header = struct.pack("!HHHHHH", 0, 0x8180, 1, len(answers), 0, 0)
+    return header + query[12:] + b"".join(answers)
+
+
+def test_wire_roundtrip_with_compression() -> None:
+    query = build_query("example.com", "MX")
+    assert query[12:] == b"\x07example\x03com\x00\x00\x0f\x00\x01"
+    rcode, answers = parse_response(_fake_response(query))
+    assert rcode == 0
+    assert answers == [
+        {"name": "example.com.", "type": RR_TYPES["MX"], "TTL": 60, "data": "10 mail.example.com."}
+    ]
+
+
+@respx.mock
+def test_wire_backend_resolves_all_types_concurrently() -> None:
+    def handler(request: httpx.Request) -> Response:
+        assert request.headers["accept"] == "application/dns-message"
+        encoded = request.url.params["dns"]
+        query = base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4))
+        return Response(200, content=_fake_response(query))
+
+    route = respx.get("https://doh.test/dns-query").mock(side_effect=handler)
+
+    async def run() -> Any:
+        rm = RequestManager()
+        try:
+            client = DnsClient(rm, endpoint="https://doh.test/dns-query", wire=True)
+            return await client.fetch_with_ttl("example.com")
+        finally:
+            await rm.aclose()
+
+    dns, ttl = asyncio.run(run())
+    assert route.call_count == len(RR_TYPES)
+    assert dns.a == ["93.184.216.34"]
+    assert [(m.preference, m.exchange) for m in dns.mx] == [(10, "mail.example.com")]
+    assert dns.txt == ["v=spf1 -"]
+    assert ttl == min(300, 60, 120)
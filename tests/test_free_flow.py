@@ -1,10 +1,24 @@
+import asyncio
+import gzip
+import io
 import json
+import time
+from collections.abc import Iterator
 from typing import Any
 
+import httpx
+import pytest
 import respx
 from httpx import Response
+from rich.console import Console
 
+from wib.clients.whois import Port43WhoisClient
+from wib.handlers import DomainHandler
+from wib.http.request import RequestManager, RequestSettings
 from wib.main import main
+from wib.models.common import DomainData, DomainWhois, IpData
+from wib.ui import BatchRenderer
+from wib.utils import UserVisibleError
 
 
 @respx.mock
@@ -71,3 +85,322 @@ def test_domain_free_flow(monkeypatch: Any, capsys: Any) -> None:
     assert rc == 0
     data = json.loads(captured)
     assert data["kind"] == "domain" or isinstance(data, list)
+
+
+@respx.mock
+def test_concurrent_lookups_keep_input_order(monkeypatch: Any, capsys: Any) -> None:
+    async def slow(request: Any) -> Response:
+        await asyncio.sleep(0.05)
+        return Response(200, json={"success": True, "ip": "1.1.1.1", "country": "Australia"})
+
+    respx.get("https://ipwho.is/1.1.1.1").mock(side_effect=slow)
+    respx.get("https://ipwho.is/8.8.8.8").mock(
+        return_value=Response(200, json={"success": True, "ip": "8.8.8.8", "country": "US"})
+    )
+
+    rc = main(["1.1.1.1", "8.8.8.8", "--output", "json", "--concurrency", "2"])
+    captured = capsys.readouterr().out
+    assert rc == 0
+    data = json.loads(captured)
+    assert [d["data"]["ip"] for d in data] == ["1.1.1.1", "8.8.8.8"]
+
+
+@respx.mock
+def test_domain_rdap_uses_bootstrap_server(capsys: Any) -> None:
+    respx.get("https://data.iana.org/rdap/dns.json").mock(
+        return_value=Response(
+            200,
+            json={
+                "version": "1.0",
+                "services": [[["com", "net"], ["https://rdap.verisign.com/com/v1/"]]],
+            },
+        )
+    )
+    direct = respx.get("https://rdap.verisign.com/com/v1/domain/example.com").mock(
+        return_value=Response(200, json={"ldhName": "example.com"})
+    )
+
+    rc = main(["example.com", "--output", "json"])
+    assert rc == 0
+    assert direct.call_count == 1
+    assert json.loads(capsys.readouterr().out)["data"]["domain"] == "example.com"
+
+
+@respx.mock
+def test_hedged_whois_takes_port43_when_rdap_is_slow(monkeypatch: Any, capsys: Any) -> None:
+    async def hanging(request: Any) -> Response:
+        await asyncio.sleep(5)
+        return Response(200, json={"ldhName": "example.com"})
+
+    async def port43(self: Port43WhoisClient, domain: str) -> DomainWhois:
+        return DomainWhois(domain=domain, registrar="Port43 Registrar")
+
+    respx.get("https://rdap.org/domain/example.com").mock(side_effect=hanging)
+    monkeypatch.setattr(Port43WhoisClient, "fetch", port43)
+
+    started = time.monotonic()
+    rc = main(["example.com", "--output", "json", "--hedge-delay", "0.05"])
+    assert rc == 0
+    assert time.monotonic() - started < 1
+    assert json.loads(capsys.readouterr().out)["data"]["whois"]["registrar"] == "Port43 Registrar"
+
+
+@respx.mock
+def test_entities_from_input_file_and_stdin(monkeypatch: Any, capsys: Any, tmp_path: Any) -> None:
+    for ip in ("1.1.1.1", "8.8.8.8", "9.9.9.9"):
+        respx.get(f"https://ipwho.is/{ip}").mock(
+            return_value=Response(200, json={"success": True, "ip": ip})
+        )
+    feed = tmp_path / "feed.txt"
+    feed.write_text("# incident 42\n8.8.8.8\n\n9[.]9[.]9[.]9\n", encoding="utf-8")
+
+    assert main(["1.1.1.1", "--input", str(feed), "--output", "json"]) == 0
+    data = json.loads(capsys.readouterr().out)
+    assert [d["data"]["ip"] for d in data] == ["1.1.1.1", "8.8.8.8", "9.9.9.9"]
+
+    monkeypatch.setattr("sys.stdin", io.StringIO("9.9.9.9\n1.1.1.1\n"))
+    assert main(["-", "--output", "json", "--no-cache"]) == 0
+    data = json.loads(capsys.readouterr().out)
+    assert [d["data"]["ip"] for d in data] == ["9.9.9.9", "1.1.1.1"]
+
+
+@respx.mock
+def test_ndjson_output_plain_and_gzip(capsys: Any, tmp_path: Any) -> None:
+    for ip in ("1.1.1.1", "8.8.8.8"):
+        respx.get(f"https://ipwho.is/{ip}").mock(
+            return_value=Response(200, json={"success": True, "ip": ip})
+        )
+
+    assert main(["1.1.1.1", "8.8.8.8", "--output", "ndjson"]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert [json.loads(line)["data"]["ip"] for line in lines] == ["1.1.1.1", "8.8.8.8"]
+
+    out = tmp_path / "results.ndjson.gz"
+    assert main(["8.8.8.8", "1.1.1.1", "--output", "ndjson", "--out-file", str(out)]) == 0
+    with gzip.open(out, "rt", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert [r["kind"] for r in records] == ["ip", "ip"]
+    assert [r["data"]["ip"] for r in records] == ["8.8.8.8", "1.1.1.1"]
+
+
+@respx.mock
+def test_bad_input_line_is_reported_and_skipped(capsys: Any, tmp_path: Any) -> None:
+    for ip in ("1.1.1.1", "8.8.8.8"):
+        respx.get(f"https://ipwho.is/{ip}").mock(
+            return_value=Response(200, json={"success": True, "ip": ip})
+        )
+    feed = tmp_path / "feed.txt"
+    feed.write_text("1.1.1.1\nnot a host!!\n8.8.8.8\n", encoding="utf-8")
+
+    assert main(["-i", str(feed), "--output", "ndjson", "--no-cache"]) == 1
+    captured = capsys.readouterr()
+    assert [json.loads(line)["data"]["ip"] for line in captured.out.splitlines()] == [
+        "1.1.1.1",
+        "8.8.8.8",
+    ]
+    assert captured.err.startswith("wib: not a host!!: ")
+
+
+@respx.mock
+def test_ndjson_record_is_flushed_before_the_next_line_arrives(
+    monkeypatch: Any, tmp_path: Any
+) -> None:
+    for ip in ("1.1.1.1", "8.8.8.8"):
+        respx.get(f"https://ipwho.is/{ip}").mock(
+            return_value=Response(200, json={"success": True, "ip": ip})
+        )
+    out = tmp_path / "live.ndjson"
+    seen: list[bool] = []
+
+    def live_stdin() -> Iterator[str]:
+        # like a pipe: the second line only comes once the first result is on disk
+        yield "1.1.1.1\n"
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline and not out.stat().st_size:
+            time.sleep(0.01)
+        seen.append(bool(out.stat().st_size))
+        yield "8.8.8.8\n"
+
+    monkeypatch.setattr("sys.stdin", live_stdin())
+    assert main(["-", "--output", "ndjson", "--no-cache", "--out-file", str(out)]) == 0
+    assert seen == [True]
+    assert len(out.read_text(encoding="utf-8").splitlines()) == 2  # noqa: PLR2004
+
+
+@respx.mock
+def test_gzip_applies_to_every_file_format(capsys: Any, tmp_path: Any) -> None:
+    respx.get("https://ipwho.is/1.1.1.1").mock(
+        return_value=Response(200, json={"success": True, "ip": "1.1.1.1"})
+    )
+
+    out = tmp_path / "result.json.gz"
+    assert main(["1.1.1.1", "--output", "json", "--out-file", str(out)]) == 0
+    with gzip.open(out, "rt", encoding="utf-8") as f:
+        assert json.load(f)["data"]["ip"] == "1.1.1.1"
+
+    out = tmp_path / "result.md.gz"
+    assert main(["1.1.1.1", "--output", "md", "--out-file", str(out)]) == 0
+    with gzip.open(out, "rt", encoding="utf-8") as f:
+        assert f.read().startswith("# IP 1.1.1.1")
+
+    with pytest.raises(UserVisibleError, match="--gzip"):
+        main(["1.1.1.1", "--out-file", str(tmp_path / "result.txt.gz")])
+
+
+@respx.mock
+def test_whois_runs_once_per_registrable_domain(capsys: Any) -> None:
+    route = respx.get("https://rdap.org/domain/example.co.uk").mock(
+        return_value=Response(200, json={"ldhName": "example.co.uk"})
+    )
+    hosts = ["a.cdn.example.co.uk", "b.cdn.example.co.uk", "example.co.uk"]
+
+    assert main([*hosts, "--output", "json", "--no-cache"]) == 0
+    data = json.loads(capsys.readouterr().out)
+    assert route.call_count == 1
+    assert [d["data"]["domain"] for d in data] == hosts
+    assert {d["data"]["whois"]["domain"] for d in data} == {"example.co.uk"}
+
+
+@respx.mock
+def test_whois_failure_is_remembered_only_briefly(monkeypatch: Any) -> None:
+    route = respx.get("https://rdap.org/domain/example.co.uk").mock(
+        side_effect=httpx.ConnectError("refused")
+    )
+
+    async def port43(self: Port43WhoisClient, domain: str) -> None:
+        return None
+
+    monkeypatch.setattr(Port43WhoisClient, "fetch", port43)
+    monkeypatch.setattr("wib.handlers.domain._BATCH_WHOIS_MISS_TTL", 0.05)
+
+    async def run() -> DomainData:
+        rm = RequestManager(RequestSettings(max_retries=0, breaker_failures=10))
+        handler = DomainHandler(rm=rm)
+        try:
+            await handler.fetch("a.example.co.uk")
+            await handler.fetch("b.example.co.uk")
+            assert route.call_count == 1
+            await asyncio.sleep(0.06)
+            # the blip is over: the registrable domain is asked for again
+            route.side_effect = None
+            route.return_value = Response(200, json={"ldhName": "example.co.uk"})
+            return await handler.fetch("c.example.co.uk")
+        finally:
+            await rm.aclose()
+
+    result = asyncio.run(run())
+    assert route.call_count == 2  # noqa: PLR2004
+    assert result.whois is not None
+
+
+@respx.mock
+def test_open_rdap_circuit_skips_to_port43(monkeypatch: Any) -> None:
+    route = respx.get(url__startswith="https://rdap.org/domain/").mock(
+        side_effect=httpx.ConnectError("refused")
+    )
+
+    async def port43(self: Port43WhoisClient, domain: str) -> DomainWhois:
+        return DomainWhois(domain=domain, registrar="Port43 Registrar")
+
+    monkeypatch.setattr(Port43WhoisClient, "fetch", port43)
+
+    async def run() -> list[DomainData]:
+        rm = RequestManager(RequestSettings(max_retries=0, breaker_failures=1))
+        handler = DomainHandler(rm=rm)
+        try:
+            return [await handler.fetch(d) for d in ("example.com", "example.net")]
+        finally:
+            await rm.aclose()
+
+    results = asyncio.run(run())
+    assert [r.whois.registrar if r.whois else None for r in results] == ["Port43 Registrar"] * 2
+    # the second domain never waited on rdap.org
+    assert route.call_count == 1
+
+
+@respx.mock
+def test_open_port43_circuit_skips_to_ip2whois(monkeypatch: Any) -> None:
+    respx.get(url__startswith="https://rdap.org/domain/").mock(return_value=Response(404))
+    paid = respx.get(url__startswith="https://api.ip2whois.com/").mock(
+        return_value=Response(200, json={"domain": "example.com"})
+    )
+    queried: list[str] = []
+
+    async def resolve(self: Port43WhoisClient, domain: str) -> str:
+        return "whois.example"
+
+    async def query(self: Port43WhoisClient, server: str, query: str) -> str:
+        queried.append(server)
+        return ""
+
+    monkeypatch.setattr(Port43WhoisClient, "_resolve_server_for_domain", resolve)
+    monkeypatch.setattr(Port43WhoisClient, "_query", query)
+
+    async def run() -> DomainData:
+        rm = RequestManager(RequestSettings(breaker_failures=1))
+        rm.breakers.failure("whois.example:43")
+        handler = DomainHandler(rm=rm, ip2whois_key="key")
+        try:
+            return await handler.fetch("example.com")
+        finally:
+            await rm.aclose()
+
+    result = asyncio.run(run())
+    assert queried == []  # the open circuit refused port 43 without connecting
+    assert paid.call_count == 1
+    assert result.whois is not None
+
+
+@respx.mock
+def test_stats_json_reports_requests_cache_and_stages(capsys: Any) -> None:
+    respx.get("https://ipwho.is/1.1.1.1").mock(
+        return_value=Response(200, json={"success": True, "ip": "1.1.1.1"})
+    )
+
+    assert main(["1.1.1.1", "1.1.1.1", "--output", "json", "--stats", "json"]) == 0
+    stats = json.loads(capsys.readouterr().err)
+    requests = stats["counters"]["wib_http_requests_total"]
+    assert requests == [{"labels": {"host": "ipwho.is", "status": "200"}, "value": 1.0}]
+    cache = {
+        (c["labels"]["cache"], c["labels"]["result"]): c["value"]
+        for c in stats["counters"]["wib_cache_requests_total"]
+    }
+    assert cache[("result", "miss")] >= 1
+    stages = {h["labels"]["stage"]: h["count"] for h in stats["histograms"]["wib_stage_seconds"]}
+    assert stages == {"geo": 2, "ip_lookup": 2}
+
+
+@respx.mock
+def test_rich_table_view_prints_one_row_per_entity(capsys: Any) -> None:
+    for ip, city in (("1.1.1.1", "Los Angeles"), ("8.8.8.8", "Mountain View")):
+        respx.get(f"https://ipwho.is/{ip}").mock(
+            return_value=Response(200, json={"success": True, "ip": ip, "city": city})
+        )
+
+    assert main(["1.1.1.1", "8.8.8.8", "--table", "--no-color"]) == 0
+    lines = [line for line in capsys.readouterr().out.splitlines() if line.strip()]
+    assert "Entity" in lines[0] and "ASN" in lines[0]
+    assert [line.split()[0] for line in lines[-2:]] == ["1.1.1.1", "8.8.8.8"]
+    assert "Los Ange" in lines[-2]  # cut to fit 80 columns
+
+    assert main(["1.1.1.1", "--table", "--one-column", "--no-color"]) == 0
+    lines = [line for line in capsys.readouterr().out.splitlines() if line.strip()]
+    header, row = lines[0], lines[-1]
+    assert header.split() == ["Entity", "Summary"]
+    assert row.split()[0] == "1.1.1.1" and "Los Angeles" in row
+
+
+def test_batch_progress_reports_counts_on_a_terminal() -> None:
+    out = io.StringIO()
+    console = Console(file=out, force_terminal=True, width=160, color_system=None)
+    ui = BatchRenderer(table=True, inflight=lambda: 1, errors=lambda: 3, console=console)
+    with ui:
+        ui.add("ip", IpData(ip="192.0.2.1"))
+        ui.progress.refresh()
+        # the total is only known once the whole input has been read
+        assert "1/?" in out.getvalue()
+        ui.set_total(2)
+        ui.progress.refresh()
+    text = out.getvalue()
+    assert "192.0.2.1" in text
+    assert "1/2" in text and "1 in flight" in text and "3 errors" in text
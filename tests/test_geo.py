@@ -0,0 +1,235 @@
+import asyncio
+import json
+from pathlib import Path
+from typing import Any
+
+import httpx
+import respx
+from httpx import Response
+
+from wib.clients import Ip2LocationClient, IpinfoClient
+from wib.clients.offline_geo import (
+    GeoTable,
+    SourceFormat,
+    build_table,
+    detect_format,
+    read_ranges,
+)
+from wib.config import AppConfig, GeoService
+from wib.config.config import Keys
+from wib.http.request import RequestManager
+from wib.main import main
+from wib.models.common import IpGeo
+from wib.session import LookupSession
+
+IPTOASN = (
+    "1.0.0.0\t1.0.0.255\t13335\tUS\tCLOUDFLARENET\n"
+    "1.0.1.0\t1.0.3.255\t0\tNone\tNot routed\n"
+    "1.1.1.0\t1.1.1.255\t13335\tUS\tCLOUDFLARENET\n"
+    "8.8.8.0\t8.8.8.255\t15169\tUS\tGOOGLE\n"
+    "2606:4700::\t2606:4700:ffff:ffff:ffff:ffff:ffff:ffff\t13335\tUS\tCLOUDFLARENET\n"
+)
+
+# IP2Location LITE DB5 IPv6 layout: IPv4 space appears as ::ffff:a.b.c.d integers
+IP2LOCATION = (
+    '"0","281470681743359","-","-","-","-","0.000000","0.000000"\n'
+    '"281470698520576","281470698520831","AU","Australia","Queensland","Brisbane",'
+    '"-27.467939","153.028091"\n'
+    '"58568830314966105553470370067249102848","58568830394194268067734707660793053183",'
+    '"US","United States of America","California","San Francisco","37.7749","-122.4194"\n'
+)
+
+
+def test_iptoasn_table_lookups(tmp_path: Path) -> None:
+    dst = tmp_path / "asn.wibgeo"
+    assert detect_format(IPTOASN.splitlines()[0]) == SourceFormat.iptoasn
+    ranges = read_ranges(IPTOASN.splitlines(keepends=True), SourceFormat.iptoasn)
+    assert build_table(ranges, dst) == (3, 1)
+
+    table = GeoTable(dst)
+    try:
+        cf = table.lookup("1.1.1.1")
+        assert cf is not None
+        assert cf[:4] == ("13335", "CLOUDFLARENET", None, "US")
+        assert table.lookup("8.8.8.255") is not None
+        assert table.lookup("8.8.9.0") is None
+        # unrouted rows are dropped
+        assert table.lookup("1.0.2.1") is None
+        assert table.lookup("0.0.0.1") is None
+        v6 = table.lookup("2606:4700:4700::1111")
+        assert v6 is not None
+        assert v6[0] == "13335"
+        assert table.lookup("2001:db8::1") is None
+        assert table.lookup("::ffff:8.8.8.8") == table.lookup("8.8.8.8")
+        assert table.lookup("not an ip") is None
+    finally:
+        table.close()
+
+
+def test_ip2location_table_maps_v4_ranges(tmp_path: Path) -> None:
+    dst = tmp_path / "db5.wibgeo"
+    assert detect_format(IP2LOCATION.splitlines()[0]) == SourceFormat.ip2location
+    ranges = read_ranges(IP2LOCATION.splitlines(keepends=True), SourceFormat.ip2location)
+    assert build_table(ranges, dst) == (1, 1)
+
+    table = GeoTable(dst)
+    try:
+        assert table.lookup("1.0.0.1") == (
+            None,
+            None,
+            None,
+            "Australia",
+            "Queensland",
+            "Brisbane",
+            -27.467939,
+            153.028091,
+        )
+        sf = table.lookup("2c0f:f248::1")
+        assert sf is not None
+        assert sf[5] == "San Francisco"
+    finally:
+        table.close()
+
+
+@respx.mock
+def test_offline_geo_service_makes_no_network_calls(tmp_path: Path, capsys: Any) -> None:
+    src = tmp_path / "ip2asn-combined.tsv"
+    src.write_text(IPTOASN, encoding="utf-8")
+    dst = tmp_path / "geo.wibgeo"
+    assert main(["build-geo", str(src), "-o", str(dst)]) == 0
+    capsys.readouterr()
+
+    # respx rejects any request that is not mocked
+    args = ["1.1.1.1", "9.9.9.9", "--geo-service", "offline", "--geo-db", str(dst)]
+    assert main([*args, "--output", "json"]) == 0
+    data = json.loads(capsys.readouterr().out)
+    assert data[0]["data"]["geo"]["org"] == "CLOUDFLARENET"
+    assert data[1]["data"]["geo"] is None
+
+    missing = str(tmp_path / "missing.wibgeo")
+    assert main(["1.1.1.1", "--geo-service", "offline", "--geo-db", missing]) == 2  # noqa: PLR2004
+    assert "build-geo" in capsys.readouterr().out
+
+
+def test_ipv6_ranges_sharing_a_64_bit_prefix(tmp_path: Path) -> None:
+    rows = (
+        "2001:db8::\t2001:db8::ff\t64500\tNL\tLOW\n"
+        "2001:db8::1:0\t2001:db8::1:ff\t64501\tNL\tHIGH\n"
+        "2001:db9::\t2001:db9:ffff:ffff:ffff:ffff:ffff:ffff\t64502\tNL\tNEXT\n"
+    )
+    dst = tmp_path / "v6.wibgeo"
+    build_table(read_ranges(rows.splitlines(keepends=True), SourceFormat.iptoasn), dst)
+    table = GeoTable(dst)
+    try:
+        orgs = [
+            (r[1] if (r := table.lookup(ip)) else None)
+            for ip in (
+                "2001:db8::10",
+                "2001:db8::100",
+                "2001:db8::1:1",
+                "2001:db9::5",
+                "2001:db7::",
+            )
+        ]
+        assert orgs == ["LOW", None, "HIGH", "NEXT", None]
+    finally:
+        table.close()
+
+
+@respx.mock
+def test_ipinfo_batches_ips(tmp_path: Path, monkeypatch: Any, capsys: Any) -> None:
+    def batch(request: httpx.Request) -> Response:
+        ips = json.loads(request.content)
+        assert len(ips) <= IpinfoClient.BATCH_SIZE
+        return Response(
+            200,
+            json={
+                ip: {"ip": ip, "org": "AS64500 Example Net", "country": "NL", "loc": "52.3,4.9"}
+                for ip in ips
+            },
+        )
+
+    route = respx.post("https://ipinfo.io/batch").mock(side_effect=batch)
+    ips = [f"10.0.{i // 256}.{i % 256}" for i in range(2500)]
+    feed = tmp_path / "ips.txt"
+    feed.write_text("\n".join(ips), encoding="utf-8")
+    monkeypatch.setenv("IPINFO_API_KEY", "token")
+
+    args = ["-i", str(feed), "--geo-service", "ipinfo", "--output", "ndjson", "--no-cache"]
+    assert main(args) == 0
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [r["data"]["ip"] for r in records] == ips
+    assert records[0]["data"]["geo"]["asn"] == "64500"
+    assert records[0]["data"]["geo"]["org"] == "Example Net"
+    assert records[0]["data"]["geo"]["lat"] == 52.3  # noqa: PLR2004
+    # a handful of batch requests instead of one request per IP
+    assert route.call_count <= 5  # noqa: PLR2004
+    assert route.calls[0].request.url.params["token"] == "token"
+
+
+def test_prefetch_only_parses_entities_for_a_batching_geo_source(monkeypatch: Any) -> None:
+    parsed: list[str] = []
+
+    def normalize(entity: str) -> tuple[str, str]:
+        parsed.append(entity)
+        return "ip", entity
+
+    monkeypatch.setattr("wib.session.normalize_host_input", normalize)
+    keys = Keys(IPINFO_API_KEY="token")
+
+    async def run(service: GeoService) -> None:
+        cfg = AppConfig(geo_service=service, no_cache=True, keys=keys)
+        async with LookupSession(cfg) as session:
+            session.prefetch(["1.1.1.1"])
+
+    asyncio.run(run(GeoService.ipwhois))
+    assert parsed == []
+    asyncio.run(run(GeoService.ipinfo))
+    assert parsed == ["1.1.1.1"]
+
+
+@respx.mock
+def test_ip2location_bulk_client() -> None:
+    respx.post("https://bulk.ip2location.io/").mock(
+        return_value=Response(
+            200,
+            json=[
+                {
+                    "ip": "8.8.8.8",
+                    "country_name": "United States of America",
+                    "city_name": "Mountain View",
+                    "latitude": 37.4,
+                    "longitude": -122.1,
+                    "asn": "15169",
+                    "as": "Google LLC",
+                },
+                {"ip": "1.1.1.1", "error": {"error_message": "quota"}},
+            ],
+        )
+    )
+
+    async def run() -> list[IpGeo | None]:
+        rm = RequestManager()
+        client = Ip2LocationClient(rm, "key")
+        try:
+            results = await asyncio.gather(client.fetch("8.8.8.8"), client.fetch("1.1.1.1"))
+            assert respx.calls.call_count == 1
+            # the found location is kept; the miss is asked for again
+            await client.fetch("8.8.8.8")
+            assert respx.calls.call_count == 1
+            await client.fetch("1.1.1.1")
+            assert respx.calls.call_count == 2  # noqa: PLR2004
+            return list(results)
+        finally:
+            await rm.aclose()
+
+    google, missing = asyncio.run(run())
+    assert google is not None
+    assert (google.asn, google.org, google.city) == ("15169", "Google LLC", "Mountain View")
+    assert missing is None
+
+
+def test_batch_geo_service_requires_key(monkeypatch: Any, capsys: Any) -> None:
+    monkeypatch.delenv("IPINFO_API_KEY", raising=False)
+    assert main(["1.1.1.1", "--geo-service", "ipinfo"]) == 2  # noqa: PLR2004
+    assert "IPINFO_API_KEY" in capsys.readouterr().out
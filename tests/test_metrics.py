@@ -0,0 +1,20 @@
+from wib.metrics import MetricsRegistry
+
+
+def test_prometheus_export_counters_and_histograms() -> None:
+    metrics = MetricsRegistry()
+    metrics.inc("wib_http_requests_total", host="rdap.org", status="200")
+    metrics.inc("wib_http_requests_total", host="rdap.org", status="200")
+    metrics.inc("wib_http_requests_total", host="rdap.org", status="timeout")
+    metrics.observe("wib_http_request_seconds", 0.03, host="rdap.org")
+    metrics.observe("wib_http_request_seconds", 20.0, host="rdap.org")
+
+    text = metrics.to_prometheus()
+    assert "# TYPE wib_http_requests_total counter" in text
+    assert 'wib_http_requests_total{host="rdap.org",status="200"} 2' in text
+    assert 'wib_http_request_seconds_bucket{host="rdap.org",le="0.025"} 0' in text
+    assert 'wib_http_request_seconds_bucket{host="rdap.org",le="0.05"} 1' in text
+    assert 'wib_http_request_seconds_bucket{host="rdap.org",le="+Inf"} 2' in text
+    assert 'wib_http_request_seconds_count{host="rdap.org"} 2' in text
+    assert metrics.counter("wib_http_requests_total", host="rdap.org") == 3  # noqa: PLR2004
+    assert "wib_http_request_seconds[host=rdap.org] n=2" in metrics.summary()
@@ -0,0 +1,127 @@
+import asyncio
+import threading
+from collections.abc import Iterator
+from typing import Any
+
+import pytest
+
+from wib.pipeline import READ_BATCH, iter_lookups
+
+
+def test_iter_lookups_is_ordered_and_bounded() -> None:
+    in_flight = 0
+    peak = 0
+    read = 0
+
+    class FakeSession:
+        def prefetch(self, entities: Any) -> None:
+            pass
+
+        async def lookup(self, entity: str) -> tuple[str, Any]:
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            # earlier entities finish last
+            await asyncio.sleep(0.001 * (int(entity) % 5))
+            in_flight -= 1
+            if entity in ("3", "13"):
+                raise ValueError("bad entity")
+            return "ip", entity
+
+    def feed() -> Iterator[str]:
+        nonlocal read
+        for i in range(10_000):
+            read += 1
+            yield str(i)
+
+    failed: list[tuple[str, str]] = []
+
+    async def run() -> list[Any]:
+        out = []
+        gen = iter_lookups(
+            FakeSession(),  # type: ignore[arg-type]
+            feed(),
+            concurrency=3,
+            on_error=lambda entity, exc: failed.append((entity, str(exc))),
+        )
+        async for _, value in gen:
+            out.append(value)
+            if len(out) == 20:  # noqa: PLR2004
+                break
+        await gen.aclose()
+        return out
+
+    out = asyncio.run(run())
+    # failed lookups are reported in their turn and skipped; the stream goes on
+    assert out == [str(i) for i in range(22) if i not in (3, 13)]
+    assert failed == [("3", "bad entity"), ("13", "bad entity")]
+    assert peak <= 3  # noqa: PLR2004
+    # the reader stops far short of the whole feed once the window is full
+    assert read < 3 * READ_BATCH
+
+
+def test_iter_lookups_raises_without_on_error() -> None:
+    class FakeSession:
+        def prefetch(self, entities: Any) -> None:
+            pass
+
+        async def lookup(self, entity: str) -> tuple[str, Any]:
+            if entity == "bad":
+                raise ValueError("bad entity")
+            return "ip", entity
+
+    async def run() -> list[Any]:
+        out = []
+        gen = iter_lookups(FakeSession(), ["a", "bad", "b"], concurrency=2)  # type: ignore[arg-type]
+        with pytest.raises(ValueError, match="bad entity"):
+            async for _, value in gen:
+                out.append(value)
+        return out
+
+    assert asyncio.run(run()) == ["a"]
+
+
+def test_iter_lookups_unordered_yields_in_completion_order() -> None:
+    class FakeSession:
+        def prefetch(self, entities: Any) -> None:
+            pass
+
+        async def lookup(self, entity: str) -> tuple[str, Any]:
+            await asyncio.sleep(0.05 if entity == "slow" else 0)
+            return "ip", entity
+
+    async def run() -> list[Any]:
+        gen = iter_lookups(
+            FakeSession(), ["slow", "a", "b"], concurrency=3, ordered=False  # type: ignore[arg-type]
+        )
+        return [value async for _, value in gen]
+
+    assert asyncio.run(run()) == ["a", "b", "slow"]
+
+
+def test_iter_lookups_does_not_wait_for_a_full_batch() -> None:
+    first_out = threading.Event()
+    waited: list[bool] = []
+
+    class FakeSession:
+        def prefetch(self, entities: Any) -> None:
+            pass
+
+        async def lookup(self, entity: str) -> tuple[str, Any]:
+            return "ip", entity
+
+    def live_feed() -> Iterator[str]:
+        # like a pipe: the next line only comes after the first result is out
+        yield "a"
+        waited.append(first_out.wait(timeout=5))
+        yield "b"
+
+    async def run() -> list[Any]:
+        out = []
+        async for _, value in iter_lookups(FakeSession(), live_feed(), concurrency=2):  # type: ignore[arg-type]
+            out.append(value)
+            first_out.set()
+        return out
+
+    assert asyncio.run(run()) == ["a", "b"]
+    assert waited == [True]
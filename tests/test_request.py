@@ -0,0 +1,226 @@
+import asyncio
+import time
+from typing import Any
+
+import httpx
+import pytest
+import respx
+from httpx import Response
+
+from wib.http.breaker import BreakerState, CircuitOpenError
+from wib.http.lru import TtlLruCache
+from wib.http.ratelimit import RateLimit
+from wib.http.request import RequestManager, RequestSettings
+
+
+def test_lru_evicts_oldest_and_expires() -> None:
+    cache: TtlLruCache[int] = TtlLruCache(max_entries=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" is now most recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    cache.set("d", 4, ttl=-1)
+    assert cache.get("d") is None
+
+
+def test_lru_bounded_by_bytes() -> None:
+    cache: TtlLruCache[str] = TtlLruCache(max_entries=10, ttl=60, max_bytes=10)
+    cache.set("a", "x", size=6)
+    cache.set("b", "y", size=6)
+    assert cache.get("a") is None
+    assert cache.get("b") == "y"
+    cache.set("huge", "z", size=11)
+    assert cache.get("huge") is None
+
+
+@respx.mock
+def test_get_json_coalesces_concurrent_requests() -> None:
+    async def slow(request: Any) -> Response:
+        await asyncio.sleep(0.05)
+        return Response(200, json={"ok": True})
+
+    route = respx.get("https://example.test/x").mock(side_effect=slow)
+    missing = respx.get("https://example.test/missing").mock(return_value=Response(404))
+
+    async def run() -> list[Any]:
+        rm = RequestManager()
+        try:
+            results = await asyncio.gather(
+                *(rm.get_json("https://example.test/x") for _ in range(5))
+            )
+            results.append(await rm.get_json("https://example.test/x"))
+            results.append(await rm.get_json("https://example.test/missing"))
+            results.append(await rm.get_json("https://example.test/missing"))
+            return results
+        finally:
+            await rm.aclose()
+
+    results = asyncio.run(run())
+    assert results[:6] == [{"ok": True}] * 6
+    assert results[6:] == [None, None]
+    assert route.call_count == 1
+    # failures are not cached
+    assert missing.call_count == len(results[6:])
+
+
+@respx.mock
+def test_retries_429_after_retry_after_and_gives_up_beyond_budget() -> None:
+    route = respx.get("https://api.example/throttled").mock(
+        side_effect=[
+            Response(429, headers={"Retry-After": "0.05"}),
+            Response(200, json={"ok": True}),
+        ]
+    )
+    down = respx.get("https://api.example/down").mock(
+        return_value=Response(503, headers={"Retry-After": "3600"})
+    )
+
+    async def run() -> tuple[Any, Any, float]:
+        rm = RequestManager(RequestSettings(rate_limits={}))
+        try:
+            started = time.monotonic()
+            ok = await rm.get_json("https://api.example/throttled")
+            elapsed = time.monotonic() - started
+            return ok, await rm.get_json("https://api.example/down"), elapsed
+        finally:
+            await rm.aclose()
+
+    ok, down_result, elapsed = asyncio.run(run())
+    assert ok == {"ok": True}
+    assert route.call_count == 2  # noqa: PLR2004
+    assert elapsed >= 0.05  # noqa: PLR2004
+    # an hour-long Retry-After exceeds the retry budget: no retry, no hang
+    assert down_result is None
+    assert down.call_count == 1
+
+
+@respx.mock
+def test_token_bucket_paces_requests_per_host() -> None:
+    respx.get(url__startswith="https://slow.example/").mock(return_value=Response(200, json={}))
+    respx.get(url__startswith="https://fast.example/").mock(return_value=Response(200, json={}))
+    limits = {"slow.example": RateLimit(rate=20.0, burst=1)}
+
+    async def run() -> tuple[float, float]:
+        rm = RequestManager(RequestSettings(rate_limits=limits))
+        try:
+            started = time.monotonic()
+            await asyncio.gather(*(rm.get(f"https://fast.example/{i}") for i in range(5)))
+            fast = time.monotonic() - started
+            started = time.monotonic()
+            await asyncio.gather(*(rm.get(f"https://slow.example/{i}") for i in range(5)))
+            return fast, time.monotonic() - started
+        finally:
+            await rm.aclose()
+
+    fast, slow = asyncio.run(run())
+    # 1 token up front, then 4 more at 20/s
+    assert slow >= 0.18  # noqa: PLR2004
+    assert fast < 0.18  # noqa: PLR2004
+
+
+@respx.mock
+def test_exhausted_ratelimit_headers_pause_the_host() -> None:
+    respx.get("https://api.example/a").mock(
+        return_value=Response(
+            200, json={}, headers={"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "0.1"}
+        )
+    )
+    respx.get("https://api.example/b").mock(return_value=Response(200, json={}))
+
+    async def run() -> float:
+        rm = RequestManager(RequestSettings(rate_limits={}))
+        try:
+            await rm.get("https://api.example/a")
+            started = time.monotonic()
+            await rm.get("https://api.example/b")
+            return time.monotonic() - started
+        finally:
+            await rm.aclose()
+
+    assert asyncio.run(run()) >= 0.09  # noqa: PLR2004
+
+
+@respx.mock
+def test_quota_is_enforced_and_persisted() -> None:
+    route = respx.get(url__startswith="https://metered.example/").mock(
+        return_value=Response(200, json={"n": 1})
+    )
+    limits = {"metered.example": RateLimit(rate=100.0, burst=10, quota=2, quota_period="day")}
+
+    async def run() -> list[Any]:
+        rm = RequestManager(RequestSettings(rate_limits=limits))
+        try:
+            return [await rm.get_json(f"https://metered.example/{i}") for i in range(3)]
+        finally:
+            await rm.aclose()
+
+    assert asyncio.run(run()) == [{"n": 1}, {"n": 1}, None]
+    assert route.call_count == 2  # noqa: PLR2004
+    # a new run (process) sees the saved count
+    assert asyncio.run(run()) == [None, None, None]
+    assert route.call_count == 2  # noqa: PLR2004
+
+
+@respx.mock
+def test_circuit_breaker_fails_fast_then_probes() -> None:
+    route = respx.get(url__startswith="https://down.example/").mock(
+        side_effect=httpx.ConnectError("refused")
+    )
+    settings = RequestSettings(max_retries=0, breaker_failures=2, breaker_reset=0.05)
+
+    async def run() -> None:
+        rm = RequestManager(settings)
+        try:
+            for i in range(2):
+                with pytest.raises(httpx.ConnectError):
+                    await rm.get(f"https://down.example/{i}")
+            assert rm.breakers.state("down.example") == BreakerState.open
+            with pytest.raises(CircuitOpenError):
+                await rm.get("https://down.example/2")
+            assert route.call_count == 2  # noqa: PLR2004
+
+            await asyncio.sleep(0.06)
+            assert rm.breakers.state("down.example") == BreakerState.half_open
+            route.side_effect = None
+            route.return_value = Response(200, json={})
+            # the probe goes through and closes the circuit
+            assert (await rm.get("https://down.example/3")).status_code == 200  # noqa: PLR2004
+            assert rm.breakers.state("down.example") == BreakerState.closed
+        finally:
+            await rm.aclose()
+
+    asyncio.run(run())
+
+
+@respx.mock
+def test_circuit_refusal_during_backoff_is_not_a_failure(monkeypatch: Any) -> None:
+    async def refuse(request: httpx.Request) -> Response:
+        if request.url.path == "/slow":
+            await asyncio.sleep(0.05)
+        raise httpx.ConnectError("refused")
+
+    route = respx.get(url__startswith="https://down.example/").mock(side_effect=refuse)
+    monkeypatch.setattr("wib.http.request._compute_backoff", lambda attempt: 0.01)
+    settings = RequestSettings(max_retries=1, breaker_failures=1, breaker_reset=60)
+
+    async def run() -> None:
+        rm = RequestManager(settings)
+        try:
+            slow = asyncio.create_task(rm.get("https://down.example/slow"))
+            # fails twice and opens the circuit while /slow is still on its first attempt
+            with pytest.raises(httpx.ConnectError):
+                await rm.get("https://down.example/fast")
+            circuit = rm.breakers._circuits["down.example"]
+            failures, opened_at = circuit.failures, circuit.opened_at
+            assert failures == 1
+            # /slow's retry is refused locally, which must not count against the host
+            with pytest.raises(CircuitOpenError):
+                await slow
+            assert (circuit.failures, circuit.opened_at) == (failures, opened_at)
+            assert route.call_count == 3  # noqa: PLR2004
+        finally:
+            await rm.aclose()
+
+    asyncio.run(run())
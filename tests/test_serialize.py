@@ -0,0 +1,122 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from typing import Any
+
+import pytest
+import respx
+from httpx import Response
+from pydantic import BaseModel
+
+from wib.columnar import ResultColumns
+from wib.main import main
+from wib.models.common import DnsRecordMx, DomainData, DomainDns, DomainWhois, IpData, IpGeo
+from wib.serialize import dumps_record, dumps_records
+from wib.utils import UserVisibleError
+
+RESULTS: list[tuple[str, BaseModel]] = [
+    (
+        "domain",
+        DomainData(
+            domain="example.com",
+            whois=DomainWhois(
+                domain="example.com",
+                registrar='Ex "Reg"\nLtd é',
+                nameservers=["a.iana-servers.net"],
+                created=datetime(1995, 8, 14, 4, tzinfo=timezone.utc),
+            ),
+            dns=DomainDns(a=[], mx=[DnsRecordMx(preference=0, exchange=".")]),
+            urlhaus={},
+        ),
+    ),
+    ("ip", IpData(ip="1.1.1.1", geo=IpGeo(ip="1.1.1.1", lat=-33.49, lon=143.21))),
+]
+
+
+def _reference(obj: Any, indent: int | None) -> str:
+    separators = None if indent else (",", ":")
+    return json.dumps(obj, indent=indent, separators=separators, ensure_ascii=False)
+
+
+def test_direct_serialization_matches_json_dumps_layout() -> None:
+    dumped = [{"kind": k, "data": d.model_dump(mode="json")} for k, d in RESULTS]
+    for indent in (2, None):
+        assert dumps_records(RESULTS, indent=indent).decode() == _reference(dumped, indent)
+        kind, data = RESULTS[1]
+        assert dumps_record(kind, data, indent=indent).decode() == _reference(dumped[1], indent)
+    assert dumps_records([], indent=2) == b"[]"
+
+
+@respx.mock
+def test_compact_json_output(capsys: Any) -> None:
+    for ip in ("1.1.1.1", "8.8.8.8"):
+        respx.get(f"https://ipwho.is/{ip}").mock(
+            return_value=Response(200, json={"success": True, "ip": ip, "city": "Zürich"})
+        )
+
+    assert main(["1.1.1.1", "8.8.8.8", "--output", "json", "--compact"]) == 0
+    out = capsys.readouterr().out
+    assert out.count("\n") == 1
+    assert [r["data"]["geo"]["city"] for r in json.loads(out)] == ["Zürich", "Zürich"]
+
+
+@respx.mock
+def test_csv_output_from_columnar_store(capsys: Any, tmp_path: Any) -> None:
+    respx.get("https://ipwho.is/1.1.1.1").mock(
+        return_value=Response(
+            200, json={"success": True, "ip": "1.1.1.1", "country": "AU", "latitude": -33.5}
+        )
+    )
+    respx.get("https://rdap.org/domain/example.com").mock(
+        return_value=Response(
+            200,
+            json={
+                "ldhName": "example.com",
+                "nameservers": [
+                    {"ldhName": "b.iana-servers.net"},
+                    {"ldhName": "a.iana-servers.net"},
+                ],
+                "events": [{"eventAction": "registration", "eventDate": "1995-08-14T04:00:00Z"}],
+            },
+        )
+    )
+
+    assert main(["1.1.1.1", "example.com", "--output", "csv", "--no-cache"]) == 0
+    rows = list(csv.DictReader(io.StringIO(capsys.readouterr().out)))
+    assert [r["entity"] for r in rows] == ["1.1.1.1", "example.com"]
+    assert rows[0]["kind"] == "ip" and rows[0]["country"] == "AU" and rows[0]["lat"] == "-33.5"
+    assert rows[0]["registrar"] == "" and rows[0]["dnssec"] == ""
+    assert json.loads(rows[1]["nameservers"]) == ["a.iana-servers.net", "b.iana-servers.net"]
+    assert rows[1]["created"] == "1995-08-14T04:00:00Z"
+
+
+def test_result_columns_share_repeated_values() -> None:
+    columns = ResultColumns()
+    for i in range(3):
+        geo = IpGeo(ip=f"10.0.0.{i}", asn="64500", country="US", lat=None)
+        columns.append("ip", IpData(ip=f"10.0.0.{i}", geo=geo))
+    assert len(columns) == 3  # noqa: PLR2004
+    assert columns.columns["country"].values == [None, "US"]  # type: ignore[union-attr]
+    first = next(columns.rows())
+    assert first[:4] == ("ip", "10.0.0.0", "64500", None)
+
+
+def test_parquet_needs_out_file() -> None:
+    with pytest.raises(UserVisibleError, match="--out-file"):
+        main(["1.1.1.1", "--output", "parquet"])
+
+
+def test_parquet_export(tmp_path: Any) -> None:
+    pq = pytest.importorskip("pyarrow.parquet")
+    columns = ResultColumns()
+    for kind, data in RESULTS:
+        columns.append(kind, data)  # type: ignore[arg-type]
+    path = tmp_path / "results.parquet"
+    columns.to_parquet(path)
+
+    table = pq.read_table(path).to_pylist()
+    assert [r["entity"] for r in table] == ["example.com", "1.1.1.1"]
+    assert table[0]["nameservers"] == ["a.iana-servers.net"]
+    assert table[0]["created"] == datetime(1995, 8, 14, 4, tzinfo=timezone.utc)
+    assert table[1]["lat"] == -33.49 and table[1]["dnssec"] is None  # noqa: PLR2004
@@ -0,0 +1,97 @@
+import asyncio
+import json
+from http import HTTPStatus
+from typing import Any
+
+import respx
+from httpx import Response
+
+from wib.config import load_config
+from wib.serve import LookupServer
+from wib.session import LookupSession
+
+
+def _mock_ipwho(*ips: str) -> dict[str, respx.Route]:
+    return {
+        ip: respx.get(f"https://ipwho.is/{ip}").mock(
+            return_value=Response(200, json={"success": True, "ip": ip, "city": "Los Angeles"})
+        )
+        for ip in ips
+    }
+
+
+async def _with_server(test: Any, **limits: int) -> Any:
+    async with LookupSession(load_config([])) as session:
+        limits = {"max_inflight": 4, "max_queue": 4, "max_batch": 10, **limits}
+        return await test(LookupServer(session, **limits))
+
+
+@respx.mock
+def test_routes_single_and_batch_lookups() -> None:
+    routes = _mock_ipwho("1.1.1.1", "8.8.8.8")
+
+    async def run(server: LookupServer) -> None:
+        reply = await server.respond("GET", "/ip/1.1.1.1")
+        assert reply.status == HTTPStatus.OK
+        assert json.loads(reply.body)["data"]["geo"]["city"] == "Los Angeles"
+
+        assert (await server.respond("GET", "/ip/example.com")).status == HTTPStatus.BAD_REQUEST
+        assert (await server.respond("GET", "/ip/not an ip")).status == HTTPStatus.BAD_REQUEST
+        assert (await server.respond("POST", "/ip/1.1.1.1")).status == HTTPStatus.METHOD_NOT_ALLOWED
+        assert (await server.respond("GET", "/nope")).status == HTTPStatus.NOT_FOUND
+
+        body = json.dumps({"entities": ["8.8.8.8", "1.1.1.1", "not an ip"]}).encode()
+        reply = await server.respond("POST", "/lookup", body)
+        records = json.loads(reply.body)
+        assert [r["data"]["ip"] for r in records[:2]] == ["8.8.8.8", "1.1.1.1"]
+        assert records[2]["entity"] == "not an ip" and "error" in records[2]
+        assert (await server.respond("POST", "/lookup", b"{")).status == HTTPStatus.BAD_REQUEST
+
+    asyncio.run(_with_server(run))
+    # the second 1.1.1.1 came from the session's caches
+    assert routes["1.1.1.1"].call_count == 1
+
+
+@respx.mock
+def test_full_queue_is_refused_with_retry_after() -> None:
+    _mock_ipwho("1.1.1.1")
+
+    async def run(server: LookupServer) -> None:
+        body = json.dumps(["1.1.1.1"] * 3).encode()
+        reply = await server.respond("POST", "/lookup", body)
+        assert reply.status == HTTPStatus.SERVICE_UNAVAILABLE
+        assert ("Retry-After", "1") in reply.headers
+        two = json.dumps(["1.1.1.1"] * 2).encode()
+        assert (await server.respond("POST", "/lookup", two)).status == HTTPStatus.OK
+        assert (await server.respond("GET", "/ip/1.1.1.1")).status == HTTPStatus.OK
+        assert server.pending == 0
+
+    asyncio.run(_with_server(run, max_inflight=1, max_queue=1))
+
+
+@respx.mock
+def test_keep_alive_connection_serves_several_requests() -> None:
+    _mock_ipwho("1.1.1.1")
+
+    async def run(server: LookupServer) -> list[bytes]:
+        listener = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        async with listener:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            heads = []
+            for path in ("/ip/1.1.1.1", "/healthz"):
+                writer.write(f"GET {path} HTTP/1.1\r\nHost: wib\r\n\r\n".encode())
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = int(head.split(b"Content-Length: ")[1].split(b"\r\n")[0])
+                heads.append(head + await reader.readexactly(length))
+            writer.close()
+            await writer.wait_closed()
+        return heads
+
+    first, health = asyncio.run(_with_server(run))
+    assert first.startswith(b"HTTP/1.1 200 OK\r\n") and b"Connection: keep-alive" in first
+    assert json.loads(health.split(b"\r\n\r\n", 1)[1]) == {
+        "status": "ok",
+        "inflight": 0,
+        "pending": 0,
+    }
@@ -0,0 +1,42 @@
+import subprocess
+import sys
+
+# Cumulative `-X importtime` budget for `import wib.main`, in microseconds. It measures
+# about 50 ms; the margin is for slow CI machines, not for new eager imports.
+IMPORT_BUDGET_US = 200_000
+
+
+def _import(code: str) -> tuple[dict[str, int], set[str]]:
+    """Run code in a fresh interpreter; (cumulative import us by module, loaded modules)."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative: dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, total, name = line.split("|")
+            if total.strip().isdigit():
+                cumulative[name.strip()] = int(total)
+    return cumulative, set(cumulative)
+
+
+def test_cli_import_defers_lookup_and_output_stacks() -> None:
+    cumulative, loaded = _import("import wib.main")
+    assert cumulative["wib.main"] < IMPORT_BUDGET_US
+    for heavy in ("httpx", "pydantic", "rich", "yaml", "importlib.metadata", "wib.ui"):
+        assert heavy not in loaded
+
+
+def test_json_lookup_path_skips_rich_and_yaml() -> None:
+    _, loaded = _import("import wib.main, wib.session")
+    assert {"httpx", "pydantic"} <= loaded
+    for heavy in ("yaml", "wib.ui", "wib.build_geo", "wib.update"):
+        assert heavy not in loaded
+    # wib itself never imports rich here, but when click is installed `import httpx`
+    # loads its command line module (httpx._main), which imports rich and click. That
+    # is about 70 ms of the lookup stack's import time and outside wib's control.
+    if "rich" in loaded:
+        assert "httpx._main" in loaded
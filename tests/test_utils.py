@@ -1,6 +1,9 @@
+from pathlib import Path
+
 import pytest
 
-from wib.utils import normalize_host_input
+from wib.utils import normalize_host_input, registrable_domain
+from wib.utils.paths import atomic_open, atomic_write_text
 
 
 @pytest.mark.parametrize(
@@ -16,3 +19,33 @@ def test_normalize_host_input(raw: str, kind: str, value: str) -> None:
     got_kind, got_value = normalize_host_input(raw)
     assert got_kind == kind
     assert got_value == value
+
+
+@pytest.mark.parametrize(
+    "host, registration",
+    [
+        ("a.cdn.example.co.uk", "example.co.uk"),
+        ("example.com", "example.com"),
+        ("co.uk", None),
+        ("com", None),
+        # "*.ck" with the "!www.ck" exception
+        ("foo.bar.ck", "foo.bar.ck"),
+        ("www.ck", "www.ck"),
+        # private suffixes are ignored: the registration is github.io
+        ("user.github.io", "github.io"),
+        ("a.b.unlisted", "b.unlisted"),
+        ("a.b.xn--p1ai", "b.xn--p1ai"),
+    ],
+)
+def test_registrable_domain(host: str, registration: str | None) -> None:
+    assert registrable_domain(host) == registration
+
+
+def test_atomic_open_replaces_only_complete_files(tmp_path: Path) -> None:
+    path = tmp_path / "sub" / "data.json"
+    atomic_write_text(path, "old")
+    with pytest.raises(RuntimeError), atomic_open(path) as f:
+        f.write(b"half")
+        raise RuntimeError("interrupted")
+    assert path.read_text(encoding="utf-8") == "old"
+    assert [p.name for p in path.parent.iterdir()] == ["data.json"]
@@ -0,0 +1,79 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from wib.clients.whois import Port43WhoisClient
+from wib.clients.whois_parser import parse_whois_text, template_for
+from wib.clients.whois_servers import WhoisServerTable
+
+
+def test_server_table_memoizes_and_persists(tmp_path: Path) -> None:
+    calls: list[str] = []
+
+    async def resolver(tld: str) -> str | None:
+        calls.append(tld)
+        await asyncio.sleep(0.01)
+        return f"whois.nic.{tld}"
+
+    async def run(table: WhoisServerTable) -> list[str | None]:
+        return list(await asyncio.gather(*(table.lookup(t, resolver) for t in ["zz", "zz", "ZZ"])))
+
+    table = WhoisServerTable(tmp_path / "servers.json", seed=False)
+    assert asyncio.run(run(table)) == ["whois.nic.zz"] * 3
+    assert calls == ["zz"]
+
+    reloaded = WhoisServerTable(tmp_path / "servers.json", seed=False)
+    assert asyncio.run(run(reloaded)) == ["whois.nic.zz"] * 3
+    assert calls == ["zz"]
+
+
+def test_server_table_seeded_and_stale_fallback(tmp_path: Path) -> None:
+    async def unreachable(tld: str) -> str | None:
+        return None
+
+    table = WhoisServerTable(tmp_path / "servers.json", refresh_interval=0)
+    # Every entry is stale with a zero refresh interval; IANA failing falls back to it.
+    assert asyncio.run(table.lookup("com", unreachable)) == "whois.verisign-grs.com"
+    assert asyncio.run(table.lookup("unknown-tld", unreachable)) is None
+
+
+CORPUS = Path(__file__).parent / "data" / "whois"
+
+
+@pytest.mark.parametrize(
+    "domain, registrar, nameservers, created, expires",
+    [
+        (
+            "example.com",
+            "RESERVED-Internet Assigned Numbers Authority",
+            2,
+            "1995-08-14",
+            "2025-08-13",
+        ),
+        ("example.org", "Example Registrar, Inc.", 2, "1995-08-31", "2025-08-30"),
+        ("example.co.uk", "Example Registrar Ltd", 2, "1996-08-26", "2030-08-26"),
+        ("example.ru", "RU-CENTER-RU", 2, "2004-01-20", "2030-01-20"),
+        ("example.fr", "EXAMPLE REGISTRAR SAS", 2, "2000-04-06", "2030-04-06"),
+        ("example.jp", None, 2, "2001-03-01", None),
+        ("example.de", None, 2, None, None),
+    ],
+)
+def test_parse_corpus(
+    domain: str, registrar: str | None, nameservers: int, created: str | None, expires: str | None
+) -> None:
+    text = (CORPUS / f"{domain}.txt").read_text(encoding="utf-8")
+    whois = Port43WhoisClient(servers=WhoisServerTable(seed=False))._parse_whois_text(domain, text)
+    assert whois.registrar == registrar
+    assert len(whois.nameservers or []) == nameservers
+    assert all(ns == ns.lower() and not ns.endswith(".") for ns in whois.nameservers or [])
+    assert (whois.created.date().isoformat() if whois.created else None) == created
+    assert (whois.expires.date().isoformat() if whois.expires else None) == expires
+
+
+def test_parse_prefers_higher_ranked_key_and_uses_template_query() -> None:
+    text = "Created: 2001-01-01\nCreation Date: 2000-01-01\nDNSSEC: unsigned\n"
+    whois = parse_whois_text("example.net", text)
+    assert whois.created is not None and whois.created.year == 2000  # noqa: PLR2004
+    assert whois.dnssec is False
+    assert template_for("jp").query.format(domain="example.jp") == "example.jp/e"
@@ -0,0 +1,116 @@
+import functools
+import json
+import queue
+import threading
+from collections import deque
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from wib.clients.ipwhois import IpWhoisClient
+from wib.config import load_config
+from wib.http.ratelimit import QuotaCounter
+from wib.main import main
+from wib.session import LookupSession
+from wib.workers import WorkerPool, _chunks, _worker_settings
+
+
+class _IpWho(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:  # noqa: N802 - http.server naming
+        ip = self.path.rsplit("/", 1)[-1]
+        body = json.dumps({"success": True, "ip": ip, "city": "Testville"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        pass
+
+
+def _point_at(base: str) -> None:
+    IpWhoisClient.BASE = base
+
+
+@pytest.fixture
+def ipwho(monkeypatch: Any) -> Iterator[str]:
+    # respx only patches this process, so the workers talk to a real local server
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _IpWho)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}/"
+    monkeypatch.setattr(WorkerPool, "initializer", functools.partial(_point_at, base))
+    yield base
+    server.shutdown()
+    server.server_close()
+
+
+def test_workers_merge_results_in_input_order(ipwho: str, tmp_path: Path, capsys: Any) -> None:
+    ips = [f"10.0.{i >> 8}.{i & 255}" for i in range(1300)]  # three chunks
+    source = tmp_path / "ips.txt"
+    source.write_text("\n".join(ips), encoding="utf-8")
+
+    argv = ["-i", str(source), "--workers", "2", "--output", "ndjson", "--stats", "json"]
+    assert main([*argv, "--concurrency", "20"]) == 0
+    captured = capsys.readouterr()
+    records = [json.loads(line) for line in captured.out.splitlines()]
+    assert [r["data"]["ip"] for r in records] == ips
+    assert {r["data"]["geo"]["city"] for r in records} == {"Testville"}
+    # each worker's metrics are merged into the parent's
+    requests = json.loads(captured.err)["counters"]["wib_http_requests_total"]
+    assert sum(c["value"] for c in requests) == len(ips)
+
+
+def test_workers_report_failed_lookups_and_go_on(ipwho: str, tmp_path: Path, capsys: Any) -> None:
+    source = tmp_path / "ips.txt"
+    source.write_text("10.0.0.1\nnot a host!!\n10.0.0.2\n", encoding="utf-8")
+
+    assert main(["-i", str(source), "--workers", "2", "--output", "ndjson"]) == 1
+    captured = capsys.readouterr()
+    records = [json.loads(line) for line in captured.out.splitlines()]
+    assert [r["data"]["ip"] for r in records] == ["10.0.0.1", "10.0.0.2"]
+    assert captured.err.startswith("wib: not a host!!: ")
+
+
+def test_worker_setup_errors_are_reported_like_without_workers(
+    monkeypatch: Any, capsys: Any
+) -> None:
+    monkeypatch.delenv("IPINFO_API_KEY", raising=False)
+    argv = ["1.1.1.1", "--geo-service", "ipinfo", "--workers", "2", "--output", "json"]
+    assert main(argv) == 2  # noqa: PLR2004
+    assert "IPINFO_API_KEY" in capsys.readouterr().out
+
+    # a worker failing to build its session sends the error back instead of dying
+    monkeypatch.setattr(LookupSession, "check_config", classmethod(lambda cls, cfg: None))
+    assert main(argv) == 2  # noqa: PLR2004
+    assert "IPINFO_API_KEY" in capsys.readouterr().out
+
+
+def test_chunks_track_input_indexes_only_when_ordered() -> None:
+    tasks: queue.Queue[Any] = queue.Queue()
+    for item in ((0, ["a", "b"]), (2, ["c"]), None):
+        tasks.put(item)
+    starts: deque[int] = deque()
+    assert list(_chunks(tasks, starts)) == ["a", "b", "c"]
+    assert list(starts) == [0, 1, 2]
+
+    # unordered runs keep nothing per entity
+    tasks.put((0, ["a"]))
+    tasks.put(None)
+    assert list(_chunks(tasks, None)) == ["a"]
+
+
+def test_worker_settings_split_rate_limits_and_quotas(tmp_path: Path) -> None:
+    cfg = load_config(["--rate-limit", "example.org=8:4", "--quota", "example.org=10/day"])
+    counter = QuotaCounter()
+    for _ in range(3):
+        counter.add("example.org")
+    counter.save({"example.org": "day"})
+
+    shares = [_worker_settings(cfg, 3, i).rate_limits["example.org"] for i in range(3)]
+    assert {(s.rate, s.burst) for s in shares} == {(8 / 3, 1)}
+    # 7 requests left today, shared 3 + 2 + 2 on top of the 3 already used
+    assert [s.quota for s in shares] == [6, 5, 5]
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
 import re
-from importlib import metadata as _md
 from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .api import Wib
 
 PYPROJECT_VERSION_PATTERN = re.compile(
     r"\[project\].*?^version\s*=\s*\"([^\"]+)\"", re.DOTALL | re.MULTILINE
@@ -27,6 +30,8 @@ def _read_pyproject_version() -> str | None:
 
 def _detect_version() -> str:
     # Prefer installed distribution version; fall back to pyproject when running from source.
+    from importlib import metadata as _md  # noqa: PLC0415 - only paid when asked for
+
     try:
         return _md.version("wib-osint")
     except _md.PackageNotFoundError:
@@ -36,6 +41,19 @@ def _detect_version() -> str:
         return "0.0.0+local"
 
 
-__version__ = _detect_version()
+def __getattr__(name: str) -> Any:
+    # __version__ is resolved on first access: distribution metadata lookup is slow enough
+    # to show up in the startup time of every `wib` invocation. Wib pulls in the lookup
+    # stack (httpx, pydantic), which the CLI only imports when it runs lookups.
+    if name == "Wib":
+        from .api import Wib  # noqa: PLC0415
+
+        return Wib
+    if name == "__version__":
+        version = _detect_version()
+        globals()["__version__"] = version
+        return version
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
-__all__ = ["__version__"]
+__all__ = ["Wib", "__version__"]
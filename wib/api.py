@@ -0,0 +1,105 @@
+"""Async API for embedding wib in an application's own event loop.
+
+    from wib import Wib
+    from wib.config import AppConfig
+
+    async with Wib(AppConfig(show_dns=True)) as w:
+        kind, data = await w.lookup("example.com")
+        async for entity, (kind, data) in w.lookup_many(entities):
+            ...
+
+Results are the same pydantic models the CLI prints (IpData / DomainData), so nothing is
+serialized on the way. AppConfig() starts from the built-in defaults without reading the
+environment; load_config(argv) gives the CLI's defaults, env file, API keys and flags.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import weakref
+from collections.abc import AsyncGenerator, AsyncIterable, Iterable
+from types import TracebackType
+
+from .config import AppConfig
+from .pipeline import OnError, Result, iter_entity_lookups
+from .session import LookupSession
+
+
+class Wib:
+    """One lookup session (handlers, HTTP pools, caches) shared by every lookup through it.
+
+    Use it as an async context manager, or call aclose() when done.
+    """
+
+    def __init__(self, config: AppConfig | None = None) -> None:
+        self.config = config or AppConfig()
+        self._session: LookupSession | None = None
+        self._streams: weakref.WeakSet[AsyncGenerator[tuple[str, Result], None]] = weakref.WeakSet()
+
+    @property
+    def session(self) -> LookupSession:
+        if self._session is None:
+            # Built lazily so a Wib can be created outside the loop that will use it
+            self._session = LookupSession(self.config)
+        return self._session
+
+    async def lookup(self, entity: str) -> Result:
+        """Look up one IP or domain; ValueError if it is neither."""
+        return await self.session.lookup(entity)
+
+    def lookup_many(
+        self,
+        entities: Iterable[str] | AsyncIterable[str],
+        *,
+        concurrency: int | None = None,
+        ordered: bool = False,
+        on_error: OnError | None = None,
+    ) -> AsyncGenerator[tuple[str, Result], None]:
+        """Stream (entity, (kind, data)) for entities from a sync or async iterable.
+
+        Each result comes with the input entity it answers. At most `concurrency`
+        (default: config.concurrency) lookups run at once and input is read only a few
+        batches ahead, so unbounded sources are fine. Results come as they complete, or
+        in input order with ordered=True. A failed lookup (e.g. ValueError for an entity
+        that is neither an IP nor a domain) raises from the iterator, unless on_error is
+        given: on_error(entity, exc) is called instead and the stream goes on.
+        """
+        stream = self._stream(
+            entities, concurrency or self.config.concurrency, ordered=ordered, on_error=on_error
+        )
+        self._streams.add(stream)
+        return stream
+
+    async def _stream(
+        self,
+        entities: Iterable[str] | AsyncIterable[str],
+        concurrency: int,
+        *,
+        ordered: bool,
+        on_error: OnError | None,
+    ) -> AsyncGenerator[tuple[str, Result], None]:
+        results = iter_entity_lookups(
+            self.session, entities, concurrency=concurrency, ordered=ordered, on_error=on_error
+        )
+        # Closing the pipeline cancels its reader and workers, also when the caller stops early
+        async with contextlib.aclosing(results):
+            async for result in results:
+                yield result
+
+    async def aclose(self) -> None:
+        for stream in list(self._streams):
+            await stream.aclose()
+        if self._session is not None:
+            await self._session.aclose()
+            self._session = None
+
+    async def __aenter__(self) -> Wib:
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        await self.aclose()
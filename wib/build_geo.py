@@ -0,0 +1,51 @@
+"""`wib build-geo`: convert an IP-range dataset into the table used by --geo-service offline."""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import time
+
+from .clients.offline_geo import (
+    GeoTable,
+    SourceFormat,
+    build_table,
+    default_path,
+    detect_format,
+    open_source,
+    read_ranges,
+)
+
+
+def run(argv: list[str]) -> int:
+    p = argparse.ArgumentParser(
+        prog="wib build-geo",
+        description=(
+            "Build the offline geolocation/ASN table from an iptoasn TSV "
+            "or IP2Location LITE CSV (optionally .gz)"
+        ),
+    )
+    p.add_argument("source", help="Dataset file")
+    p.add_argument(
+        "--format",
+        choices=["auto", *(f.value for f in SourceFormat)],
+        default="auto",
+        help="Dataset layout (default: detected from the first line)",
+    )
+    p.add_argument("-o", "--output", help=f"Table path (default: {default_path()})")
+    ns = p.parse_args(argv)
+
+    started = time.monotonic()
+    with open_source(ns.source) as f:
+        first = f.readline()
+        fmt = detect_format(first) if ns.format == "auto" else SourceFormat(ns.format)
+        lines = itertools.chain([first], f)
+        dst = ns.output or default_path()
+        n4, n6 = build_table(read_ranges(lines, fmt), dst)
+    table = GeoTable(dst)
+    table.close()
+    print(
+        f"geo table: {n4} IPv4 + {n6} IPv6 ranges ({fmt.value}) -> {dst} "
+        f"in {time.monotonic() - started:.1f}s"
+    )
+    return 0
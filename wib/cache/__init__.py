@@ -0,0 +1,3 @@
+from .store import CacheTtls, ResultCache
+
+__all__ = ["CacheTtls", "ResultCache"]
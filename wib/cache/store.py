@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import contextlib
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+from ..metrics import MetricsRegistry
+from ..utils.paths import cache_dir
+
+M = TypeVar("M", bound=BaseModel)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    expires REAL NOT NULL,
+    accessed REAL NOT NULL,
+    PRIMARY KEY (kind, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed);
+"""
+
+
+@dataclass
+class CacheTtls:
+    """Lifetime in seconds of each cached data type."""
+
+    whois: float = 3 * 24 * 3600.0
+    geo: float = 14 * 24 * 3600.0
+    # DNS entries use the smallest record TTL from the DoH answer, clamped to this range;
+    # dns_default applies when the resolver reported no TTL.
+    dns_default: float = 300.0
+    dns_min: float = 30.0
+    dns_max: float = 24 * 3600.0
+
+    def dns(self, record_ttl: int | None) -> float:
+        if record_ttl is None:
+            return self.dns_default
+        return min(self.dns_max, max(self.dns_min, float(record_ttl)))
+
+
+class ResultCache:
+    """Persistent SQLite cache of normalized lookup results (DomainWhois, DomainDns, IpGeo).
+
+    Entries are keyed by (kind, key) and stored as model JSON with an absolute expiry.
+    Once the table grows past max_entries the least recently read entries are evicted.
+    Storage errors are swallowed: a broken cache only costs a network round trip.
+    """
+
+    FILENAME = "results.sqlite3"
+
+    def __init__(
+        self,
+        path: Path | str | None = None,
+        *,
+        max_entries: int = 100_000,
+        ttls: CacheTtls | None = None,
+        refresh: bool = False,
+        metrics: MetricsRegistry | None = None,
+    ) -> None:
+        self.path = Path(path) if path is not None else cache_dir() / self.FILENAME
+        self.max_entries = max_entries
+        self.ttls = ttls or CacheTtls()
+        # refresh: ignore stored entries but still write fresh results back
+        self.refresh = refresh
+        self.metrics = metrics or MetricsRegistry.shared()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path, isolation_level=None, timeout=5.0)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._writes = 0
+
+    def get(self, kind: str, key: str, model: type[M]) -> M | None:
+        value = self._get(kind, key, model)
+        self.metrics.inc(
+            "wib_cache_requests_total",
+            cache="result",
+            kind=kind,
+            result="miss" if value is None else "hit",
+        )
+        return value
+
+    def has(self, kind: str, key: str) -> bool:
+        """Whether get() would find an entry; counts no hit or miss and marks nothing read."""
+        if self.refresh:
+            return False
+        try:
+            row = self._db.execute(
+                "SELECT 1 FROM results WHERE kind = ? AND key = ? AND expires > ?",
+                (kind, key, time.time()),
+            ).fetchone()
+        except sqlite3.Error:
+            return False
+        return row is not None
+
+    def _get(self, kind: str, key: str, model: type[M]) -> M | None:
+        if self.refresh:
+            return None
+        now = time.time()
+        try:
+            row = self._db.execute(
+                "SELECT value, expires FROM results WHERE kind = ? AND key = ?", (kind, key)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires = row
+            if expires <= now:
+                self._db.execute("DELETE FROM results WHERE kind = ? AND key = ?", (kind, key))
+                return None
+            self._db.execute(
+                "UPDATE results SET accessed = ? WHERE kind = ? AND key = ?", (now, kind, key)
+            )
+        except sqlite3.Error:
+            return None
+        try:
+            return model.model_validate_json(value)
+        except ValidationError:
+            return None
+
+    def put(self, kind: str, key: str, value: BaseModel, ttl: float) -> None:
+        now = time.time()
+        try:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results (kind, key, value, expires, accessed) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (kind, key, value.model_dump_json(), now + ttl, now),
+            )
+            self._writes += 1
+            # Checking the size on every insert would cost a table scan per lookup.
+            if self._writes % 256 == 1:
+                self._evict(now)
+        except sqlite3.Error:
+            return
+
+    def _evict(self, now: float) -> None:
+        self._db.execute("DELETE FROM results WHERE expires <= ?", (now,))
+        (count,) = self._db.execute("SELECT COUNT(*) FROM results").fetchone()
+        excess = int(count) - self.max_entries
+        if excess > 0:
+            self._db.execute(
+                "DELETE FROM results WHERE (kind, key) IN "
+                "(SELECT kind, key FROM results ORDER BY accessed ASC LIMIT ?)",
+                (excess,),
+            )
+
+    def close(self) -> None:
+        with contextlib.suppress(sqlite3.Error):
+            self._evict(time.time())
+        self._db.close()
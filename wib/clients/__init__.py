@@ -1,6 +1,17 @@
+from .batch_geo import BatchGeoClient
 from .dns import DnsClient
+from .ip2location import Ip2LocationClient
+from .ipinfo import IpinfoClient
 from .ipwhois import IpWhoisClient
 from .rdap import RdapClient
 from .whois import Port43WhoisClient
 
-__all__ = ["DnsClient", "IpWhoisClient", "RdapClient", "Port43WhoisClient"]
+__all__ = [
+    "BatchGeoClient",
+    "DnsClient",
+    "Ip2LocationClient",
+    "IpinfoClient",
+    "IpWhoisClient",
+    "RdapClient",
+    "Port43WhoisClient",
+]
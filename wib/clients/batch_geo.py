@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import asyncio
+from abc import ABC, abstractmethod
+from collections.abc import Iterable
+
+from ..http.lru import TtlLruCache
+from ..http.request import RequestManager
+from ..models.common import IpGeo
+
+# Prefetched results not yet collected by fetch() (e.g. the IP was answered from the
+# result cache instead) are dropped after this long or beyond this many entries. Only
+# found locations are kept, so an IP missing from a failed or partial batch is retried.
+_READY_TTL = 300.0
+_READY_MAX_ENTRIES = 20_000
+
+
+class BatchGeoClient(ABC):
+    """Base for geolocation APIs with a bulk endpoint.
+
+    fetch() and prefetch() queue IPs; a queue is sent as soon as it holds BATCH_SIZE IPs,
+    otherwise LINGER seconds after the first IP was queued, so concurrent callers share
+    requests. Subclasses implement _fetch_batch for one request of at most BATCH_SIZE IPs.
+    A failed request fails every fetch() waiting on it.
+    """
+
+    BATCH_SIZE = 100
+    LINGER = 0.02
+
+    def __init__(self, rm: RequestManager, api_key: str) -> None:
+        self.rm = rm
+        self.api_key = api_key
+        self._queue: list[str] = []
+        self._waiting: dict[str, asyncio.Future[IpGeo | None]] = {}
+        self._ready: TtlLruCache[IpGeo] = TtlLruCache(
+            max_entries=_READY_MAX_ENTRIES, ttl=_READY_TTL
+        )
+        self._timer: asyncio.TimerHandle | None = None
+        self._requests: set[asyncio.Task[None]] = set()
+
+    @abstractmethod
+    async def _fetch_batch(self, ips: list[str]) -> dict[str, IpGeo | None]:
+        """One request for at most BATCH_SIZE IPs; IPs missing from the result have no data."""
+
+    def prefetch(self, ips: Iterable[str]) -> None:
+        """Queue IPs that are about to be fetched so they ride in the same requests."""
+        for ip in ips:
+            if self._ready.get(ip) is None:
+                self._submit(ip)
+
+    async def fetch(self, ip: str) -> IpGeo | None:
+        ready = self._ready.get(ip)
+        if ready is not None:
+            return ready
+        # shield: a cancelled caller must not fail the other IPs of its batch
+        return await asyncio.shield(self._submit(ip))
+
+    def _submit(self, ip: str) -> asyncio.Future[IpGeo | None]:
+        fut = self._waiting.get(ip)
+        if fut is not None:
+            return fut
+        fut = asyncio.get_running_loop().create_future()
+        self._waiting[ip] = fut
+        self._queue.append(ip)
+        if len(self._queue) >= self.BATCH_SIZE:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.LINGER, self._flush)
+        return fut
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._queue:
+            batch = self._queue[: self.BATCH_SIZE]
+            del self._queue[: self.BATCH_SIZE]
+            task = asyncio.create_task(self._run(batch))
+            self._requests.add(task)
+            task.add_done_callback(self._requests.discard)
+
+    async def _run(self, batch: list[str]) -> None:
+        try:
+            results = await self._fetch_batch(batch)
+        except Exception as exc:
+            for ip in batch:
+                fut = self._waiting.pop(ip, None)
+                if fut is not None and not fut.done():
+                    fut.set_exception(exc)
+                    # Prefetched IPs may never be awaited; don't warn about them
+                    fut.exception()
+            return
+        for ip in batch:
+            geo = results.get(ip)
+            if geo is not None:
+                self._ready.set(ip, geo)
+            fut = self._waiting.pop(ip, None)
+            if fut is not None and not fut.done():
+                fut.set_result(geo)
+
+    async def aclose(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for task in list(self._requests):
+            task.cancel()
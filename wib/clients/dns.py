@@ -1,41 +1,86 @@
 from __future__ import annotations
 
-from http import HTTPStatus
+import asyncio
+import base64
 from typing import Any
 
+import httpx
+
 from ..http.request import RequestManager
 from ..models.common import DnsRecordMx, DomainDns
+from .dnswire import DnsWireError, build_query, parse_response
+
+RECORD_TYPES = ("A", "AAAA", "CNAME", "NS", "MX", "TXT")
+
+
+def _decode_dns_message(resp: httpx.Response) -> tuple[int, list[dict[str, Any]]] | None:
+    try:
+        return parse_response(resp.content)
+    except DnsWireError:
+        return None
 
 
 class DnsClient:
-    """DNS over HTTPS client using Google Public DNS.
+    """DNS over HTTPS client, Google Public DNS by default.
 
-    Docs: https://developers.google.com/speed/public-dns/docs/doh
-    Endpoint: https://dns.google/resolve?name=<domain>&type=<RRType>
+    Two backends:
+    - JSON API (default): GET <endpoint>?name=<domain>&type=<RRType>
+      Docs: https://developers.google.com/speed/public-dns/docs/doh/json
+    - RFC 8484 wire format (wire=True): GET <endpoint>?dns=<base64url message> with
+      application/dns-message. Over a shared HTTP/2 connection the concurrent queries
+      are multiplexed on one socket.
+
+    All record types for a domain are queried concurrently.
     """
 
     BASE = "https://dns.google/resolve"
+    WIRE_BASE = "https://dns.google/dns-query"
 
-    def __init__(self, rm: RequestManager) -> None:
+    def __init__(
+        self, rm: RequestManager, *, endpoint: str | None = None, wire: bool = False
+    ) -> None:
         self.rm = rm
+        self.wire = wire
+        self.endpoint = endpoint or (self.WIRE_BASE if wire else self.BASE)
 
     async def _resolve(self, name: str, rrtype: str) -> list[dict[str, Any]]:
-        resp = await self.rm.get(self.BASE, params={"name": name, "type": rrtype})
-        if resp.status_code != HTTPStatus.OK:
+        if self.wire:
+            return await self._resolve_wire(name, rrtype)
+        data = await self.rm.get_json(self.endpoint, params={"name": name, "type": rrtype})
+        if not isinstance(data, dict):
             return []
-        data: dict[str, Any] = resp.json()
         if int(data.get("Status", 0)) != 0:
             return []
         answers = data.get("Answer") or []
         return [a for a in answers if isinstance(a, dict)]
 
+    async def _resolve_wire(self, name: str, rrtype: str) -> list[dict[str, Any]]:
+        try:
+            query = build_query(name, rrtype)
+        except (DnsWireError, UnicodeError):
+            return []
+        # Unpadded base64url per RFC 8484 section 4.1
+        dns_param = base64.urlsafe_b64encode(query).rstrip(b"=").decode("ascii")
+        decoded = await self.rm.get_decoded(
+            self.endpoint,
+            _decode_dns_message,
+            params={"dns": dns_param},
+            headers={"Accept": "application/dns-message"},
+        )
+        if decoded is None:
+            return []
+        rcode, answers = decoded
+        return answers if rcode == 0 else []
+
     async def fetch(self, domain: str) -> DomainDns | None:
-        a = await self._resolve(domain, "A")
-        aaaa = await self._resolve(domain, "AAAA")
-        cname = await self._resolve(domain, "CNAME")
-        ns = await self._resolve(domain, "NS")
-        mx = await self._resolve(domain, "MX")
-        txt = await self._resolve(domain, "TXT")
+        result, _ = await self.fetch_with_ttl(domain)
+        return result
+
+    async def fetch_with_ttl(self, domain: str) -> tuple[DomainDns | None, int | None]:
+        """Resolve all record types and return them with the smallest answer TTL seen."""
+        a, aaaa, cname, ns, mx, txt = await asyncio.gather(
+            *(self._resolve(domain, rrtype) for rrtype in RECORD_TYPES)
+        )
 
         def extract_values(items: list[dict[str, Any]], *, field: str) -> list[str]:
             vals: list[str] = []
@@ -71,5 +116,10 @@ class DnsClient:
         )
         # If nothing resolved, return None
         if not any([result.a, result.aaaa, result.cname, result.ns, result.mx, result.txt]):
-            return None
-        return result
+            return None, None
+        ttls = [
+            int(it["TTL"])
+            for it in (*a, *aaaa, *cname, *ns, *mx, *txt)
+            if isinstance(it.get("TTL"), int)
+        ]
+        return result, min(ttls) if ttls else None
@@ -0,0 +1,114 @@
+"""Minimal DNS wire format (RFC 1035) codec for DNS over HTTPS (RFC 8484).
+
+Only what DnsClient needs: build a single-question query and decode the answer section
+of a response for A, AAAA, CNAME, NS, MX and TXT. Decoded answers use the same shape as
+the JSON DoH API ({"name", "type", "TTL", "data"}) so both backends share the parsing in
+DnsClient.
+"""
+
+from __future__ import annotations
+
+import ipaddress
+import struct
+from typing import Any
+
+RR_TYPES: dict[str, int] = {"A": 1, "NS": 2, "CNAME": 5, "MX": 15, "TXT": 16, "AAAA": 28}
+_CLASS_IN = 1
+_FLAG_RD = 0x0100
+_POINTER_MASK = 0xC0
+_MAX_POINTER_HOPS = 64
+_MAX_LABEL_LEN = 63
+_IPV4_LEN = 4
+_IPV6_LEN = 16
+_MX_MIN_RDLEN = 3
+_HEADER = struct.Struct("!HHHHHH")
+_RR_FIXED = struct.Struct("!HHIH")
+
+
+class DnsWireError(ValueError):
+    pass
+
+
+def build_query(name: str, rrtype: str) -> bytes:
+    """Encode a recursive query; ID 0 keeps identical queries HTTP-cacheable (RFC 8484 4.1)."""
+    qname = b""
+    for label in name.strip(".").split("."):
+        raw = label.encode("idna")
+        if not raw or len(raw) > _MAX_LABEL_LEN:
+            raise DnsWireError(f"invalid label in {name!r}")
+        qname += bytes([len(raw)]) + raw
+    qname += b"\x00"
+    return (
+        _HEADER.pack(0, _FLAG_RD, 1, 0, 0, 0)
+        + qname
+        + struct.pack("!HH", RR_TYPES[rrtype], _CLASS_IN)
+    )
+
+
+def _read_name(msg: bytes, offset: int) -> tuple[str, int]:
+    """Read a possibly compressed name; returns (dotted name, offset after it)."""
+    labels: list[str] = []
+    end: int | None = None
+    for _ in range(_MAX_POINTER_HOPS):
+        if offset >= len(msg):
+            raise DnsWireError("name runs past end of message")
+        length = msg[offset]
+        if length & _POINTER_MASK == _POINTER_MASK:
+            if offset + 1 >= len(msg):
+                raise DnsWireError("truncated compression pointer")
+            if end is None:
+                end = offset + 2
+            offset = ((length & 0x3F) << 8) | msg[offset + 1]
+            continue
+        if length == 0:
+            return ".".join(labels) + ".", end if end is not None else offset + 1
+        labels.append(msg[offset + 1 : offset + 1 + length].decode("ascii", errors="replace"))
+        offset += 1 + length
+    raise DnsWireError("too many compression pointers")
+
+
+def _rdata_text(msg: bytes, rtype: int, start: int, rdlen: int) -> str | None:
+    rdata = msg[start : start + rdlen]
+    if rtype == RR_TYPES["A"] and rdlen == _IPV4_LEN:
+        return str(ipaddress.IPv4Address(rdata))
+    if rtype == RR_TYPES["AAAA"] and rdlen == _IPV6_LEN:
+        return str(ipaddress.IPv6Address(rdata))
+    if rtype in (RR_TYPES["CNAME"], RR_TYPES["NS"]):
+        return _read_name(msg, start)[0]
+    if rtype == RR_TYPES["MX"] and rdlen >= _MX_MIN_RDLEN:
+        (pref,) = struct.unpack_from("!H", msg, start)
+        return f"{pref} {_read_name(msg, start + 2)[0]}"
+    if rtype == RR_TYPES["TXT"]:
+        parts: list[str] = []
+        i = 0
+        while i < rdlen:
+            n = rdata[i]
+            parts.append(rdata[i + 1 : i + 1 + n].decode("utf-8", errors="replace"))
+            i += 1 + n
+        return "".join(parts)
+    return None
+
+
+def parse_response(msg: bytes) -> tuple[int, list[dict[str, Any]]]:
+    """Decode a response into (rcode, answers)."""
+    if len(msg) < _HEADER.size:
+        raise DnsWireError("message shorter than header")
+    _, flags, qdcount, ancount, _, _ = _HEADER.unpack_from(msg, 0)
+    offset = _HEADER.size
+    for _ in range(qdcount):
+        _, offset = _read_name(msg, offset)
+        offset += 4
+    answers: list[dict[str, Any]] = []
+    for _ in range(ancount):
+        name, offset = _read_name(msg, offset)
+        if offset + _RR_FIXED.size > len(msg):
+            raise DnsWireError("truncated resource record")
+        rtype, _, ttl, rdlen = _RR_FIXED.unpack_from(msg, offset)
+        offset += _RR_FIXED.size
+        if offset + rdlen > len(msg):
+            raise DnsWireError("truncated rdata")
+        data = _rdata_text(msg, rtype, offset, rdlen)
+        offset += rdlen
+        if data is not None:
+            answers.append({"name": name, "type": rtype, "TTL": ttl, "data": data})
+    return flags & 0x000F, answers
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from typing import Any
+
+from ..models.common import IpGeo
+from .batch_geo import BatchGeoClient
+
+
+class Ip2LocationClient(BatchGeoClient):
+    """IP geolocation/ASN via the IP2Location.io bulk endpoint (requires IP2LOCATION_API_KEY).
+
+    Docs: https://www.ip2location.io/bulk-ip-geolocation-api
+    """
+
+    BASE = "https://bulk.ip2location.io/"
+    BATCH_SIZE = 1000
+
+    async def _fetch_batch(self, ips: list[str]) -> dict[str, IpGeo | None]:
+        data = await self.rm.post_json(
+            self.BASE, ips, params={"key": self.api_key, "format": "json"}
+        )
+        # Keyed by IP; accept a plain list of records as well
+        if isinstance(data, list):
+            data = {item.get("ip"): item for item in data if isinstance(item, dict)}
+        if not isinstance(data, dict):
+            return {}
+        return {ip: self._parse(ip, data.get(ip)) for ip in ips}
+
+    @staticmethod
+    def _parse(ip: str, item: Any) -> IpGeo | None:
+        if not isinstance(item, dict) or "error" in item:
+            return None
+
+        def text(key: str) -> str | None:
+            value = item.get(key)
+            return str(value) if value not in (None, "", "-") else None
+
+        def number(key: str) -> float | None:
+            value = item.get(key)
+            return float(value) if isinstance(value, int | float) else None
+
+        return IpGeo(
+            ip=ip,
+            asn=text("asn"),
+            org=text("as"),
+            isp=text("isp"),
+            country=text("country_name"),
+            region=text("region_name"),
+            city=text("city_name"),
+            lat=number("latitude"),
+            lon=number("longitude"),
+        )
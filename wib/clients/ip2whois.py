@@ -1,8 +1,6 @@
 from __future__ import annotations
 
 from datetime import datetime
-from http import HTTPStatus
-from typing import Any
 
 from ..http.request import RequestManager
 from ..models.common import DomainWhois
@@ -30,10 +28,9 @@ class Ip2WhoisClient:
             return None
 
     async def fetch(self, domain: str) -> DomainWhois | None:
-        resp = await self.rm.get(self.BASE, params={"key": self.api_key, "domain": domain})
-        if resp.status_code != HTTPStatus.OK:
+        data = await self.rm.get_json(self.BASE, params={"key": self.api_key, "domain": domain})
+        if not isinstance(data, dict):
             return None
-        data: dict[str, Any] = resp.json()
         # API reports errors in an "error" object
         if isinstance(data.get("error"), dict):
             return None
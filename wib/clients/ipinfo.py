@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from typing import Any
+
+from ..models.common import IpGeo
+from .batch_geo import BatchGeoClient
+
+
+class IpinfoClient(BatchGeoClient):
+    """IP geolocation/ASN via the ipinfo.io batch endpoint (requires IPINFO_API_KEY).
+
+    Docs: https://ipinfo.io/developers/batch
+    """
+
+    BASE = "https://ipinfo.io/batch"
+    BATCH_SIZE = 1000
+
+    async def _fetch_batch(self, ips: list[str]) -> dict[str, IpGeo | None]:
+        data = await self.rm.post_json(self.BASE, ips, params={"token": self.api_key})
+        if not isinstance(data, dict):
+            return {}
+        return {ip: self._parse(ip, data.get(ip)) for ip in ips}
+
+    @staticmethod
+    def _parse(ip: str, item: Any) -> IpGeo | None:
+        if not isinstance(item, dict) or item.get("bogon") or "error" in item:
+            return None
+        # "AS15169 Google LLC"
+        asn = None
+        org = item.get("org") or None
+        if isinstance(org, str) and org.startswith("AS"):
+            number, _, name = org.partition(" ")
+            asn, org = number[2:] or None, name or None
+        lat = lon = None
+        loc = item.get("loc")
+        if isinstance(loc, str) and "," in loc:
+            try:
+                lat, lon = (float(v) for v in loc.split(",", 1))
+            except ValueError:
+                lat = lon = None
+        return IpGeo(
+            ip=ip,
+            asn=asn,
+            org=org,
+            country=item.get("country") or None,
+            region=item.get("region") or None,
+            city=item.get("city") or None,
+            lat=lat,
+            lon=lon,
+        )
@@ -1,8 +1,5 @@
 from __future__ import annotations
 
-from http import HTTPStatus
-from typing import Any
-
 from ..http.request import RequestManager
 from ..models.common import IpGeo
 
@@ -19,10 +16,9 @@ class IpWhoisClient:
         self.rm = rm
 
     async def fetch(self, ip: str) -> IpGeo | None:
-        resp = await self.rm.get(f"{self.BASE}{ip}")
-        if resp.status_code != HTTPStatus.OK:
+        data = await self.rm.get_json(f"{self.BASE}{ip}")
+        if not isinstance(data, dict):
             return None
-        data: dict[str, Any] = resp.json()
         if not data.get("success", True):
             return None
         asn = None
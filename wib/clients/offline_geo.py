@@ -0,0 +1,424 @@
+"""Offline IP geolocation/ASN from a local, memory-mapped range table.
+
+`wib build-geo` converts an IP-range dataset (iptoasn TSV, IP2Location LITE CSV) into a
+compact binary file. Layout (little-endian), each section following the previous one:
+
+    header      MAGIC, version, IPv4 ranges, IPv6 ranges, records, string pool bytes
+    IPv4        range starts (u32, sorted), range ends (u32), record index (u32)
+    IPv6        starts and ends as high/low u64 halves (starts sorted), record index (u32)
+    records     asn, org, isp, country, region, city (u32 pool offsets), lat, lon (f64)
+    pool        u16 length-prefixed UTF-8 strings
+
+Ranges sharing the same attributes point at one record, so a full ASN dataset is a few
+MB. Lookups binary-search the starts array straight from the mmap: opening a table
+costs nothing and the OS shares its pages between wib processes.
+"""
+
+from __future__ import annotations
+
+import bisect
+import contextlib
+import csv
+import gzip
+import ipaddress
+import math
+import mmap
+import socket
+import struct
+import sys
+from array import array
+from collections.abc import Iterable, Iterator
+from enum import Enum
+from pathlib import Path
+from typing import Literal, TextIO
+
+from ..models.common import IpGeo
+from ..utils.paths import atomic_open, cache_dir
+
+MAGIC = b"WIBGEO\x00\x01"
+VERSION = 1
+_HEADER = struct.Struct("<8sIIIII")
+_RECORD = struct.Struct("<6I2d")
+_LEN = struct.Struct("<H")
+_U32 = 4
+_U64 = 8
+_V6_HALF = 64
+_LOW64 = (1 << 64) - 1
+_NONE = 0xFFFFFFFF
+_MAX_STR = 0xFFFF
+_DECODED_RECORDS = 65_536
+
+# asn, org, isp, country, region, city, lat, lon
+Record = tuple[
+    str | None,
+    str | None,
+    str | None,
+    str | None,
+    str | None,
+    str | None,
+    float | None,
+    float | None,
+]
+
+_IPTOASN_COLUMNS = 5
+_IP2LOCATION_MIN_COLUMNS = 4
+_IP2LOCATION_COLUMNS = 8
+_IP2LOCATION_ASN_COLUMNS = 5
+
+_MAPPED_V4 = ipaddress.IPv6Network("::ffff:0:0/96")
+_V4_MAX = 0xFFFFFFFF
+_IPV4 = 4
+_IPV6 = 6
+
+DEFAULT_FILENAME = "geo.wibgeo"
+
+
+class GeoTableError(Exception):
+    pass
+
+
+class SourceFormat(str, Enum):
+    iptoasn = "iptoasn"  # start, end, AS number, country code, AS description (TSV)
+    ip2location = "ip2location"  # ip_from, ip_to, cc, country, region, city, lat, lon, ...
+    ip2location_asn = "ip2location-asn"  # ip_from, ip_to, cidr, asn, as
+
+
+def default_path() -> Path:
+    return cache_dir() / DEFAULT_FILENAME
+
+
+# --- reading source datasets -------------------------------------------------------------
+
+
+def _to_int(value: str) -> tuple[int, int]:
+    """(version, integer) for "1.2.3.4", "2001:db8::" or a decimal IP2Location number."""
+    if value.isdigit():
+        n = int(value)
+        return (_IPV4 if n <= _V4_MAX else _IPV6), n
+    ip = ipaddress.ip_address(value)
+    return ip.version, int(ip)
+
+
+def _none(value: str) -> str | None:
+    value = value.strip()
+    return None if value in {"", "-", "None", "Not routed"} else value
+
+
+def _coord(value: str) -> float | None:
+    try:
+        f = float(value)
+    except ValueError:
+        return None
+    return None if math.isnan(f) else f
+
+
+def _rows_iptoasn(lines: Iterable[str]) -> Iterator[tuple[str, str, Record]]:
+    for line in lines:
+        parts = line.rstrip("\n").split("\t")
+        # AS 0 marks unrouted space
+        if len(parts) < _IPTOASN_COLUMNS or parts[2] == "0":
+            continue
+        record: Record = (parts[2], _none(parts[4]), None, _none(parts[3]), None, None, None, None)
+        yield parts[0], parts[1], record
+
+
+def _rows_ip2location(lines: Iterable[str]) -> Iterator[tuple[str, str, Record]]:
+    for row in csv.reader(lines):
+        if len(row) < _IP2LOCATION_MIN_COLUMNS or row[2] == "-":
+            continue
+        cells = [*row, *[""] * _IP2LOCATION_COLUMNS][:_IP2LOCATION_COLUMNS]
+        record: Record = (
+            None,
+            None,
+            None,
+            _none(cells[3]),
+            _none(cells[4]),
+            _none(cells[5]),
+            _coord(cells[6]),
+            _coord(cells[7]),
+        )
+        yield row[0], row[1], record
+
+
+def _rows_ip2location_asn(lines: Iterable[str]) -> Iterator[tuple[str, str, Record]]:
+    for row in csv.reader(lines):
+        if len(row) < _IP2LOCATION_ASN_COLUMNS or row[3] in {"", "-"}:
+            continue
+        yield row[0], row[1], (row[3], _none(row[4]), None, None, None, None, None, None)
+
+
+_READERS = {
+    SourceFormat.iptoasn: _rows_iptoasn,
+    SourceFormat.ip2location: _rows_ip2location,
+    SourceFormat.ip2location_asn: _rows_ip2location_asn,
+}
+
+
+def detect_format(first_line: str) -> SourceFormat:
+    if "\t" in first_line:
+        return SourceFormat.iptoasn
+    row = next(csv.reader([first_line]), [])
+    if len(row) == _IP2LOCATION_ASN_COLUMNS and "/" in row[2]:
+        return SourceFormat.ip2location_asn
+    return SourceFormat.ip2location
+
+
+def read_ranges(lines: Iterable[str], fmt: SourceFormat) -> Iterator[tuple[int, int, int, Record]]:
+    """(version, start, end, record) per dataset row; IPv4-mapped IPv6 rows become IPv4."""
+    mapped_lo = int(_MAPPED_V4.network_address)
+    mapped_hi = int(_MAPPED_V4.broadcast_address)
+    for start_s, end_s, record in _READERS[fmt](lines):
+        try:
+            v1, start = _to_int(start_s.strip())
+            v2, end = _to_int(end_s.strip())
+        except ValueError:
+            continue
+        v4 = v1 == v2 == _IPV4
+        if not v4 and mapped_lo <= start and end <= mapped_hi:
+            v4, start, end = True, start - mapped_lo, end - mapped_lo
+        if start <= end:
+            yield (_IPV4 if v4 else _IPV6), start, end, record
+
+
+# --- building ----------------------------------------------------------------------------
+
+
+class _Pool:
+    def __init__(self) -> None:
+        self.data = bytearray()
+        self.offsets: dict[str, int] = {}
+
+    def add(self, value: str | None) -> int:
+        if value is None:
+            return _NONE
+        offset = self.offsets.get(value)
+        if offset is None:
+            raw = value.encode("utf-8")[:_MAX_STR]
+            offset = self.offsets[value] = len(self.data)
+            self.data += _LEN.pack(len(raw)) + raw
+        return offset
+
+
+def _le(values: array[int]) -> bytes:
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def build_table(ranges: Iterable[tuple[int, int, int, Record]], dst: Path | str) -> tuple[int, int]:
+    """Write the binary table for ranges to dst (atomically); returns (IPv4, IPv6) counts."""
+    records: dict[Record, int] = {}
+    v4: list[tuple[int, int, int]] = []
+    v6: list[tuple[int, int, int]] = []
+    for version, start, end, record in ranges:
+        idx = records.setdefault(record, len(records))
+        (v4 if version == _IPV4 else v6).append((start, end, idx))
+    v4.sort()
+    v6.sort()
+
+    pool = _Pool()
+    packed = bytearray()
+    for asn, org, isp, country, region, city, lat, lon in records:
+        offsets = [pool.add(s) for s in (asn, org, isp, country, region, city)]
+        packed += _RECORD.pack(
+            *offsets, math.nan if lat is None else lat, math.nan if lon is None else lon
+        )
+
+    with atomic_open(Path(dst)) as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, len(v4), len(v6), len(records), len(pool.data)))
+        for column in range(3):
+            f.write(_le(array("I", (r[column] for r in v4))))
+        # Keep the u64 arrays 8-byte aligned
+        f.write(bytes(-f.tell() % _U64))
+        for column in range(2):
+            f.write(_le(array("Q", (r[column] >> _V6_HALF for r in v6))))
+            f.write(_le(array("Q", (r[column] & _LOW64 for r in v6))))
+        f.write(_le(array("I", (r[2] for r in v6))))
+        f.write(packed)
+        f.write(pool.data)
+    return len(v4), len(v6)
+
+
+# --- lookups -----------------------------------------------------------------------------
+
+
+def _ints(buf: memoryview, typecode: Literal["I", "Q"]) -> memoryview | array[int]:
+    if sys.byteorder == "little":
+        return buf.cast(typecode)
+    values = array(typecode, buf.tobytes())
+    values.byteswap()
+    return values
+
+
+_VIEWS = (
+    "_v4_start",
+    "_v4_end",
+    "_v4_rec",
+    "_v6_start_hi",
+    "_v6_start_lo",
+    "_v6_end_hi",
+    "_v6_end_lo",
+    "_v6_rec",
+    "_records",
+    "_pool",
+)
+
+
+class GeoTable:
+    """Read-only view of a table written by build_table."""
+
+    def __init__(self, path: Path | str) -> None:
+        self.path = Path(path)
+        try:
+            with open(self.path, "rb") as f:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as exc:
+            raise GeoTableError(f"cannot open geo table {self.path}: {exc}") from exc
+        buf = memoryview(self._mm)
+        try:
+            magic, version, n4, n6, nrec, npool = _HEADER.unpack_from(buf)
+        except struct.error:
+            magic, version = b"", 0
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise GeoTableError(f"{self.path} is not a wib geo table (rebuild it with build-geo)")
+        pos = _HEADER.size
+
+        def take(n: int) -> memoryview:
+            nonlocal pos
+            view = buf[pos : pos + n]
+            pos += n
+            return view
+
+        self._v4_start = _ints(take(_U32 * n4), "I")
+        self._v4_end = _ints(take(_U32 * n4), "I")
+        self._v4_rec = _ints(take(_U32 * n4), "I")
+        take(-pos % _U64)
+        self._v6_start_hi = _ints(take(_U64 * n6), "Q")
+        self._v6_start_lo = _ints(take(_U64 * n6), "Q")
+        self._v6_end_hi = _ints(take(_U64 * n6), "Q")
+        self._v6_end_lo = _ints(take(_U64 * n6), "Q")
+        self._v6_rec = _ints(take(_U32 * n6), "I")
+        self._records = take(_RECORD.size * nrec)
+        self._pool = take(npool)
+        self.counts = (n4, n6)
+        # Many ranges share a record (one per ASN/city), so decoded records are reused
+        self._decoded: dict[int, Record] = {}
+
+    def _string(self, offset: int) -> str | None:
+        if offset == _NONE:
+            return None
+        (n,) = _LEN.unpack_from(self._pool, offset)
+        start = offset + _LEN.size
+        return str(self._pool[start : start + n], "utf-8")
+
+    def _record(self, idx: int) -> Record:
+        record = self._decoded.get(idx)
+        if record is None:
+            if len(self._decoded) >= _DECODED_RECORDS:
+                self._decoded.clear()
+            record = self._decoded[idx] = self._decode(idx)
+        return record
+
+    def _decode(self, idx: int) -> Record:
+        *offsets, lat, lon = _RECORD.unpack_from(self._records, idx * _RECORD.size)
+        asn, org, isp, country, region, city = (self._string(o) for o in offsets)
+        return (
+            asn,
+            org,
+            isp,
+            country,
+            region,
+            city,
+            None if math.isnan(lat) else lat,
+            None if math.isnan(lon) else lon,
+        )
+
+    def _find_v4(self, n: int) -> int | None:
+        i = bisect.bisect_right(self._v4_start, n) - 1
+        if i >= 0 and n <= self._v4_end[i]:
+            return int(self._v4_rec[i])
+        return None
+
+    def _find_v6(self, key: bytes) -> int | None:
+        hi = int.from_bytes(key[:_U64], "big")
+        lo = int.from_bytes(key[_U64:], "big")
+        # Last range whose start <= (hi, lo): by high half, then by low half among ties
+        i = bisect.bisect_right(self._v6_start_hi, hi)
+        first = bisect.bisect_left(self._v6_start_hi, hi, 0, i)
+        if first < i:
+            i = bisect.bisect_right(self._v6_start_lo, lo, first, i)
+        i -= 1
+        if i >= 0 and (hi, lo) <= (self._v6_end_hi[i], self._v6_end_lo[i]):
+            return int(self._v6_rec[i])
+        return None
+
+    def lookup(self, ip: str) -> Record | None:
+        try:
+            packed = socket.inet_pton(socket.AF_INET, ip)
+        except OSError:
+            packed = b""
+        if packed:
+            idx = self._find_v4(int.from_bytes(packed, "big"))
+        else:
+            try:
+                key = socket.inet_pton(socket.AF_INET6, ip)
+            except OSError:
+                return None
+            if key[:12] == _MAPPED_V4.network_address.packed[:12]:
+                idx = self._find_v4(int.from_bytes(key[12:], "big"))
+            else:
+                idx = self._find_v6(key)
+        return None if idx is None else self._record(idx)
+
+    def close(self) -> None:
+        for name in _VIEWS:
+            view = self.__dict__.pop(name, None)
+            if isinstance(view, memoryview):
+                view.release()
+        # BufferError: a view is still alive somewhere; the mapping goes away with it.
+        with contextlib.suppress(BufferError):
+            self._mm.close()
+
+
+class OfflineGeoClient:
+    """IP geolocation/ASN from a local GeoTable; no network access."""
+
+    def __init__(self, table: GeoTable) -> None:
+        self.table = table
+
+    @classmethod
+    def open(cls, path: Path | str | None = None) -> OfflineGeoClient:
+        return cls(GeoTable(path if path is not None else default_path()))
+
+    def lookup(self, ip: str) -> IpGeo | None:
+        record = self.table.lookup(ip)
+        if record is None:
+            return None
+        asn, org, isp, country, region, city, lat, lon = record
+        return IpGeo.model_construct(
+            ip=ip,
+            asn=asn,
+            org=org,
+            isp=isp,
+            country=country,
+            region=region,
+            city=city,
+            lat=lat,
+            lon=lon,
+            domain=None,
+        )
+
+    async def fetch(self, ip: str) -> IpGeo | None:
+        return self.lookup(ip)
+
+    def close(self) -> None:
+        self.table.close()
+
+
+def open_source(path: str) -> TextIO:
+    """Open a dataset, transparently decompressing .gz files."""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    return open(path, encoding="utf-8", errors="replace")
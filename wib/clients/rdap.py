@@ -1,23 +1,37 @@
 from __future__ import annotations
 
 from datetime import datetime
-from http import HTTPStatus
 from typing import Any
 
+import httpx
+
 from ..http.request import RequestManager
 from ..models.common import DomainWhois
+from .rdap_bootstrap import RdapBootstrap
 
 
 class RdapClient:
-    """Free RDAP client via public rdap.org service.
+    """Free RDAP client querying the registry's own RDAP server.
 
-    Using https://rdap.org/domain/<domain>
+    The server is found through the IANA bootstrap registry (RdapBootstrap) and queried
+    as <base>domain/<domain>. TLDs missing from the registry go through the public
+    rdap.org redirector: https://rdap.org/domain/<domain>
     """
 
     BASE = "https://rdap.org/domain/"
 
-    def __init__(self, rm: RequestManager) -> None:
+    def __init__(self, rm: RequestManager, *, bootstrap: RdapBootstrap | None = None) -> None:
         self.rm = rm
+        self.bootstrap = bootstrap or RdapBootstrap.shared()
+
+    async def _url_for(self, domain: str) -> str:
+        base = await self.bootstrap.base_url(domain, self.rm)
+        return f"{base}domain/{domain}" if base else f"{self.BASE}{domain}"
+
+    async def available(self, domain: str) -> bool:
+        """False while the circuit for the domain's RDAP server is open."""
+        host = httpx.URL(await self._url_for(domain)).host
+        return not self.rm.breakers.is_open(host)
 
     @staticmethod
     def _parse_datetime(value: str | None) -> datetime | None:
@@ -75,10 +89,9 @@ class RdapClient:
         return None
 
     async def fetch(self, domain: str) -> DomainWhois | None:
-        resp = await self.rm.get(f"{self.BASE}{domain}")
-        if resp.status_code != HTTPStatus.OK:
+        data = await self.rm.get_json(await self._url_for(domain))
+        if not isinstance(data, dict):
             return None
-        data: dict[str, Any] = resp.json()
         created, updated, expires = self._parse_events(data)
         registrar = self._parse_registrar(data)
         nameservers = self._parse_nameservers(data)
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from pathlib import Path
+from typing import Any
+
+from ..http.request import RequestManager
+from ..utils.paths import atomic_write_text, cache_dir
+
+_SERVICE_LEN = 2  # [[labels...], [urls...]]
+
+
+class RdapBootstrap:
+    """IANA RDAP bootstrap registry for domains (RFC 9224), indexed by TLD.
+
+    The registry file is downloaded at most once per refresh_interval and kept under the
+    user cache dir; a stale copy is used when IANA cannot be reached. If no copy can be
+    loaded the index stays empty for the rest of the process and callers fall back to
+    the rdap.org redirector.
+    """
+
+    URL = "https://data.iana.org/rdap/dns.json"
+    FILENAME = "rdap_dns.json"
+
+    _shared: RdapBootstrap | None = None
+
+    def __init__(
+        self, path: Path | str | None = None, *, refresh_interval: float = 7 * 24 * 3600.0
+    ) -> None:
+        self.path = Path(path) if path is not None else cache_dir() / self.FILENAME
+        self.refresh_interval = refresh_interval
+        self._index: dict[str, str] | None = None
+        self._loading: asyncio.Future[dict[str, str]] | None = None
+
+    @classmethod
+    def shared(cls) -> RdapBootstrap:
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    @staticmethod
+    def build_index(data: dict[str, Any]) -> dict[str, str]:
+        index: dict[str, str] = {}
+        for service in data.get("services") or []:
+            if not isinstance(service, list) or len(service) != _SERVICE_LEN:
+                continue
+            labels, urls = service
+            https = [u for u in urls if isinstance(u, str) and u.startswith("https://")]
+            plain = [u for u in urls if isinstance(u, str)]
+            candidates = https or plain
+            if not candidates:
+                continue
+            base = candidates[0] if candidates[0].endswith("/") else candidates[0] + "/"
+            for label in labels:
+                if isinstance(label, str):
+                    index[label.lower().strip(".")] = base
+        return index
+
+    def _read_disk(self) -> tuple[dict[str, Any] | None, bool]:
+        """Return (registry, fresh) from the on-disk copy."""
+        try:
+            age = time.time() - self.path.stat().st_mtime
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None, False
+        if not isinstance(data, dict):
+            return None, False
+        return data, age < self.refresh_interval
+
+    def _write_disk(self, data: dict[str, Any]) -> None:
+        try:
+            atomic_write_text(self.path, json.dumps(data))
+        except OSError:
+            return
+
+    async def refresh(self, rm: RequestManager) -> bool:
+        """Download the registry now; True if a new copy was stored."""
+        try:
+            data = await rm.get_json(self.URL, cache=False)
+        except Exception:
+            # Network errors (and anything a test transport raises) mean "keep what we have"
+            return False
+        if not isinstance(data, dict) or not data.get("services"):
+            return False
+        self._write_disk(data)
+        self._index = self.build_index(data)
+        return True
+
+    async def _load(self, rm: RequestManager) -> dict[str, str]:
+        data, fresh = self._read_disk()
+        if fresh and data is not None:
+            return self.build_index(data)
+        if await self.refresh(rm) and self._index is not None:
+            return self._index
+        return self.build_index(data) if data is not None else {}
+
+    def _loaded(self, fut: asyncio.Future[dict[str, str]]) -> None:
+        # A load cancelled with its event loop must not poison later runs in this process.
+        if fut.cancelled():
+            self._loading = None
+
+    async def base_url(self, domain: str, rm: RequestManager) -> str | None:
+        """Authoritative RDAP base URL for domain (longest matching suffix), if known."""
+        if self._index is None:
+            if self._loading is None:
+                self._loading = asyncio.ensure_future(self._load(rm))
+                self._loading.add_done_callback(self._loaded)
+            self._index = await asyncio.shield(self._loading)
+        labels = domain.lower().strip(".").split(".")
+        for i in range(len(labels)):
+            base = self._index.get(".".join(labels[i:]))
+            if base is not None:
+                return base
+        return None
@@ -2,35 +2,77 @@ from __future__ import annotations
 
 import asyncio
 import contextlib
-import re
-from collections.abc import Iterable
-from datetime import datetime
+import time
 
+from ..http.breaker import CircuitBreakers
+from ..metrics import MetricsRegistry
 from ..models.common import DomainWhois
+from .whois_parser import parse_whois_text, template_for
+from .whois_servers import WhoisServerTable
 
 
 class Port43WhoisClient:
     """Minimal WHOIS client over port 43.
 
     Strategy:
-    - Resolve registry WHOIS server via whois.iana.org using the TLD.
+    - Resolve registry WHOIS server for the TLD from WhoisServerTable (bundled snapshot,
+      on-disk table, in-process memo), asking whois.iana.org only for unseen TLDs.
     - Query the resolved server with the full domain name.
-    - Parse a small set of common fields into DomainWhois.
+    - Parse a small set of common fields into DomainWhois in a single pass over the
+      response (see whois_parser), with per-registry templates for unusual layouts.
 
     Notes:
     - This is best-effort; formats vary widely across registries.
     - Timeouts are enforced per socket operation via asyncio.wait_for.
+    - With breakers, a registry server that keeps failing is skipped until it recovers.
     """
 
-    def __init__(self, *, timeout: float = 10.0) -> None:
+    IANA_SERVER = "whois.iana.org"
+    PORT = 43
+
+    def __init__(
+        self,
+        *,
+        timeout: float = 10.0,
+        servers: WhoisServerTable | None = None,
+        breakers: CircuitBreakers | None = None,
+        metrics: MetricsRegistry | None = None,
+    ) -> None:
         self.timeout = timeout
+        self.metrics = metrics or MetricsRegistry.shared()
+        self.servers = servers or WhoisServerTable.shared()
+        self.breakers = breakers
+
+    @staticmethod
+    def _breaker_key(server: str) -> str:
+        return f"{server}:43"
+
+    async def _query_guarded(self, server: str, query: str) -> str | None:
+        """_query through the server's circuit breaker; None if the circuit is open."""
+        if self.breakers is None:
+            return await self._query(server, query)
+        key = self._breaker_key(server)
+        if not self.breakers.allow(key):
+            return None
+        try:
+            text = await self._query(server, query)
+        except (OSError, asyncio.TimeoutError):
+            self.breakers.failure(key)
+            raise
+        except BaseException:
+            self.breakers.release(key)
+            raise
+        self.breakers.success(key)
+        return text
 
     async def _query(self, server: str, query: str) -> str:
         reader: asyncio.StreamReader
         writer: asyncio.StreamWriter
-        reader, writer = await asyncio.wait_for(
-            asyncio.open_connection(server, 43), timeout=self.timeout
-        )
+        with self.metrics.timer("wib_port43_connect_seconds", server=server):
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(server, self.PORT), timeout=self.timeout
+            )
+        started = time.perf_counter()
         try:
             # WHOIS protocol expects CRLF and ASCII; many servers tolerate LF. Use CRLF and latin-1.
             writer.write((query + "\r\n").encode("latin-1", errors="ignore"))
@@ -49,6 +91,9 @@ class Port43WhoisClient:
                     break
             return b"".join(chunks).decode("latin-1", errors="replace")
         finally:
+            self.metrics.observe(
+                "wib_port43_read_seconds", time.perf_counter() - started, server=server
+            )
             writer.close()
             with contextlib.suppress(Exception):
                 await writer.wait_closed()
@@ -59,10 +104,12 @@ class Port43WhoisClient:
         return parts[-1] if parts else domain
 
     async def _resolve_server_for_domain(self, domain: str) -> str | None:
-        # First ask IANA for TLD -> whois server mapping
-        tld = self._tld(domain)
+        return await self.servers.lookup(self._tld(domain), self.query_iana)
+
+    async def query_iana(self, tld: str) -> str | None:
+        """Ask IANA for the TLD's WHOIS server; "" if it has none, None if IANA failed."""
         try:
-            resp = await self._query("whois.iana.org", tld)
+            resp = await self._query(self.IANA_SERVER, tld)
         except Exception:
             return None
         # Look for a line like: "whois:        whois.verisign-grs.com"
@@ -77,131 +124,19 @@ class Port43WhoisClient:
                 server = line.split(":", 1)[1].strip()
                 if server:
                     return server
-        return None
-
-    @staticmethod
-    def _parse_dt(value: str | None) -> datetime | None:
-        if not value:
-            return None
-        # Try a few common formats
-        formats: Iterable[str] = (
-            "%Y-%m-%dT%H:%M:%SZ",
-            "%Y-%m-%d %H:%M:%S%z",
-            "%Y-%m-%d %H:%M:%S",
-            "%d-%b-%Y",
-            "%Y-%m-%d",
-        )
-        for fmt in formats:
-            try:
-                return datetime.strptime(value, fmt)
-            except ValueError:
-                continue
-        # Fallback: try to parse ISO-ish by replacing Z
-        try:
-            return datetime.fromisoformat(value.replace("Z", "+00:00"))
-        except Exception:
-            return None
-
-    @staticmethod
-    def _find_first(patterns: list[re.Pattern[str]], text: str) -> str | None:
-        for pat in patterns:
-            m = pat.search(text)
-            if m:
-                return m.group(1).strip()
-        return None
-
-    @staticmethod
-    def _find_all(patterns: list[re.Pattern[str]], text: str) -> list[str]:
-        values: list[str] = []
-        for pat in patterns:
-            for m in pat.finditer(text):
-                v = m.group(1).strip().lower()
-                if v:
-                    values.append(v)
-        # De-dup while preserving order
-        seen: set[str] = set()
-        out: list[str] = []
-        for v in values:
-            if v not in seen:
-                seen.add(v)
-                out.append(v)
-        return out
+        return ""
 
     def _parse_whois_text(self, domain: str, text: str) -> DomainWhois:
-        # Common fields across registries
-        registrar = self._find_first(
-            [
-                re.compile(r"^Registrar:\s*(.+)$", re.IGNORECASE | re.MULTILINE),
-                re.compile(r"^Sponsoring Registrar:\s*(.+)$", re.IGNORECASE | re.MULTILINE),
-                re.compile(r"^Registrar Name:\s*(.+)$", re.IGNORECASE | re.MULTILINE),
-            ],
-            text,
-        )
-
-        nameservers = self._find_all(
-            [
-                re.compile(r"^Name Server:\s*([^\s#;]+)", re.IGNORECASE | re.MULTILINE),
-                re.compile(r"^nserver:\s*([^\s#;]+)", re.IGNORECASE | re.MULTILINE),
-            ],
-            text,
-        )
-
-        created_raw = self._find_first(
-            [
-                re.compile(r"^Creation Date:\s*(.+)$", re.IGNORECASE | re.MULTILINE),
-                re.compile(r"^Registered on:\s*(.+)$", re.IGNORECASE | re.MULTILINE),
-                re.compile(r"^Created:\s*(.+)$", re.IGNORECASE | re.MULTILINE),
-            ],
-            text,
-        )
-        updated_raw = self._find_first(
-            [
-                re.compile(r"^Updated Date:\s*(.+)$", re.IGNORECASE | re.MULTILINE),
-                re.compile(r"^Last Updated on:\s*(.+)$", re.IGNORECASE | re.MULTILINE),
-                re.compile(r"^Last Modified:\s*(.+)$", re.IGNORECASE | re.MULTILINE),
-            ],
-            text,
-        )
-        expires_raw = self._find_first(
-            [
-                re.compile(r"^Registry Expiry Date:\s*(.+)$", re.IGNORECASE | re.MULTILINE),
-                re.compile(r"^Expiry Date:\s*(.+)$", re.IGNORECASE | re.MULTILINE),
-                re.compile(r"^Expires:\s*(.+)$", re.IGNORECASE | re.MULTILINE),
-                re.compile(r"^paid-till:\s*(.+)$", re.IGNORECASE | re.MULTILINE),
-            ],
-            text,
-        )
-
-        dnssec_raw = self._find_first(
-            [
-                re.compile(r"^DNSSEC:\s*(.+)$", re.IGNORECASE | re.MULTILINE),
-            ],
-            text,
-        )
-        dnssec: bool | None
-        if dnssec_raw is None:
-            dnssec = None
-        else:
-            v = dnssec_raw.strip().lower()
-            dnssec = v.startswith("signed") or v in {"yes", "true", "ds present"}
-
-        return DomainWhois(
-            domain=domain,
-            registrar=registrar or None,
-            nameservers=nameservers or None,
-            dnssec=dnssec,
-            created=self._parse_dt(created_raw),
-            updated=self._parse_dt(updated_raw),
-            expires=self._parse_dt(expires_raw),
-        )
+        return parse_whois_text(domain, text, template_for(self._tld(domain)))
 
     async def fetch(self, domain: str) -> DomainWhois | None:
         try:
             server = await self._resolve_server_for_domain(domain)
             if not server:
                 return None
-            text = await self._query(server, domain)
-            if not text.strip():
+            query = template_for(self._tld(domain)).query.format(domain=domain)
+            text = await self._query_guarded(server, query)
+            if text is None or not text.strip():
                 return None
             return self._parse_whois_text(domain, text)
         except Exception:
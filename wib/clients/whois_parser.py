@@ -0,0 +1,220 @@
+"""Single-pass parser for port 43 WHOIS responses.
+
+The response is scanned once, line by line. Each "key: value" line (indentation is
+ignored) is dispatched through a dict built at import time that maps normalized keys to
+(field, rank). A lower rank wins when a response carries several spellings of the same
+field, and ties keep the first occurrence. A key with an empty value takes its value(s)
+from the following lines, which covers block layouts such as Nominet's. Registries with
+bracketed keys, unusual key names or a special query syntax get a WhoisTemplate keyed by
+TLD; everything else uses the generic one.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime
+
+from ..models.common import DomainWhois
+
+REGISTRAR = "registrar"
+NAMESERVERS = "nameservers"
+CREATED = "created"
+UPDATED = "updated"
+EXPIRES = "expires"
+DNSSEC = "dnssec"
+
+# Generic keys in priority order, matching the common gTLD/ccTLD spellings
+_GENERIC_KEYS: dict[str, tuple[str, ...]] = {
+    REGISTRAR: ("Registrar", "Sponsoring Registrar", "Registrar Name"),
+    NAMESERVERS: ("Name Server", "nserver"),
+    CREATED: ("Creation Date", "Registered on", "Created"),
+    UPDATED: ("Updated Date", "Last Updated on", "Last Modified"),
+    EXPIRES: ("Registry Expiry Date", "Expiry Date", "Expires", "paid-till"),
+    DNSSEC: ("DNSSEC",),
+}
+
+_MAX_MARKER_LEN = 3  # "p. "
+
+_DATE_FORMATS: tuple[str, ...] = (
+    "%Y-%m-%dT%H:%M:%SZ",
+    "%Y-%m-%d %H:%M:%S%z",
+    "%Y-%m-%d %H:%M:%S",
+    "%d-%b-%Y",
+    "%Y-%m-%d",
+    "%Y/%m/%d",
+    "%Y/%m/%d %H:%M:%S",
+    "%d.%m.%Y",
+)
+
+
+@dataclass(frozen=True)
+class WhoisTemplate:
+    # normalized key (lowercase, stripped) -> (field, rank)
+    keys: dict[str, tuple[str, int]]
+    # "[Key] value" lines (JPRS .jp output) instead of "Key: value"
+    bracketed: bool = False
+    # What to send to the registry's server
+    query: str = "{domain}"
+
+
+def _template(
+    extra: dict[str, Iterable[str]] | None = None,
+    *,
+    bracketed: bool = False,
+    query: str = "{domain}",
+) -> WhoisTemplate:
+    """Registry keys (highest priority) followed by the generic keys."""
+    keys: dict[str, tuple[str, int]] = {}
+    for source in (extra or {}, _GENERIC_KEYS):
+        for field, names in source.items():
+            for name in names:
+                rank = sum(1 for f, _ in keys.values() if f == field)
+                keys.setdefault(name.lower(), (field, rank))
+    return WhoisTemplate(keys=keys, bracketed=bracketed, query=query)
+
+
+GENERIC = _template()
+
+TEMPLATES: dict[str, WhoisTemplate] = {
+    # Nominet: "Key:" headers with the value(s) on the following indented lines
+    "uk": _template(
+        {
+            REGISTRAR: ("Registrar",),
+            CREATED: ("Registered on",),
+            UPDATED: ("Last updated",),
+            EXPIRES: ("Expiry date",),
+            NAMESERVERS: ("Name servers",),
+            DNSSEC: ("DNSSEC",),
+        },
+    ),
+    # TCI (.ru/.su/.рф): lowercase keys, "paid-till" for expiry
+    "ru": _template({EXPIRES: ("paid-till",), CREATED: ("created",)}),
+    "su": _template({EXPIRES: ("paid-till",), CREATED: ("created",)}),
+    "xn--p1ai": _template({EXPIRES: ("paid-till",), CREATED: ("created",)}),
+    # DENIC: no dates except "Changed"; nameservers are only returned with -T dn
+    "de": _template({UPDATED: ("Changed",), NAMESERVERS: ("Nserver",)}, query="-T dn,ace {domain}"),
+    # AFNIC
+    "fr": _template({UPDATED: ("last-update",), EXPIRES: ("Expiry Date",)}),
+    # JPRS: "[Created on]   2001/01/01"; "/e" asks for the English (ASCII) output
+    "jp": _template(
+        {
+            CREATED: ("Created on", "Registered Date"),
+            UPDATED: ("Last Updated", "Last Update"),
+            EXPIRES: ("Expires on",),
+            NAMESERVERS: ("Name Server",),
+        },
+        bracketed=True,
+        query="{domain}/e",
+    ),
+}
+
+
+def template_for(tld: str) -> WhoisTemplate:
+    return TEMPLATES.get(tld.lower(), GENERIC)
+
+
+def parse_date(value: str | None) -> datetime | None:
+    if not value:
+        return None
+    # Drop trailing annotations such as "(JST)"
+    value = value.split(" (", 1)[0].strip()
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    # Fallback: try to parse ISO-ish by replacing Z
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+def _nameserver(value: str) -> str:
+    # First token only: "ns1.example.com 192.0.2.1" / "ns1.example.com. # comment"
+    for sep in ("#", ";"):
+        value = value.split(sep, 1)[0]
+    parts = value.split()
+    return parts[0].lower().rstrip(".") if parts else ""
+
+
+def _split(line: str, template: WhoisTemplate) -> tuple[str, str] | None:
+    if template.bracketed:
+        # "p. [Name Server]   ns1.example.jp": optional list marker before the key
+        start = line.find("[")
+        end = line.find("]", start + 1)
+        if start < 0 or start > _MAX_MARKER_LEN or end < 0:
+            return None
+        return line[start + 1 : end].strip().lower(), line[end + 1 :].strip()
+    idx = line.find(":")
+    if idx <= 0:
+        return None
+    return line[:idx].strip().lower(), line[idx + 1 :].strip()
+
+
+def _scan(text: str, template: WhoisTemplate) -> tuple[dict[str, str], list[str]]:
+    """One pass over the response: best-ranked scalar per field, nameservers by rank."""
+    keys = template.keys
+    scalars: dict[str, tuple[int, str]] = {}
+    servers: dict[int, list[str]] = {}
+    # Key seen with an empty value: its value(s) follow on the next lines
+    pending: tuple[str, int] | None = None
+
+    for raw in text.splitlines():
+        line = raw.rstrip()
+        if not line:
+            # A blank line ends any value block
+            pending = None
+            continue
+        kv = _split(line, template)
+        if kv is not None and (hit := keys.get(kv[0])) is not None:
+            field, rank = hit
+            value = kv[1]
+            if not value:
+                pending = hit
+                continue
+            pending = None
+        elif pending is not None:
+            field, rank = pending
+            value = line.strip()
+        else:
+            continue
+        if field == NAMESERVERS:
+            ns = _nameserver(value)
+            if ns:
+                servers.setdefault(rank, []).append(ns)
+            continue
+        # Scalars take a single continuation line
+        pending = None
+        best = scalars.get(field)
+        if best is None or rank < best[0]:
+            scalars[field] = (rank, value)
+
+    nameservers = list(dict.fromkeys(ns for r in sorted(servers) for ns in servers[r]))
+    return {field: value for field, (_, value) in scalars.items()}, nameservers
+
+
+def parse_whois_text(domain: str, text: str, template: WhoisTemplate = GENERIC) -> DomainWhois:
+    values, nameservers = _scan(text, template)
+    registrar = values.get(REGISTRAR)
+    if registrar:
+        # Nominet appends " [Tag = XYZ]"
+        registrar = registrar.split(" [Tag =", 1)[0].strip()
+    dnssec_raw = values.get(DNSSEC)
+    dnssec: bool | None
+    if dnssec_raw is None:
+        dnssec = None
+    else:
+        v = dnssec_raw.strip().lower()
+        dnssec = v.startswith("signed") or v in {"yes", "true", "ds present"}
+
+    return DomainWhois(
+        domain=domain,
+        registrar=registrar or None,
+        nameservers=nameservers or None,
+        dnssec=dnssec,
+        created=parse_date(values.get(CREATED)),
+        updated=parse_date(values.get(UPDATED)),
+        expires=parse_date(values.get(EXPIRES)),
+    )
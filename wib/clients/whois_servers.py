@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timezone
+from importlib import resources
+from pathlib import Path
+from typing import Any
+
+from ..utils.paths import atomic_write_text, cache_dir
+
+# Resolver used on a miss: TLD -> server ("" when the TLD has no WHOIS service), None on error
+Resolver = Callable[[str], Awaitable[str | None]]
+
+_DISK_ENTRY_LEN = 2  # [server, resolved_at]
+
+
+def _load_bundled() -> tuple[dict[str, str], float]:
+    try:
+        raw = resources.files("wib").joinpath("data/whois_servers.json").read_text("utf-8")
+        data: dict[str, Any] = json.loads(raw)
+        generated = datetime.strptime(str(data.get("generated")), "%Y-%m-%d")
+        servers = data.get("servers") or {}
+    except (OSError, ValueError):
+        return {}, 0.0
+    stamp = generated.replace(tzinfo=timezone.utc).timestamp()
+    return {str(k): str(v) for k, v in servers.items()}, stamp
+
+
+class WhoisServerTable:
+    """TLD -> port 43 WHOIS server mapping, memoized in-process and persisted to disk.
+
+    Entries come from (later wins) the bundled snapshot in wib/data, the on-disk table
+    under the user cache dir, and live IANA lookups made through the resolver passed to
+    lookup(). Entries older than refresh_interval are re-resolved on next use but are
+    still served if IANA cannot be reached. Concurrent misses for the same TLD share a
+    single IANA query.
+    """
+
+    FILENAME = "whois_servers.json"
+
+    _shared: WhoisServerTable | None = None
+
+    def __init__(
+        self,
+        path: Path | str | None = None,
+        *,
+        refresh_interval: float = 90 * 24 * 3600.0,
+        seed: bool = True,
+    ) -> None:
+        self.path = Path(path) if path is not None else cache_dir() / self.FILENAME
+        self.refresh_interval = refresh_interval
+        # tld -> (server, resolved_at)
+        self._entries: dict[str, tuple[str, float]] = {}
+        if seed:
+            servers, stamp = _load_bundled()
+            self._entries.update({tld: (srv, stamp) for tld, srv in servers.items()})
+        self._entries.update(self._load_disk())
+        self._inflight: dict[str, asyncio.Future[str | None]] = {}
+
+    @classmethod
+    def shared(cls) -> WhoisServerTable:
+        """Process-wide table so every client in a run shares the memoized entries."""
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    def _load_disk(self) -> dict[str, tuple[str, float]]:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        out: dict[str, tuple[str, float]] = {}
+        for tld, entry in (data.get("servers") or {}).items():
+            if isinstance(entry, list) and len(entry) == _DISK_ENTRY_LEN:
+                out[str(tld)] = (str(entry[0]), float(entry[1]))
+        return out
+
+    def save(self) -> None:
+        payload = {"servers": {tld: [srv, ts] for tld, (srv, ts) in sorted(self._entries.items())}}
+        try:
+            atomic_write_text(self.path, json.dumps(payload))
+        except OSError:
+            return
+
+    def set(self, tld: str, server: str, *, save: bool = True) -> None:
+        self._entries[tld] = (server, time.time())
+        if save:
+            self.save()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def lookup(self, tld: str, resolver: Resolver) -> str | None:
+        """Return the WHOIS server for tld, asking resolver only for unknown or stale TLDs."""
+        tld = tld.lower().strip(".")
+        entry = self._entries.get(tld)
+        if entry is not None and time.time() - entry[1] < self.refresh_interval:
+            return entry[0] or None
+        pending = self._inflight.get(tld)
+        if pending is None:
+            pending = asyncio.ensure_future(self._resolve(tld, resolver))
+            self._inflight[tld] = pending
+            pending.add_done_callback(lambda _: self._inflight.pop(tld, None))
+        return await asyncio.shield(pending)
+
+    async def _resolve(self, tld: str, resolver: Resolver) -> str | None:
+        server = await resolver(tld)
+        if server is None:
+            # IANA unreachable: fall back to a stale entry if we have one
+            stale = self._entries.get(tld)
+            return (stale[0] or None) if stale else None
+        self.set(tld, server)
+        return server or None
@@ -0,0 +1,299 @@
+"""Column-wise accumulation of lookup results for csv and parquet output.
+
+A pydantic IpData/DomainData keeps every registrar, nameserver, country and ASN as its
+own str object; at millions of results those dominate RSS. ResultColumns flattens each
+result into one row of fixed columns as it arrives and drops the model:
+
+- strings and string lists are dictionary-encoded: one array('I') of codes per column
+  plus a table of distinct values, so repeated values are stored once (the entity
+  itself, unique per row, is a plain list);
+- numbers, booleans and timestamps live in typed arrays, with NaN / -1 / INT64_MIN for
+  missing values.
+
+The provider blobs (vt, shodan, ...) are not part of the flat schema.
+"""
+
+from __future__ import annotations
+
+import csv
+import importlib
+import json
+import math
+from array import array
+from collections.abc import Hashable, Iterator
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import IO, Any, Generic, TypeVar
+
+from .models.common import DomainData, IpData
+from .utils import UserVisibleError
+
+V = TypeVar("V", bound=Hashable)
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_NO_TIME = -(2**63)
+_NO_BOOL = -1
+
+
+class _DictColumn(Generic[V]):
+    """Dictionary-encoded column; code 0 is None."""
+
+    __slots__ = ("codes", "_index", "values")
+
+    def __init__(self) -> None:
+        self.codes = array("I")
+        self._index: dict[V, int] = {}
+        self.values: list[V | None] = [None]
+
+    def append(self, value: V | None) -> None:
+        if value is None:
+            self.codes.append(0)
+            return
+        code = self._index.get(value)
+        if code is None:
+            code = self._index[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+
+    def __getitem__(self, i: int) -> V | None:
+        return self.values[self.codes[i]]
+
+
+class _TextColumn:
+    """Plain column for values that are unique per row, where a dictionary only costs."""
+
+    __slots__ = ("values",)
+
+    def __init__(self) -> None:
+        self.values: list[str | None] = []
+
+    def append(self, value: str | None) -> None:
+        self.values.append(value)
+
+    def __getitem__(self, i: int) -> str | None:
+        return self.values[i]
+
+
+class _FloatColumn:
+    __slots__ = ("data",)
+
+    def __init__(self) -> None:
+        self.data = array("d")
+
+    def append(self, value: float | None) -> None:
+        self.data.append(math.nan if value is None else value)
+
+    def __getitem__(self, i: int) -> float | None:
+        value = self.data[i]
+        return None if math.isnan(value) else value
+
+
+class _BoolColumn:
+    __slots__ = ("data",)
+
+    def __init__(self) -> None:
+        self.data = array("b")
+
+    def append(self, value: bool | None) -> None:
+        self.data.append(_NO_BOOL if value is None else int(value))
+
+    def __getitem__(self, i: int) -> bool | None:
+        value = self.data[i]
+        return None if value == _NO_BOOL else bool(value)
+
+
+class _TimeColumn:
+    """Microseconds since the epoch, UTC (naive datetimes are taken as UTC)."""
+
+    __slots__ = ("data",)
+
+    def __init__(self) -> None:
+        self.data = array("q")
+
+    def append(self, value: datetime | None) -> None:
+        if value is None:
+            self.data.append(_NO_TIME)
+            return
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        self.data.append((value - _EPOCH) // timedelta(microseconds=1))
+
+    def __getitem__(self, i: int) -> datetime | None:
+        value = self.data[i]
+        return None if value == _NO_TIME else _EPOCH + timedelta(microseconds=value)
+
+
+_Column = (
+    _DictColumn[str]
+    | _DictColumn[tuple[str, ...]]
+    | _TextColumn
+    | _FloatColumn
+    | _BoolColumn
+    | _TimeColumn
+)
+
+# name -> column type: text (unique str), str, list (of str), float, bool, time
+SCHEMA: dict[str, str] = {
+    "kind": "str",
+    "entity": "text",
+    "asn": "str",
+    "org": "str",
+    "isp": "str",
+    "country": "str",
+    "region": "str",
+    "city": "str",
+    "lat": "float",
+    "lon": "float",
+    "geo_domain": "str",
+    "registered_domain": "str",
+    "registrar": "str",
+    "nameservers": "list",
+    "dnssec": "bool",
+    "created": "time",
+    "updated": "time",
+    "expires": "time",
+    "a": "list",
+    "aaaa": "list",
+    "cname": "list",
+    "ns": "list",
+    "mx": "list",
+    "txt": "list",
+}
+
+_COLUMN_TYPES: dict[str, type[Any]] = {
+    "text": _TextColumn,
+    "str": _DictColumn,
+    "list": _DictColumn,
+    "float": _FloatColumn,
+    "bool": _BoolColumn,
+    "time": _TimeColumn,
+}
+
+
+def _strings(values: list[str] | None) -> tuple[str, ...] | None:
+    return tuple(values) if values else None
+
+
+class ResultColumns:
+    """Lookup results stored column-wise; append() rows, then export with to_csv/to_parquet."""
+
+    def __init__(self) -> None:
+        self.columns: dict[str, _Column] = {
+            name: _COLUMN_TYPES[kind]() for name, kind in SCHEMA.items()
+        }
+        self._rows = 0
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def append(self, kind: str, data: IpData | DomainData) -> None:
+        row: dict[str, Any] = dict.fromkeys(SCHEMA)
+        row["kind"] = kind
+        if isinstance(data, IpData):
+            row["entity"] = data.ip
+            if data.geo is not None:
+                g = data.geo
+                row.update(asn=g.asn, org=g.org, isp=g.isp, country=g.country)
+                row.update(region=g.region, city=g.city, lat=g.lat, lon=g.lon)
+                row["geo_domain"] = g.domain
+        else:
+            row["entity"] = data.domain
+            if data.whois is not None:
+                w = data.whois
+                row.update(registered_domain=w.domain, registrar=w.registrar, dnssec=w.dnssec)
+                row.update(created=w.created, updated=w.updated, expires=w.expires)
+                row["nameservers"] = _strings(w.nameservers)
+            if data.dns is not None:
+                d = data.dns
+                row.update(a=_strings(d.a), aaaa=_strings(d.aaaa), cname=_strings(d.cname))
+                row.update(ns=_strings(d.ns), txt=_strings(d.txt))
+                if d.mx:
+                    row["mx"] = tuple(f"{m.preference} {m.exchange}" for m in d.mx)
+        for name, column in self.columns.items():
+            column.append(row[name])
+        self._rows += 1
+
+    def rows(self) -> Iterator[tuple[Any, ...]]:
+        columns = list(self.columns.values())
+        for i in range(self._rows):
+            yield tuple(column[i] for column in columns)
+
+    # --- export ------------------------------------------------------------------------
+
+    def to_csv(self, out: IO[str]) -> None:
+        """One header line, then a row per result; lists are JSON arrays, times ISO 8601."""
+        writer = csv.writer(out, lineterminator="\n")
+        writer.writerow(SCHEMA)
+        cells = [_csv_cells(SCHEMA[name], column) for name, column in self.columns.items()]
+        writer.writerows(zip(*cells, strict=True))
+
+    def to_parquet(self, path: str | Path) -> None:
+        """Write a Parquet file with dictionary-encoded string columns (needs pyarrow)."""
+        pa, pq = _pyarrow()
+        arrays = [_arrow_array(pa, SCHEMA[name], col) for name, col in self.columns.items()]
+        table = pa.Table.from_arrays(arrays, names=list(SCHEMA))
+        pq.write_table(table, str(path), compression="zstd")
+
+
+def _csv_cell(kind: str, value: Any) -> Any:
+    if value is None:
+        return ""
+    if kind == "list":
+        return json.dumps(list(value))
+    if kind == "time":
+        return value.isoformat().replace("+00:00", "Z")
+    return value
+
+
+def _csv_cells(kind: str, column: _Column) -> Iterator[Any]:
+    if isinstance(column, _DictColumn):
+        # Each distinct value is rendered once
+        rendered = [_csv_cell(kind, value) for value in column.values]
+        return map(rendered.__getitem__, column.codes)
+    if isinstance(column, _TextColumn):
+        return ("" if value is None else value for value in column.values)
+    return (_csv_cell(kind, column[i]) for i in range(len(column.data)))
+
+
+def _pyarrow() -> tuple[Any, Any]:
+    try:
+        pa = importlib.import_module("pyarrow")
+        importlib.import_module("pyarrow.compute")
+        return pa, importlib.import_module("pyarrow.parquet")
+    except ImportError:
+        raise UserVisibleError("Parquet output needs pyarrow (pip install pyarrow)") from None
+
+
+def require_pyarrow() -> None:
+    """Raise UserVisibleError now, before any lookups, if Parquet output cannot be written."""
+    _pyarrow()
+
+
+def _arrow_array(pa: Any, kind: str, column: _Column) -> Any:
+    pc = pa.compute
+    if isinstance(column, _DictColumn):
+        codes = _from_array(pa, pa.uint32(), column.codes)
+        indices = _null_where(pa, pc.equal(codes, 0), codes)
+        if kind == "list":
+            # Arrow has no dictionary-encoded lists: expand through the distinct values
+            return pa.array(column.values, type=pa.list_(pa.string())).take(indices)
+        return pa.DictionaryArray.from_arrays(indices, pa.array(column.values, pa.string()))
+    if isinstance(column, _TextColumn):
+        return pa.array(column.values, type=pa.string())
+    if isinstance(column, _FloatColumn):
+        values = _from_array(pa, pa.float64(), column.data)
+        return _null_where(pa, pc.is_nan(values), values)
+    if isinstance(column, _BoolColumn):
+        values = _from_array(pa, pa.int8(), column.data)
+        return _null_where(pa, pc.equal(values, _NO_BOOL), values).cast(pa.bool_())
+    values = _from_array(pa, pa.int64(), column.data)
+    return _null_where(pa, pc.equal(values, _NO_TIME), values).cast(pa.timestamp("us", "UTC"))
+
+
+def _null_where(pa: Any, mask: Any, values: Any) -> Any:
+    return pa.compute.if_else(mask, pa.scalar(None, type=values.type), values)
+
+
+def _from_array(pa: Any, arrow_type: Any, data: array[Any]) -> Any:
+    # Zero-copy view of the array's buffer (native byte order, as Arrow expects)
+    return pa.Array.from_buffers(arrow_type, len(data), [None, pa.py_buffer(data)])
@@ -3,12 +3,14 @@ from __future__ import annotations
 import argparse
 import os
 import shlex
+import sys
 from collections.abc import Iterable
 from dataclasses import dataclass, field
 from enum import Enum
 from pathlib import Path
+from typing import Any
 
-from .. import __version__
+STATS_FORMATS = ("text", "prometheus", "json")
 
 
 class OutputFormat(str, Enum):
@@ -16,12 +18,16 @@ class OutputFormat(str, Enum):
     json = "json"
     yaml = "yaml"
     md = "md"
+    ndjson = "ndjson"
+    csv = "csv"
+    parquet = "parquet"
 
 
 class GeoService(str, Enum):
     ipwhois = "ipwhois"
     ip2location = "ip2location"
     ipinfo = "ipinfo"
+    offline = "offline"
 
 
 @dataclass
@@ -40,17 +46,36 @@ class Keys:
 class AppConfig:
     output: OutputFormat = OutputFormat.rich
     out_file: str | None = None
+    gzip: bool = False
+    compact: bool = False  # single-line json output
+    unordered: bool = False
     entities: list[str] | None = None
+    input_path: str | None = None  # file with one entity per line, "-" for stdin
     all_optional: bool = False
     one_column: bool = False
+    table: bool = False  # rich output: one table row per entity instead of panels
     no_color: bool = False
     timeout: float = 10.0
     no_virustotal: bool = False
     max_resolutions: int = 10
     geo_service: GeoService = GeoService.ipwhois
+    geo_db: str | None = None  # table built by `wib build-geo` for GeoService.offline
     verbosity: int = 0  # -v/-q counts
+    stats: str | None = None  # print metrics to stderr after the run: text/prometheus/json
     keys: Keys = field(default_factory=Keys)
     show_dns: bool = False
+    doh_url: str | None = None
+    doh_wire: bool = False
+    concurrency: int = 10
+    workers: int = 1  # processes the input is sharded across, each with `concurrency` lookups
+    hedge_delay: float | None = None
+    no_cache: bool = False
+    refresh: bool = False
+    cache_max_entries: int = 100_000
+    # host -> (requests per second, burst), overriding the built-in per-provider limits
+    rate_limits: dict[str, tuple[float, int]] = field(default_factory=dict)
+    # host -> (requests, "day" | "month") for metered APIs
+    quotas: dict[str, tuple[int, str]] = field(default_factory=dict)
 
 
 def _load_envfile() -> dict[str, str]:
@@ -76,10 +101,70 @@ def _merge_env(envfile_vars: dict[str, str]) -> None:
         os.environ.setdefault(k, v)
 
 
+def _positive_int(value: str) -> int:
+    try:
+        n = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}") from None
+    if n < 1:
+        raise argparse.ArgumentTypeError(f"must be >= 1: {value!r}")
+    return n
+
+
+def _rate_limit(value: str) -> tuple[str, float, int]:
+    """HOST=RATE[:BURST], e.g. ipwho.is=5:20"""
+    host, sep, spec = value.partition("=")
+    rate_s, _, burst_s = spec.partition(":")
+    try:
+        rate = float(rate_s)
+        burst = int(burst_s) if burst_s else max(1, int(rate))
+    except ValueError:
+        rate = burst = 0
+    if not sep or not host or rate <= 0 or burst < 1:
+        raise argparse.ArgumentTypeError(f"expected HOST=RATE[:BURST]: {value!r}")
+    return host.lower(), rate, burst
+
+
+def _quota(value: str) -> tuple[str, int, str]:
+    """HOST=N[/day|/month], e.g. api.ip2whois.com=500/month"""
+    host, sep, spec = value.partition("=")
+    count_s, _, period = spec.partition("/")
+    period = period or "month"
+    try:
+        count = int(count_s)
+    except ValueError:
+        count = -1
+    if not sep or not host or count < 0 or period not in {"day", "month"}:
+        raise argparse.ArgumentTypeError(f"expected HOST=N[/day|/month]: {value!r}")
+    return host.lower(), count, period
+
+
+class _VersionAction(argparse.Action):
+    """argparse's "version" action, but the version is only looked up when asked for."""
+
+    def __init__(self, option_strings: list[str], dest: str = argparse.SUPPRESS, **_: Any) -> None:
+        super().__init__(
+            option_strings, dest=dest, default=argparse.SUPPRESS, nargs=0, help="Show version"
+        )
+
+    def __call__(self, parser: argparse.ArgumentParser, *_: Any) -> None:
+        from .. import __version__  # noqa: PLC0415 - keeps metadata lookup off the hot path
+
+        print(f"{parser.prog} {__version__}", file=sys.stdout)
+        parser.exit()
+
+
 def _parse_args(argv: Iterable[str]) -> argparse.Namespace:
     p = argparse.ArgumentParser(prog="wib", description="Passive OSINT lookups for IPs and domains")
-    p.add_argument("entities", nargs="*", help="IPs or domains/FQDNs (defanged ok)")
-    p.add_argument("-V", "--version", action="version", version=f"%(prog)s {__version__}")
+    p.add_argument("entities", nargs="*", help="IPs or domains/FQDNs (defanged ok); - reads stdin")
+    p.add_argument(
+        "-i",
+        "--input",
+        dest="input_path",
+        metavar="FILE",
+        help="Read entities from FILE, one per line (- for stdin)",
+    )
+    p.add_argument("-V", "--version", action=_VersionAction)
     p.add_argument(
         "-A",
         "--all",
@@ -92,17 +177,108 @@ def _parse_args(argv: Iterable[str]) -> argparse.Namespace:
         choices=[g.value for g in GeoService],
         default=os.environ.get("GEOLOCATION_SERVICE", GeoService.ipwhois.value),
     )
+    p.add_argument(
+        "--geo-db",
+        default=os.environ.get("WIB_GEO_DB"),
+        metavar="PATH",
+        help="Table for --geo-service offline (default: built by `wib build-geo` in the cache dir)",
+    )
     p.add_argument("--max-resolutions", type=int, default=10)
     p.add_argument("--one-column", action="store_true")
+    p.add_argument(
+        "--table",
+        action="store_true",
+        help="Rich output: one table row per entity instead of panels",
+    )
     p.add_argument("--no-color", action="store_true")
     p.add_argument("--timeout", type=float, default=10.0)
     p.add_argument("--no-virustotal", action="store_true")
     p.add_argument("--dns", dest="show_dns", action="store_true", help="Resolve DNS records")
+    p.add_argument("--doh-url", help="DNS over HTTPS endpoint (default: Google Public DNS)")
+    p.add_argument(
+        "--doh-wire",
+        action="store_true",
+        help="Use RFC 8484 wire format (application/dns-message) instead of the JSON API",
+    )
+    p.add_argument(
+        "--concurrency",
+        type=_positive_int,
+        default=10,
+        help="Maximum number of entities looked up in parallel (default: 10)",
+    )
+    p.add_argument(
+        "--workers",
+        type=_positive_int,
+        default=1,
+        help="Shard the input across N processes, each running --concurrency lookups "
+        "(default: 1)",
+    )
+    p.add_argument(
+        "--hedge-delay",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="Start port 43 WHOIS if RDAP has not answered after SECONDS and keep the first result",
+    )
+    p.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not read or write the persistent lookup cache",
+    )
+    p.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Ignore cached results but store the fresh ones",
+    )
+    p.add_argument(
+        "--cache-size",
+        dest="cache_max_entries",
+        type=_positive_int,
+        default=100_000,
+        help="Maximum number of cached results before the oldest are evicted",
+    )
+    p.add_argument(
+        "--rate-limit",
+        dest="rate_limits",
+        type=_rate_limit,
+        action="append",
+        default=[],
+        metavar="HOST=RATE[:BURST]",
+        help="Requests per second (and burst) for a host; repeatable",
+    )
+    p.add_argument(
+        "--quota",
+        dest="quotas",
+        type=_quota,
+        action="append",
+        default=[],
+        metavar="HOST=N[/day|/month]",
+        help="Cap requests to a metered API per UTC day/month; repeatable",
+    )
     p.add_argument(
         "--output", choices=[f.value for f in OutputFormat], default=OutputFormat.rich.value
     )
     p.add_argument("--out-file", dest="out_file")
-    p.add_argument("-v", action="count", default=0)
+    p.add_argument("--compact", action="store_true", help="Write json output without indentation")
+    p.add_argument(
+        "--gzip",
+        action="store_true",
+        help="gzip-compress json/yaml/md/ndjson/csv output "
+        "(implied by an --out-file ending in .gz)",
+    )
+    p.add_argument(
+        "--unordered",
+        action="store_true",
+        help="Emit results as lookups finish instead of in input order",
+    )
+    p.add_argument(
+        "--stats",
+        nargs="?",
+        const="text",
+        choices=STATS_FORMATS,
+        help="Print request/cache/stage metrics to stderr after the run (default: text)",
+    )
+    p.add_argument("-v", action="count", default=0, help="-v prints the --stats summary")
     p.add_argument("-q", action="count", default=0)
     return p.parse_args(list(argv))
 
@@ -133,19 +309,41 @@ def load_config(argv: Iterable[str] | None = None) -> AppConfig:
 
     ns = _parse_args(merged)
     verbosity = int(ns.v) - int(ns.q)
+    entities = list(ns.entities) if ns.entities else []
+    input_path = ns.input_path or None
+    if "-" in entities:
+        entities = [e for e in entities if e != "-"]
+        input_path = input_path or "-"
     cfg = AppConfig(
         output=OutputFormat(ns.output),
         out_file=ns.out_file,
-        entities=list(ns.entities) if ns.entities else [],
+        gzip=bool(ns.gzip) or str(ns.out_file or "").endswith(".gz"),
+        compact=bool(ns.compact),
+        unordered=bool(ns.unordered),
+        entities=entities,
+        input_path=input_path,
         all_optional=bool(ns.all_optional),
         one_column=bool(ns.one_column),
+        table=bool(ns.table),
         no_color=bool(ns.no_color),
         timeout=float(ns.timeout),
         no_virustotal=bool(ns.no_virustotal),
         max_resolutions=int(ns.max_resolutions),
         geo_service=GeoService(ns.geo_service),
+        geo_db=ns.geo_db or None,
         verbosity=verbosity,
+        stats=ns.stats or ("text" if verbosity > 0 else None),
         keys=_collect_keys(),
         show_dns=bool(ns.show_dns),
+        doh_url=ns.doh_url or None,
+        doh_wire=bool(ns.doh_wire),
+        concurrency=int(ns.concurrency),
+        workers=int(ns.workers),
+        hedge_delay=float(ns.hedge_delay) if ns.hedge_delay is not None else None,
+        no_cache=bool(ns.no_cache),
+        refresh=bool(ns.refresh),
+        cache_max_entries=int(ns.cache_max_entries),
+        rate_limits={host: (rate, burst) for host, rate, burst in ns.rate_limits},
+        quotas={host: (count, period) for host, count, period in ns.quotas},
     )
     return cfg
@@ -1,32 +1,160 @@
 from __future__ import annotations
 
+import asyncio
+from collections.abc import Awaitable
+
+import httpx
+
+from ..cache import ResultCache
 from ..clients.dns import DnsClient
 from ..clients.ip2whois import Ip2WhoisClient
 from ..clients.rdap import RdapClient
 from ..clients.whois import Port43WhoisClient
+from ..http.lru import TtlLruCache
 from ..http.request import RequestManager, RequestSettings
-from ..models.common import DomainData
+from ..models.common import DomainData, DomainDns, DomainWhois
+from ..utils.psl import registrable_domain
+
+# Registrations remembered per handler (i.e. per batch) so subdomains share one lookup
+_BATCH_WHOIS_ENTRIES = 50_000
+_BATCH_WHOIS_TTL = 3600.0
+# "No WHOIS" may be a transient failure (timeout, open circuit, unreachable source) rather
+# than a definitive answer, so it is remembered only briefly: enough to spare the rest of
+# a burst of subdomains, short enough that a long-lived session (wib serve) soon retries.
+_BATCH_WHOIS_MISS_TTL = 30.0
 
 
 class DomainHandler:
-    def __init__(self, *, timeout: float = 10.0, ip2whois_key: str | None = None) -> None:
-        self.rm = RequestManager(RequestSettings(timeout=timeout))
+    def __init__(  # noqa: PLR0913 - keyword-only collaborators
+        self,
+        *,
+        timeout: float = 10.0,
+        ip2whois_key: str | None = None,
+        rm: RequestManager | None = None,
+        cache: ResultCache | None = None,
+        dns: DnsClient | None = None,
+        hedge_delay: float | None = None,
+    ) -> None:
+        # A shared RequestManager stays owned by the caller; only close one we created.
+        self._owns_rm = rm is None
+        self.rm = rm or RequestManager(RequestSettings(timeout=timeout))
         self.rdap = RdapClient(self.rm)
         # Port 43 WHOIS does not use HTTP, so it doesn't need RequestManager
-        self.port43 = Port43WhoisClient(timeout=timeout)
-        self.dns = DnsClient(self.rm)
+        self.port43 = Port43WhoisClient(timeout=timeout, breakers=self.rm.breakers)
+        self.dns = dns or DnsClient(self.rm)
         self.ip2whois = Ip2WhoisClient(self.rm, ip2whois_key) if ip2whois_key else None
+        self.cache = cache
+        # None: strict RDAP -> port 43 sequence; otherwise race port 43 after this delay
+        self.hedge_delay = hedge_delay
+        # Registrable domain -> (whois,) for this batch; the tuple lets "no WHOIS" be remembered
+        self._whois_seen: TtlLruCache[tuple[DomainWhois | None]] = TtlLruCache(
+            max_entries=_BATCH_WHOIS_ENTRIES, ttl=_BATCH_WHOIS_TTL
+        )
+        self._whois_inflight: dict[str, asyncio.Task[DomainWhois | None]] = {}
 
-    async def fetch(self, domain: str, *, include_dns: bool = False) -> DomainData:
-        whois = await self.rdap.fetch(domain)
-        if whois is None:
-            # Best-effort fallback to traditional WHOIS over port 43
+    @staticmethod
+    async def _unless_down(source: Awaitable[DomainWhois | None]) -> DomainWhois | None:
+        # A source that is unreachable (or whose circuit is open) just passes the turn
+        try:
+            return await source
+        except httpx.TransportError:
+            return None
+
+    async def _fetch_whois(self, domain: str) -> DomainWhois | None:
+        if not await self.rdap.available(domain):
+            # RDAP server's circuit is open: straight to port 43, no hedge delay
             whois = await self.port43.fetch(domain)
+        elif self.hedge_delay is not None:
+            whois = await self._fetch_whois_hedged(domain, self.hedge_delay)
+        else:
+            whois = await self._unless_down(self.rdap.fetch(domain))
+            if whois is None:
+                # Best-effort fallback to traditional WHOIS over port 43
+                whois = await self.port43.fetch(domain)
         if whois is None and self.ip2whois is not None:
             # Optional paid API fallback if configured via env
-            whois = await self.ip2whois.fetch(domain)
-        dns = await self.dns.fetch(domain) if include_dns else None
+            whois = await self._unless_down(self.ip2whois.fetch(domain))
+        return whois
+
+    async def _fetch_whois_hedged(self, domain: str, delay: float) -> DomainWhois | None:
+        """RDAP first; if it has not answered within delay, race port 43 against it.
+
+        The first usable DomainWhois wins and the other lookup is cancelled. A source that
+        fails only loses the race; its exception is re-raised if no source succeeded.
+        """
+        rdap = asyncio.create_task(self._unless_down(self.rdap.fetch(domain)))
+        tasks = [rdap]
+        error: BaseException | None = None
+        try:
+            answered, _ = await asyncio.wait({rdap}, timeout=delay)
+            if answered:
+                whois = rdap.result()
+                return whois if whois is not None else await self.port43.fetch(domain)
+            tasks.append(asyncio.create_task(self.port43.fetch(domain)))
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    exc = task.exception()
+                    if exc is not None:
+                        error = error or exc
+                    elif (whois := task.result()) is not None:
+                        return whois
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+        if error is not None:
+            raise error
+        return None
+
+    async def _fetch_dns(self, domain: str) -> DomainDns | None:
+        dns = self.cache.get("dns", domain, DomainDns) if self.cache else None
+        if dns is None:
+            dns, ttl = await self.dns.fetch_with_ttl(domain)
+            if dns is not None and self.cache is not None:
+                self.cache.put("dns", domain, dns, self.cache.ttls.dns(ttl))
+        return dns
+
+    async def _whois_cached(self, registration: str) -> DomainWhois | None:
+        whois = self.cache.get("whois", registration, DomainWhois) if self.cache else None
+        if whois is None:
+            whois = await self._fetch_whois(registration)
+            if whois is not None and self.cache is not None:
+                self.cache.put("whois", registration, whois, self.cache.ttls.whois)
+        self._whois_seen.set(
+            registration, (whois,), ttl=None if whois is not None else _BATCH_WHOIS_MISS_TTL
+        )
+        return whois
+
+    async def whois(self, domain: str) -> DomainWhois | None:
+        """WHOIS for the registration domain belongs to (a.cdn.example.co.uk -> example.co.uk).
+
+        Each registrable domain is looked up once per handler: concurrent callers share the
+        in-flight lookup and later ones get the remembered result.
+        """
+        registration = registrable_domain(domain) or domain
+        seen = self._whois_seen.get(registration)
+        if seen is not None:
+            return seen[0]
+        task = self._whois_inflight.get(registration)
+        if task is None:
+            task = asyncio.create_task(self._whois_cached(registration))
+            self._whois_inflight[registration] = task
+            task.add_done_callback(lambda _: self._whois_inflight.pop(registration, None))
+        return await asyncio.shield(task)
+
+    async def fetch(self, domain: str, *, include_dns: bool = False) -> DomainData:
+        metrics = self.rm.metrics
+        with metrics.timer("wib_stage_seconds", stage="whois"):
+            whois = await self.whois(domain)
+        dns = None
+        if include_dns:
+            # DNS is host-level data and stays per FQDN
+            with metrics.timer("wib_stage_seconds", stage="dns"):
+                dns = await self._fetch_dns(domain)
         return DomainData(domain=domain, whois=whois, dns=dns)
 
     async def aclose(self) -> None:
-        await self.rm.aclose()
+        if self._owns_rm:
+            await self.rm.aclose()
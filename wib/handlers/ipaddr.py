@@ -1,18 +1,51 @@
 from __future__ import annotations
 
+from collections.abc import Iterable
+from typing import Protocol
+
+from ..cache import ResultCache
+from ..clients.batch_geo import BatchGeoClient
 from ..clients.ipwhois import IpWhoisClient
 from ..http.request import RequestManager, RequestSettings
-from ..models.common import IpData
+from ..models.common import IpData, IpGeo
+
+
+class GeoSource(Protocol):
+    async def fetch(self, ip: str) -> IpGeo | None: ...
 
 
 class IpAddressHandler:
-    def __init__(self, *, timeout: float = 10.0) -> None:
-        self.rm = RequestManager(RequestSettings(timeout=timeout))
-        self.ipwhois = IpWhoisClient(self.rm)
+    def __init__(
+        self,
+        *,
+        timeout: float = 10.0,
+        rm: RequestManager | None = None,
+        cache: ResultCache | None = None,
+        geo: GeoSource | None = None,
+    ) -> None:
+        # A shared RequestManager stays owned by the caller; only close one we created.
+        self._owns_rm = rm is None
+        self.rm = rm or RequestManager(RequestSettings(timeout=timeout))
+        self.geo: GeoSource = geo or IpWhoisClient(self.rm)
+        self.cache = cache
+
+    def prefetch(self, ips: Iterable[str]) -> None:
+        """Let a batching geo source queue upcoming IPs (uncached ones only)."""
+        if isinstance(self.geo, BatchGeoClient):
+            cache = self.cache
+            self.geo.prefetch(ip for ip in ips if cache is None or not cache.has("geo", ip))
 
     async def fetch(self, ip: str) -> IpData:
-        geo = await self.ipwhois.fetch(ip)
+        with self.rm.metrics.timer("wib_stage_seconds", stage="geo"):
+            geo = self.cache.get("geo", ip, IpGeo) if self.cache else None
+            if geo is None:
+                geo = await self.geo.fetch(ip)
+                if geo is not None and self.cache is not None:
+                    self.cache.put("geo", ip, geo, self.cache.ttls.geo)
         return IpData(ip=ip, geo=geo)
 
     async def aclose(self) -> None:
-        await self.rm.aclose()
+        if isinstance(self.geo, BatchGeoClient):
+            await self.geo.aclose()
+        if self._owns_rm:
+            await self.rm.aclose()
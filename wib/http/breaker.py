@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from enum import Enum
+
+import httpx
+
+
+class BreakerState(str, Enum):
+    closed = "closed"
+    open = "open"
+    half_open = "half_open"
+
+
+class CircuitOpenError(httpx.TransportError):
+    """Raised instead of sending a request to a host whose circuit is open."""
+
+    def __init__(self, key: str) -> None:
+        super().__init__(f"circuit open for {key}")
+        self.key = key
+
+
+@dataclass
+class _Circuit:
+    failures: int = 0
+    opened_at: float | None = None
+    probing: bool = False
+
+
+class CircuitBreakers:
+    """Per-host (or per-provider) circuit breakers.
+
+    A circuit opens after failure_threshold consecutive failures; while open, allow()
+    refuses at once instead of letting callers sit through timeouts and retries. After
+    reset_timeout it is half-open: a single probe is let through, and its outcome closes
+    the circuit or re-opens it for another reset_timeout.
+    """
+
+    def __init__(self, *, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._circuits: dict[str, _Circuit] = {}
+
+    def state(self, key: str) -> BreakerState:
+        circuit = self._circuits.get(key)
+        if circuit is None or circuit.opened_at is None:
+            return BreakerState.closed
+        if time.monotonic() - circuit.opened_at < self.reset_timeout:
+            return BreakerState.open
+        return BreakerState.half_open
+
+    def is_open(self, key: str) -> bool:
+        """True if a request for key would be refused right now."""
+        state = self.state(key)
+        if state == BreakerState.half_open:
+            return self._circuits[key].probing
+        return state == BreakerState.open
+
+    def allow(self, key: str) -> bool:
+        state = self.state(key)
+        if state == BreakerState.closed:
+            return True
+        if state == BreakerState.open:
+            return False
+        circuit = self._circuits[key]
+        if circuit.probing:
+            return False
+        circuit.probing = True
+        return True
+
+    def success(self, key: str) -> None:
+        self._circuits.pop(key, None)
+
+    def failure(self, key: str) -> None:
+        circuit = self._circuits.setdefault(key, _Circuit())
+        circuit.failures += 1
+        if circuit.probing or circuit.failures >= self.failure_threshold:
+            circuit.opened_at = time.monotonic()
+        circuit.probing = False
+
+    def release(self, key: str) -> None:
+        """Give up a half-open probe slot without an outcome (e.g. the caller was cancelled)."""
+        circuit = self._circuits.get(key)
+        if circuit is not None:
+            circuit.probing = False
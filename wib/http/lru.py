@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Generic, TypeVar
+
+V = TypeVar("V")
+
+
+class TtlLruCache(Generic[V]):
+    """In-memory LRU with per-entry expiry, bounded by entry count and approximate bytes.
+
+    Sizes are supplied by the caller (e.g. the length of the response body the value was
+    decoded from); they only need to be proportional to real memory use.
+    """
+
+    def __init__(self, *, max_entries: int, ttl: float, max_bytes: int | None = None) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._data: OrderedDict[str, tuple[float, int, V]] = OrderedDict()
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> V | None:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires, size, value = item
+        if expires <= time.monotonic():
+            del self._data[key]
+            self._bytes -= size
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: V, *, size: int = 0, ttl: float | None = None) -> None:
+        if self.max_entries <= 0 or (self.max_bytes is not None and size > self.max_bytes):
+            return
+        old = self._data.pop(key, None)
+        if old is not None:
+            self._bytes -= old[1]
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires, size, value)
+        self._bytes += size
+        while len(self._data) > self.max_entries or (
+            self.max_bytes is not None and self._bytes > self.max_bytes
+        ):
+            _, (_, evicted, _) = self._data.popitem(last=False)
+            self._bytes -= evicted
@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import asyncio
+import email.utils
+import json
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+from ..utils.paths import atomic_write_text, cache_dir
+
+# X-RateLimit-Reset values above this are epoch timestamps, below it delta seconds
+_EPOCH_THRESHOLD = 1_000_000_000
+QUOTA_PERIODS = ("day", "month")
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """Sustained requests per second and burst size for one host.
+
+    quota optionally caps requests per quota_period ("day" or "month", UTC) for metered
+    APIs; the count is persisted so it holds across runs.
+    """
+
+    rate: float
+    burst: int = 1
+    quota: int | None = None
+    quota_period: str = "month"
+
+
+# Public, keyless endpoints: stay under their documented or observed fair-use limits.
+DEFAULT_RATE_LIMITS: dict[str, RateLimit] = {
+    "rdap.org": RateLimit(rate=1.0, burst=10),
+    "ipwho.is": RateLimit(rate=2.0, burst=10),
+    "api.ip2whois.com": RateLimit(rate=1.0, burst=5, quota=500, quota_period="month"),
+}
+
+
+class TokenBucket:
+    """rate=None only enforces server-requested pauses."""
+
+    def __init__(self, rate: float | None, burst: int = 1) -> None:
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._stamp = time.monotonic()
+        # Server-requested pause (Retry-After, exhausted X-RateLimit-Remaining)
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float, rate: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._stamp) * rate)
+        self._stamp = now
+
+    async def acquire(self) -> None:
+        # The lock queues waiters FIFO, so one host's requests go out in arrival order.
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                rate = self.rate
+                if rate is None:
+                    return
+                self._refill(now, rate)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / rate)
+
+    def pause(self, seconds: float) -> None:
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+def _period_key(period: str, now: datetime) -> str:
+    return now.strftime("%Y-%m-%d" if period == "day" else "%Y-%m")
+
+
+class QuotaCounter:
+    """Requests made to metered hosts in the current day/month, persisted in the cache dir.
+
+    Counts are merged into the file on save (read, add, write-then-rename), so concurrent
+    wib processes only lose increments when they save at the same instant.
+    """
+
+    FILENAME = "quota.json"
+
+    def __init__(self, path: Path | str | None = None) -> None:
+        self.path = Path(path) if path is not None else cache_dir() / self.FILENAME
+        # host -> (period key, used as of the last load/save)
+        self._saved: dict[str, tuple[str, int]] = self._load()
+        self._unsaved: dict[str, int] = {}
+
+    def _load(self) -> dict[str, tuple[str, int]]:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        out: dict[str, tuple[str, int]] = {}
+        if isinstance(data, dict):
+            for host, entry in data.items():
+                if isinstance(entry, dict):
+                    out[str(host)] = (str(entry.get("period")), int(entry.get("used") or 0))
+        return out
+
+    def used(self, host: str, period: str) -> int:
+        key = _period_key(period, datetime.now(timezone.utc))
+        saved_key, saved = self._saved.get(host, (key, 0))
+        return (saved if saved_key == key else 0) + self._unsaved.get(host, 0)
+
+    def add(self, host: str) -> None:
+        self._unsaved[host] = self._unsaved.get(host, 0) + 1
+
+    def save(self, periods: Mapping[str, str]) -> None:
+        if not self._unsaved:
+            return
+        now = datetime.now(timezone.utc)
+        merged = self._load()
+        for host, n in self._unsaved.items():
+            key = _period_key(periods.get(host, "month"), now)
+            saved_key, saved = merged.get(host, (key, 0))
+            merged[host] = (key, (saved if saved_key == key else 0) + n)
+        payload = {h: {"period": k, "used": n} for h, (k, n) in sorted(merged.items())}
+        try:
+            atomic_write_text(self.path, json.dumps(payload))
+        except OSError:
+            return
+        self._saved = merged
+        self._unsaved = {}
+
+
+def retry_after(resp: httpx.Response) -> float | None:
+    """Seconds to wait according to Retry-After (delta or HTTP date), if present."""
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def ratelimit_reset(resp: httpx.Response) -> float | None:
+    """Seconds until the window resets when X-RateLimit-Remaining says it is exhausted."""
+    remaining = resp.headers.get("X-RateLimit-Remaining")
+    reset = resp.headers.get("X-RateLimit-Reset")
+    if remaining is None or reset is None:
+        return None
+    try:
+        if float(remaining) > 0:
+            return None
+        value = float(reset)
+    except ValueError:
+        return None
+    if value > _EPOCH_THRESHOLD:
+        value -= time.time()
+    return max(0.0, value)
+
+
+class RateLimiter:
+    """Per-host token buckets, server-requested pauses and persisted quotas."""
+
+    def __init__(
+        self, limits: Mapping[str, RateLimit], *, quota: QuotaCounter | None = None
+    ) -> None:
+        self.limits = dict(limits)
+        self._buckets: dict[str, TokenBucket] = {}
+        self._quota = quota
+
+    def _bucket(self, host: str) -> TokenBucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            limit = self.limits.get(host)
+            # Hosts without a configured limit still get a bucket so pauses apply to them
+            bucket = TokenBucket(limit.rate, limit.burst) if limit else TokenBucket(None)
+            self._buckets[host] = bucket
+        return bucket
+
+    def quota_exhausted(self, host: str) -> bool:
+        limit = self.limits.get(host)
+        if limit is None or limit.quota is None or self._quota is None:
+            return False
+        return self._quota.used(host, limit.quota_period) >= limit.quota
+
+    async def acquire(self, host: str) -> bool:
+        """Wait for a request slot; False if the host's quota is used up."""
+        if self.quota_exhausted(host):
+            return False
+        await self._bucket(host).acquire()
+        limit = self.limits.get(host)
+        if self._quota is not None and limit is not None and limit.quota is not None:
+            self._quota.add(host)
+        return True
+
+    def observe(self, host: str, resp: httpx.Response) -> float | None:
+        """Apply rate limit headers; returns the server-requested wait, if any."""
+        wait = retry_after(resp)
+        if wait is None:
+            wait = ratelimit_reset(resp)
+        if wait:
+            self._bucket(host).pause(wait)
+        return wait
+
+    def save(self) -> None:
+        if self._quota is not None:
+            self._quota.save({h: lim.quota_period for h, lim in self.limits.items()})
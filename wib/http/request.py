@@ -1,15 +1,35 @@
 from __future__ import annotations
 
 import asyncio
+import importlib.util
 import random
 import time
 from collections import defaultdict
-from dataclasses import dataclass
+from collections.abc import Callable
+from dataclasses import dataclass, field
 from http import HTTPStatus
-from typing import Any
+from typing import Any, TypeVar, cast
 
 import httpx
 
+from ..metrics import MetricsRegistry
+from .breaker import BreakerState, CircuitBreakers, CircuitOpenError
+from .lru import TtlLruCache
+from .ratelimit import DEFAULT_RATE_LIMITS, QuotaCounter, RateLimit, RateLimiter
+
+T = TypeVar("T")
+
+# Responses worth retrying: rate limited or a transient server/gateway failure
+RETRY_STATUSES = frozenset(
+    {
+        HTTPStatus.TOO_MANY_REQUESTS,
+        HTTPStatus.INTERNAL_SERVER_ERROR,
+        HTTPStatus.BAD_GATEWAY,
+        HTTPStatus.SERVICE_UNAVAILABLE,
+        HTTPStatus.GATEWAY_TIMEOUT,
+    }
+)
+
 
 def _compute_backoff(attempt: int, base: float = 0.2, cap: float = 5.0) -> float:
     exp: float = min(cap, base * (2**attempt))
@@ -18,27 +38,74 @@ def _compute_backoff(attempt: int, base: float = 0.2, cap: float = 5.0) -> float
     return float(exp * jitter)
 
 
+def _http2_available() -> bool:
+    # httpx only speaks HTTP/2 when the optional h2 package is installed (httpx[http2]).
+    return importlib.util.find_spec("h2") is not None
+
+
 @dataclass
 class RequestSettings:
     timeout: float = 10.0
     max_retries: int = 2
     user_agent: str = "wib/0.1.0"
     per_host_limit: int = 5
+    # Connection pool; one RequestManager is meant to be shared by a whole run so
+    # TCP/TLS setup is paid once per host rather than once per entity.
+    http2: bool = True
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    # In-memory cache of decoded JSON payloads (see RequestManager.get_json)
+    cache_ttl: float = 300.0
+    cache_max_entries: int = 2048
+    cache_max_bytes: int = 32 * 1024 * 1024
+    # Per-host token buckets (and quotas for metered APIs); hosts not listed are unlimited
+    rate_limits: dict[str, RateLimit] = field(default_factory=lambda: dict(DEFAULT_RATE_LIMITS))
+    # Total seconds one request may spend sleeping between retries (Retry-After included);
+    # a longer server-requested wait returns the 429/503 to the caller instead.
+    retry_budget: float = 30.0
+    # Circuit breaker per host: open after this many consecutive failed requests, probe
+    # again after breaker_reset seconds
+    breaker_failures: int = 5
+    breaker_reset: float = 30.0
 
 
 class RequestManager:
-    def __init__(self, settings: RequestSettings | None = None) -> None:
+    def __init__(
+        self, settings: RequestSettings | None = None, *, metrics: MetricsRegistry | None = None
+    ) -> None:
         self.settings = settings or RequestSettings()
+        self.metrics = metrics or MetricsRegistry.shared()
         self._client = httpx.AsyncClient(
             follow_redirects=True,
             headers={"User-Agent": self.settings.user_agent},
+            http2=self.settings.http2 and _http2_available(),
+            limits=httpx.Limits(
+                max_connections=self.settings.max_connections,
+                max_keepalive_connections=self.settings.max_keepalive_connections,
+                keepalive_expiry=self.settings.keepalive_expiry,
+            ),
         )
         self._locks: dict[str, asyncio.Semaphore] = defaultdict(
             lambda: asyncio.Semaphore(self.settings.per_host_limit)
         )
-        self._cache: dict[tuple[str, str], tuple[float, httpx.Response]] = {}
+        self._cache: TtlLruCache[Any] = TtlLruCache(
+            max_entries=self.settings.cache_max_entries,
+            ttl=self.settings.cache_ttl,
+            max_bytes=self.settings.cache_max_bytes,
+        )
+        # Single-flight: concurrent get_json calls for the same URL share one task.
+        self._inflight: dict[str, asyncio.Task[Any]] = {}
+        limits = self.settings.rate_limits
+        metered = any(limit.quota is not None for limit in limits.values())
+        self._limiter = RateLimiter(limits, quota=QuotaCounter() if metered else None)
+        self.breakers = CircuitBreakers(
+            failure_threshold=self.settings.breaker_failures,
+            reset_timeout=self.settings.breaker_reset,
+        )
 
     async def aclose(self) -> None:
+        self._limiter.save()
         await self._client.aclose()
 
     async def get(
@@ -47,30 +114,204 @@ class RequestManager:
         *,
         params: dict[str, Any] | None = None,
         headers: dict[str, str] | None = None,
-        cache: bool = True,
     ) -> httpx.Response:
-        key = (url, str(params) if params else "")
-        if cache and key in self._cache:
-            return self._cache[key][1]
+        """Uncached GET with per-host concurrency limits and retries on transport errors."""
+        return await self._send("GET", url, params=params, headers=headers)
+
+    async def post_json(
+        self,
+        url: str,
+        body: Any,
+        *,
+        params: dict[str, Any] | None = None,
+        headers: dict[str, str] | None = None,
+    ) -> Any | None:
+        """POST body as JSON (uncached, e.g. batch APIs); the decoded 200 response or None."""
+        resp = await self._send("POST", url, params=params, headers=headers, json=body)
+        if resp.status_code != HTTPStatus.OK:
+            return None
+        return _decode_json(resp)
 
+    async def _send(
+        self,
+        method: str,
+        url: str,
+        *,
+        params: dict[str, Any] | None = None,
+        headers: dict[str, str] | None = None,
+        json: Any = None,
+    ) -> httpx.Response:
+        """One request through the host's circuit breaker and rate limit.
+
+        Raises CircuitOpenError at once while the host's circuit is open. Transport
+        errors and 5xx responses count as failures once retries are exhausted.
+        """
         host = httpx.URL(url).host or ""
         async with self._locks[host]:
-            last_exc: Exception | None = None
-            for attempt in range(self.settings.max_retries + 1):
-                try:
-                    resp = await self._client.get(
-                        url, params=params, headers=headers, timeout=self.settings.timeout
-                    )
-                    if cache and resp.status_code == HTTPStatus.OK:
-                        self._cache[key] = (time.time(), resp)
+            # Checked after queueing for the host: the circuit may have opened meanwhile
+            if not self.breakers.allow(host):
+                raise CircuitOpenError(host)
+            try:
+                resp = await self._send_with_retries(
+                    method, url, host, params=params, headers=headers, json=json
+                )
+            except CircuitOpenError:
+                # Refused locally after another request opened the circuit: not a failure
+                raise
+            except (httpx.TimeoutException, httpx.TransportError):
+                self.breakers.failure(host)
+                raise
+            except BaseException:
+                self.breakers.release(host)
+                raise
+        if resp.status_code >= HTTPStatus.INTERNAL_SERVER_ERROR:
+            self.breakers.failure(host)
+        elif resp.status_code == HTTPStatus.TOO_MANY_REQUESTS:
+            # Throttled (or out of quota) says nothing about the host being up
+            self.breakers.release(host)
+        else:
+            self.breakers.success(host)
+        return resp
+
+    async def _send_with_retries(  # noqa: PLR0913
+        self,
+        method: str,
+        url: str,
+        host: str,
+        *,
+        params: dict[str, Any] | None,
+        headers: dict[str, str] | None,
+        json: Any,
+    ) -> httpx.Response:
+        """Send, retrying transport errors, 429 and 5xx.
+
+        Retry delays honor Retry-After and exhausted X-RateLimit-* headers (which also
+        pause every other request to the host) and are bounded by settings.retry_budget.
+        """
+        budget = self.settings.retry_budget
+        request = self._client.build_request(
+            method, url, params=params, headers=headers, json=json, timeout=self.settings.timeout
+        )
+        for attempt in range(self.settings.max_retries + 1):
+            last = attempt >= self.settings.max_retries
+            if attempt and self.breakers.state(host) == BreakerState.open:
+                # Other requests tripped the breaker while this one was backing off. Not
+                # is_open(): a half-open probe, possibly this very request, may retry.
+                raise CircuitOpenError(host)
+            if not await self._limiter.acquire(host):
+                # Metered API out of quota: answer like the server would, without asking it
+                return httpx.Response(
+                    HTTPStatus.TOO_MANY_REQUESTS, request=httpx.Request(method, url)
+                )
+            try:
+                resp = await self._send_once(host, request)
+            except httpx.TransportError as exc:
+                if last:
+                    raise
+                delay = _compute_backoff(attempt)
+                reason = "timeout" if isinstance(exc, httpx.TimeoutException) else "transport"
+            else:
+                requested = self._limiter.observe(host, resp)
+                if resp.status_code not in RETRY_STATUSES or last:
+                    return resp
+                delay = requested if requested is not None else _compute_backoff(attempt)
+                if delay > budget:
                     return resp
-                except (httpx.TimeoutException, httpx.TransportError) as exc:
-                    last_exc = exc
-                    if attempt >= self.settings.max_retries:
-                        raise
-                    await asyncio.sleep(_compute_backoff(attempt))
-
-        if last_exc is not None:
-            raise last_exc
-        # Defensive: we should have either returned or raised by now.
+                reason = str(resp.status_code)
+            self.metrics.inc("wib_http_retries_total", host=host, reason=reason)
+            budget -= delay
+            await asyncio.sleep(delay)
+        # Defensive: the last attempt always returns or raises.
         raise RuntimeError("Request failed after retries")
+
+    async def _send_once(self, host: str, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        status = "error"
+        try:
+            resp = await self._client.send(request)
+            status = str(resp.status_code)
+            return resp
+        except httpx.TimeoutException:
+            status = "timeout"
+            self.metrics.inc("wib_http_timeouts_total", host=host)
+            raise
+        finally:
+            self.metrics.inc("wib_http_requests_total", host=host, status=status)
+            self.metrics.observe(
+                "wib_http_request_seconds", time.perf_counter() - started, host=host
+            )
+
+    async def get_json(
+        self,
+        url: str,
+        *,
+        params: dict[str, Any] | None = None,
+        headers: dict[str, str] | None = None,
+        cache: bool = True,
+    ) -> Any | None:
+        """GET and decode a JSON body; None unless the response is 200 with valid JSON."""
+        return await self.get_decoded(
+            url, _decode_json, params=params, headers=headers, cache=cache
+        )
+
+    async def get_decoded(
+        self,
+        url: str,
+        decode: Callable[[httpx.Response], T | None],
+        *,
+        params: dict[str, Any] | None = None,
+        headers: dict[str, str] | None = None,
+        cache: bool = True,
+    ) -> T | None:
+        """GET a 200 response and return decode(response), or None.
+
+        Decoded payloads are kept in a bounded LRU with TTL expiry (the raw response is
+        dropped), and concurrent calls for the same URL are coalesced into one request.
+        The cache key is the URL with its query, so one URL must always use one decoder.
+        """
+        if not cache:
+            return await self._fetch_decoded(url, decode, params, headers, key=None)
+        key = str(httpx.URL(url, params=params))
+        hit = self._cache.get(key)
+        self.metrics.inc(
+            "wib_cache_requests_total", cache="http", result="miss" if hit is None else "hit"
+        )
+        if hit is not None:
+            return cast(T, hit)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch_decoded(url, decode, params, headers, key=key))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish_inflight(key, t))
+        # shield: one caller being cancelled must not cancel the request for the others
+        return cast("T | None", await asyncio.shield(task))
+
+    def _finish_inflight(self, key: str, task: asyncio.Task[Any]) -> None:
+        self._inflight.pop(key, None)
+        if not task.cancelled():
+            # Mark the exception retrieved even if every waiter has gone away.
+            task.exception()
+
+    async def _fetch_decoded(
+        self,
+        url: str,
+        decode: Callable[[httpx.Response], T | None],
+        params: dict[str, Any] | None,
+        headers: dict[str, str] | None,
+        *,
+        key: str | None,
+    ) -> T | None:
+        resp = await self.get(url, params=params, headers=headers)
+        if resp.status_code != HTTPStatus.OK:
+            return None
+        payload = decode(resp)
+        if key is not None and payload is not None:
+            self._cache.set(key, payload, size=len(resp.content))
+        return payload
+
+
+def _decode_json(resp: httpx.Response) -> Any | None:
+    try:
+        return resp.json()
+    except ValueError:
+        return None
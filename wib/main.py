@@ -1,65 +1,54 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
+import gzip
 import importlib
-import json
+import io
 import os
 import sys
-from typing import Any
+from collections.abc import AsyncIterator, Callable, Iterable, Iterator
+from typing import TYPE_CHECKING, BinaryIO, TextIO, cast
 
 from .config import AppConfig, OutputFormat, load_config
-from .handlers import DomainHandler, IpAddressHandler
-from .models.common import DomainData, IpData
-from .ui import render_domain, render_ip
-from .utils import UserVisibleError, normalize_host_input
-
-# Optional YAML support without static import errors
-yaml: Any | None
-try:  # pragma: no cover - trivial
-    yaml = importlib.import_module("yaml")
-except Exception:  # pragma: no cover
-    yaml = None
-
-
-async def _process_entity(entity: str, cfg: AppConfig) -> tuple[str, IpData | DomainData]:
-    kind, value = normalize_host_input(entity)
-    if kind == "ip":
-        ip_handler = IpAddressHandler(timeout=cfg.timeout)
-        try:
-            data: IpData | DomainData = await ip_handler.fetch(value)
-        finally:
-            await ip_handler.aclose()
-        return kind, data
-    else:
-        dom_handler = DomainHandler(
-            timeout=cfg.timeout, ip2whois_key=os.getenv("IP2WHOIS_API_KEY") or None
-        )
-        try:
-            data = await dom_handler.fetch(value, include_dns=cfg.show_dns)
-        finally:
-            await dom_handler.aclose()
-        return kind, data
+from .metrics import MetricsRegistry
+from .pipeline import Result, iter_input_lines, iter_lookups
+from .serialize import INDENT, dumps_record, dumps_records, dumps_yaml
+from .utils import UserVisibleError
 
+if TYPE_CHECKING:
+    from .models.common import DomainData, IpData
+    from .session import LookupSession
+    from .workers import WorkerPool
 
-def _render(kind: str, data: IpData | DomainData, cfg: AppConfig) -> None:
-    if kind == "ip" and isinstance(data, IpData):
-        render_ip(data, one_column=cfg.one_column, no_color=cfg.no_color)
-    elif kind == "domain" and isinstance(data, DomainData):
-        render_domain(data, one_column=cfg.one_column, no_color=cfg.no_color)
-    else:  # pragma: no cover - defensive
-        raise UserVisibleError("Unexpected data type for rendering")
+# Startup time matters when wib is run once per entity from scripts, so anything only
+# some code paths need (rich, PyYAML, the lookup stack, subcommands) is imported there.
+
+# ndjson output is flushed once this many records are pending, or this many seconds after
+# the first of them was written, whichever comes first
+NDJSON_FLUSH_RECORDS = 100
+NDJSON_FLUSH_SECONDS = 0.05
+
+
+def _session(cfg: AppConfig) -> LookupSession | WorkerPool:
+    if cfg.workers > 1:
+        from .workers import WorkerPool  # noqa: PLC0415
+
+        return WorkerPool(cfg, cfg.workers)
+    from .session import LookupSession  # noqa: PLC0415 - httpx/pydantic stack
+
+    return LookupSession(cfg)
 
 
 def _to_machine(kind: str, data: IpData | DomainData, fmt: OutputFormat) -> str:
-    obj: dict[str, Any] = {"kind": kind, "data": data.model_dump()}
-    if fmt == OutputFormat.json:
-        return json.dumps(obj, indent=2, default=str)
+    from .models.common import DomainData, IpData  # noqa: PLC0415
+
     if fmt == OutputFormat.yaml:
-        return (
-            json.dumps(obj, indent=2, default=str)
-            if yaml is None
-            else yaml.safe_dump(obj, sort_keys=False)
-        )
+        text = dumps_yaml({"kind": kind, "data": data.model_dump()})
+        if text is not None:
+            return text
+    if fmt in (OutputFormat.json, OutputFormat.yaml):
+        return dumps_record(kind, data, indent=INDENT).decode()
     # Markdown
     if kind == "ip" and isinstance(data, IpData):
         lines = [f"# IP {data.ip}"]
@@ -90,56 +79,248 @@ def _to_machine(kind: str, data: IpData | DomainData, fmt: OutputFormat) -> str:
                 f"- Expires: {w.expires}",
             ]
         return "\n".join(lines)
-    return json.dumps({"kind": kind, "data": data.model_dump()}, default=str)
+    return dumps_record(kind, data).decode()
+
+
+def _entities(cfg: AppConfig) -> Iterator[str]:
+    yield from cfg.entities or []
+    if cfg.input_path:
+        yield from iter_input_lines(cfg.input_path)
+
+
+def _counted(entities: Iterable[str], done: Callable[[int], None]) -> Iterator[str]:
+    """Pass entities through, then report how many there were once the input runs out.
+
+    Gives the progress bar its total (and ETA) without reading the input twice; stdin
+    gets one too, at EOF.
+    """
+    count = 0
+    for entity in entities:
+        count += 1
+        yield entity
+    done(count)
 
 
 async def _collect_results(cfg: AppConfig) -> list[tuple[str, IpData | DomainData]]:
-    results: list[tuple[str, IpData | DomainData]] = []
-    for e in cfg.entities or []:
-        results.append(await _process_entity(e, cfg))
-    return results
+    # Lookups run with at most cfg.concurrency in flight; results keep input order.
+    async with _session(cfg) as session:
+        results = _lookups(session, cfg)
+        return [r async for r in results]
 
 
-def _emit_output(cfg: AppConfig, results: list[tuple[str, IpData | DomainData]]) -> None:
-    if cfg.output == OutputFormat.rich:
-        for k, d in results:
-            _render(k, d, cfg)
+def _lookups(
+    session: LookupSession | WorkerPool, cfg: AppConfig, entities: Iterable[str] | None = None
+) -> AsyncIterator[Result]:
+    if entities is None:
+        entities = _entities(cfg)
+    if cfg.workers > 1:
+        return cast("WorkerPool", session).lookups(entities, on_error=_lookup_failed)
+    return iter_lookups(
+        cast("LookupSession", session),
+        entities,
+        concurrency=cfg.concurrency,
+        ordered=not cfg.unordered,
+        on_error=_lookup_failed,
+    )
+
+
+def _lookup_failed(entity: str, exc: Exception) -> None:
+    # One bad line must not end a bulk run: report it on stderr and carry on
+    MetricsRegistry.shared().inc("wib_lookup_failures_total")
+    print(f"wib: {entity}: {exc}", file=sys.stderr)
+
+
+@contextlib.contextmanager
+def _open_output(cfg: AppConfig) -> Iterator[TextIO]:
+    if not cfg.out_file and not cfg.gzip:
+        yield sys.stdout
         return
-    if cfg.output in (OutputFormat.json, OutputFormat.yaml):
-        obj: Any
-        if len(results) > 1:
-            obj = [{"kind": k, "data": d.model_dump()} for k, d in results]
+    with _open_binary_output(cfg) as raw:
+        out = io.TextIOWrapper(raw, encoding="utf-8")
+        yield out
+        out.flush()
+        out.detach()
+
+
+async def _stream_output(cfg: AppConfig) -> None:
+    """rich/md output: emit each result as soon as it and every result before it are done."""
+    async with _session(cfg) as session:
+        if cfg.output == OutputFormat.rich:
+            from .ui import BatchRenderer  # noqa: PLC0415 - rich
+
+            with BatchRenderer(
+                one_column=cfg.one_column,
+                no_color=cfg.no_color,
+                table=cfg.table,
+                inflight=lambda: session.inflight,
+                errors=session.request_errors,
+            ) as ui:
+                async for k, d in _lookups(session, cfg, _counted(_entities(cfg), ui.set_total)):
+                    ui.add(k, d)
+            return
+        with _open_output(cfg) as out:
+            n = 0
+            async for k, d in _lookups(session, cfg):
+                out.write(("\n\n---\n\n" if n else "") + _to_machine(k, d, OutputFormat.md))
+                n += 1
+            if out is sys.stdout:
+                out.write("\n")
+
+
+@contextlib.contextmanager
+def _open_binary_output(cfg: AppConfig) -> Iterator[BinaryIO]:
+    with contextlib.ExitStack() as stack:
+        raw: BinaryIO
+        if cfg.out_file:
+            raw = stack.enter_context(open(cfg.out_file, "wb"))
         else:
+            sys.stdout.flush()
+            raw = sys.stdout.buffer
+        if cfg.gzip:
+            # Closing the GzipFile writes the trailer; it leaves the underlying stream open
+            gz = stack.enter_context(gzip.GzipFile(fileobj=raw, mode="wb"))
+            raw = cast(BinaryIO, gz)
+        yield raw
+        raw.flush()
+
+
+async def _ndjson_output(cfg: AppConfig) -> None:
+    """ndjson output: one {"kind", "data"} object per line, written as each lookup completes.
+
+    The stream is flushed once NDJSON_FLUSH_RECORDS records are pending or
+    NDJSON_FLUSH_SECONDS after the first of them, also when no further result follows,
+    so a consumer reading the pipe (or a growing file) sees each result promptly while
+    the run is still going. gzip output is sync-flushed, so the compressed prefix decodes
+    too.
+    """
+    loop = asyncio.get_running_loop()
+    async with _session(cfg) as session:
+        with _open_binary_output(cfg) as out:
+            pending = 0
+            timer: asyncio.TimerHandle | None = None
+
+            def flush() -> None:
+                nonlocal pending, timer
+                if timer is not None:
+                    timer.cancel()
+                    timer = None
+                out.flush()
+                pending = 0
+
+            try:
+                async for k, d in _lookups(session, cfg):
+                    out.write(dumps_record(k, d) + b"\n")
+                    pending += 1
+                    if pending >= NDJSON_FLUSH_RECORDS:
+                        flush()
+                    elif timer is None:
+                        timer = loop.call_later(NDJSON_FLUSH_SECONDS, flush)
+            finally:
+                if timer is not None:
+                    timer.cancel()
+
+
+def _yaml_document(results: list[tuple[str, IpData | DomainData]]) -> str | None:
+    if len(results) == 1:
+        k, d = results[0]
+        return dumps_yaml({"kind": k, "data": d.model_dump()})
+    return dumps_yaml([{"kind": k, "data": d.model_dump()} for k, d in results])
+
+
+async def _columnar_output(cfg: AppConfig) -> None:
+    """csv/parquet output: results are kept column-wise until the run ends, then exported."""
+    from .columnar import ResultColumns  # noqa: PLC0415
+
+    columns = ResultColumns()
+    async with _session(cfg) as session:
+        async for k, d in _lookups(session, cfg):
+            columns.append(k, d)
+    if cfg.output == OutputFormat.parquet:
+        columns.to_parquet(cfg.out_file or "")
+        return
+    with _open_binary_output(cfg) as raw:
+        out = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+        columns.to_csv(out)
+        out.flush()
+        out.detach()
+
+
+def _emit_output(cfg: AppConfig, results: list[tuple[str, IpData | DomainData]]) -> None:
+    """json/yaml output: a single document once every lookup has finished."""
+    yaml = _yaml_document(results) if cfg.output == OutputFormat.yaml else None
+    data: bytes
+    if yaml is not None:
+        data = yaml.encode("utf-8")
+    else:
+        indent = None if cfg.compact else INDENT
+        if len(results) == 1:
             k, d = results[0]
-            obj = {"kind": k, "data": d.model_dump()}
-        if cfg.output == OutputFormat.json or yaml is None:
-            text = json.dumps(obj, indent=2, default=str)
+            data = dumps_record(k, d, indent=indent)
         else:
-            text = yaml.safe_dump(obj, sort_keys=False)
-    else:
-        chunks: list[str] = []
-        for k, d in results:
-            chunks.append(_to_machine(k, d, OutputFormat.md))
-        text = "\n\n---\n\n".join(chunks)
-    if cfg.out_file:
-        with open(cfg.out_file, "w", encoding="utf-8") as f:
-            f.write(text)
-    else:
-        print(text)
+            data = dumps_records(results, indent=indent)
+    # Bytes straight out: JSON is UTF-8 whatever the console encoding is
+    with _open_binary_output(cfg) as out:
+        out.write(data if cfg.out_file else data + b"\n")
+
+
+# `wib <command> ...` runs wib.<module>.run(args); anything else is treated as a lookup
+SUBCOMMANDS = {"update-data": "update", "build-geo": "build_geo", "serve": "serve"}
+
+
+def _subcommand(name: str) -> Callable[[list[str]], int]:
+    run: Callable[[list[str]], int] = importlib.import_module(
+        f"{__package__}.{SUBCOMMANDS[name]}"
+    ).run
+    return run
 
 
 def main(argv: list[str] | None = None) -> int:
     args = sys.argv[1:] if argv is None else argv
+    if args and args[0] in SUBCOMMANDS:
+        return _subcommand(args[0])(args[1:])
     cfg = load_config(args)
-    if not cfg.entities:
+    if not cfg.entities and not cfg.input_path:
         raise UserVisibleError("Provide at least one IP or domain")
+    if cfg.input_path and cfg.input_path != "-" and not os.path.isfile(cfg.input_path):
+        raise UserVisibleError(f"Input file not found: {cfg.input_path}")
+    if cfg.output == OutputFormat.parquet:
+        _check_parquet(cfg)
+    if cfg.gzip and cfg.output in (OutputFormat.rich, OutputFormat.parquet):
+        # Refused rather than ignored, so an --out-file ending in .gz always holds gzip
+        raise UserVisibleError(f"--gzip does not apply to {cfg.output.value} output")
+    try:
+        return _run_lookups(cfg)
+    finally:
+        if cfg.stats:
+            print(MetricsRegistry.shared().render(cfg.stats), file=sys.stderr)
+
+
+def _check_parquet(cfg: AppConfig) -> None:
+    # Fail before any lookups run rather than after
+    from .columnar import require_pyarrow  # noqa: PLC0415
+
+    if not cfg.out_file:
+        raise UserVisibleError("Parquet output needs --out-file")
+    require_pyarrow()
+
+
+def _run_lookups(cfg: AppConfig) -> int:
+    failures = MetricsRegistry.shared().counter("wib_lookup_failures_total")
     try:
-        results = asyncio.run(_collect_results(cfg))
+        if cfg.output == OutputFormat.ndjson:
+            asyncio.run(_ndjson_output(cfg))
+        elif cfg.output in (OutputFormat.csv, OutputFormat.parquet):
+            asyncio.run(_columnar_output(cfg))
+        elif cfg.output in (OutputFormat.rich, OutputFormat.md):
+            asyncio.run(_stream_output(cfg))
+        else:
+            results = asyncio.run(_collect_results(cfg))
+            _emit_output(cfg, results)
     except UserVisibleError as e:
         print(e.message)
         return 2
-    _emit_output(cfg, results)
-    return 0
+    # Some entities failed (each was reported as it came up); the rest were written
+    return 1 if MetricsRegistry.shared().counter("wib_lookup_failures_total") > failures else 0
 
 
 if __name__ == "__main__":
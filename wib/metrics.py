@@ -0,0 +1,195 @@
+"""In-process metrics: labelled counters and latency histograms.
+
+Recorded by RequestManager (per-host requests, latency, retries, timeouts, response
+cache), ResultCache (hits/misses), Port43WhoisClient (connect/read timings) and the
+handlers (per-stage entity timings). `wib --stats` prints them after a run as a text
+summary, Prometheus text exposition or JSON.
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+Labels = tuple[tuple[str, str], ...]
+
+# Seconds; +Inf is implicit
+BUCKETS: tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP: dict[str, str] = {
+    "wib_http_requests_total": "HTTP requests sent, by host and response status",
+    "wib_http_request_seconds": "HTTP request latency, by host",
+    "wib_http_retries_total": "HTTP retries, by host and reason",
+    "wib_http_timeouts_total": "HTTP requests that timed out, by host",
+    "wib_cache_requests_total": "Cache lookups, by cache, kind and result (hit/miss)",
+    "wib_port43_connect_seconds": "Port 43 WHOIS connect time, by server",
+    "wib_port43_read_seconds": "Port 43 WHOIS query/response time, by server",
+    "wib_stage_seconds": "Time spent per entity in each lookup stage",
+    "wib_lookup_failures_total": "Entities whose lookup failed (reported and skipped)",
+    "wib_serve_requests_total": "wib serve HTTP requests, by route and response status",
+    "wib_serve_request_seconds": "wib serve HTTP request handling time",
+}
+
+
+def _labels(labels: dict[str, str]) -> Labels:
+    return tuple(sorted(labels.items()))
+
+
+def _fmt_labels(labels: Labels, extra: tuple[str, str] | None = None) -> str:
+    items = [*labels, extra] if extra else list(labels)
+    if not items:
+        return ""
+    body = ",".join(
+        '{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"')) for k, v in items
+    )
+    return "{" + body + "}"
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "sum")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def merge(self, other: Histogram) -> None:
+        self.counts = [a + b for a, b in zip(self.counts, other.counts, strict=True)]
+        self.count += other.count
+        self.sum += other.sum
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (inf past the last bucket)."""
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip((*BUCKETS, float("inf")), self.counts, strict=True):
+            seen += n
+            if seen >= rank and n:
+                return bound
+        return 0.0
+
+
+class MetricsRegistry:
+    _shared: MetricsRegistry | None = None
+
+    def __init__(self) -> None:
+        self.counters: dict[str, dict[Labels, float]] = {}
+        self.histograms: dict[str, dict[Labels, Histogram]] = {}
+
+    @classmethod
+    def shared(cls) -> MetricsRegistry:
+        """Process-wide registry every component records into by default."""
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    def inc(self, name: str, value: float = 1.0, **labels: str) -> None:
+        series = self.counters.setdefault(name, {})
+        key = _labels(labels)
+        series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, seconds: float, **labels: str) -> None:
+        series = self.histograms.setdefault(name, {})
+        key = _labels(labels)
+        hist = series.get(key)
+        if hist is None:
+            hist = series[key] = Histogram()
+        hist.observe(seconds)
+
+    @contextmanager
+    def timer(self, name: str, **labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def merge(self, other: MetricsRegistry) -> None:
+        """Add another registry's series into this one (e.g. from a worker process)."""
+        for name, series in other.counters.items():
+            mine = self.counters.setdefault(name, {})
+            for key, value in series.items():
+                mine[key] = mine.get(key, 0.0) + value
+        for name, hists in other.histograms.items():
+            mine_h = self.histograms.setdefault(name, {})
+            for key, hist in hists.items():
+                mine_h.setdefault(key, Histogram()).merge(hist)
+
+    def counter(self, name: str, **labels: str) -> float:
+        """Sum of the counter over every series matching labels."""
+        want = set(labels.items())
+        return sum(v for k, v in self.counters.get(name, {}).items() if want <= set(k))
+
+    # --- export ------------------------------------------------------------------------
+
+    def to_prometheus(self) -> str:
+        lines: list[str] = []
+        for name, series in sorted(self.counters.items()):
+            lines += [f"# HELP {name} {HELP.get(name, name)}", f"# TYPE {name} counter"]
+            lines += [f"{name}{_fmt_labels(k)} {v:g}" for k, v in sorted(series.items())]
+        for name, hists in sorted(self.histograms.items()):
+            lines += [f"# HELP {name} {HELP.get(name, name)}", f"# TYPE {name} histogram"]
+            for key, hist in sorted(hists.items()):
+                cumulative = 0
+                for bound, n in zip((*BUCKETS, float("inf")), hist.counts, strict=True):
+                    cumulative += n
+                    le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                    lines.append(f"{name}_bucket{_fmt_labels(key, ('le', le))} {cumulative}")
+                lines.append(f"{name}_sum{_fmt_labels(key)} {hist.sum:.6f}")
+                lines.append(f"{name}_count{_fmt_labels(key)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def to_dict(self) -> dict[str, Any]:
+        counters = {
+            name: [{"labels": dict(k), "value": v} for k, v in sorted(series.items())]
+            for name, series in sorted(self.counters.items())
+        }
+        histograms = {
+            name: [
+                {
+                    "labels": dict(k),
+                    "count": h.count,
+                    "sum": round(h.sum, 6),
+                    "buckets": dict(zip([*map(str, BUCKETS), "+Inf"], h.counts, strict=True)),
+                }
+                for k, h in sorted(hists.items())
+            ]
+            for name, hists in sorted(self.histograms.items())
+        }
+        return {"counters": counters, "histograms": histograms}
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    def summary(self) -> str:
+        """Human-readable digest: one line per series."""
+        lines: list[str] = []
+        for name, hists in sorted(self.histograms.items()):
+            for key, h in sorted(hists.items()):
+                label = ",".join(f"{k}={v}" for k, v in key)
+                mean_ms = h.sum / h.count * 1000 if h.count else 0.0
+                lines.append(
+                    f"{name}[{label}] n={h.count} mean={mean_ms:.1f}ms "
+                    f"p50<={h.quantile(0.5):g}s p95<={h.quantile(0.95):g}s"
+                )
+        for name, series in sorted(self.counters.items()):
+            for key, v in sorted(series.items()):
+                label = ",".join(f"{k}={val}" for k, val in key)
+                lines.append(f"{name}[{label}] {v:g}")
+        return "\n".join(lines)
+
+    def render(self, fmt: str) -> str:
+        if fmt == "prometheus":
+            return self.to_prometheus()
+        if fmt == "json":
+            return self.to_json()
+        return self.summary()
@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+import threading
+from collections.abc import (
+    AsyncGenerator,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Iterable,
+    Iterator,
+)
+from contextlib import asynccontextmanager, suppress
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .models.common import DomainData, IpData
+    from .session import LookupSession
+
+Result = tuple[str, "IpData | DomainData"]
+# Called with the entity and the exception when one lookup fails
+OnError = Callable[[str, Exception], None]
+
+# Most lines handed from the reader thread to the event loop per hop (and read ahead)
+READ_BATCH = 512
+# Markers on the results queue (real results carry their input index >= 0)
+_EOF = -1
+_INPUT_ERROR = -2
+
+
+def iter_input_lines(path: str) -> Iterator[str]:
+    """Lazily yield entities from a file ("-" for stdin), one per line.
+
+    Blank lines and lines starting with "#" are skipped.
+    """
+    if path == "-":
+        yield from _clean(sys.stdin)
+        return
+    with open(path, encoding="utf-8", errors="replace") as f:
+        yield from _clean(f)
+
+
+def _clean(lines: Iterable[str]) -> Iterator[str]:
+    for line in lines:
+        s = line.strip()
+        if s and not s.startswith("#"):
+            yield s
+
+
+class _ThreadedReader:
+    """Reads a blocking iterable in a thread and hands entities over as they arrive.
+
+    Whatever has been read since the loop last looked is taken as one batch: a fast file
+    goes over in batches of up to READ_BATCH, while a slow or live feed (a pipe, a
+    terminal) has each line dispatched as soon as it is read. The thread blocks once
+    READ_BATCH entities are waiting, so it never runs far ahead of the loop.
+    """
+
+    def __init__(self, entities: Iterable[str]) -> None:
+        self._it = iter(entities)
+        self._loop = asyncio.get_running_loop()
+        self._cond = threading.Condition()
+        self._buffer: list[str] = []
+        self._ready = asyncio.Event()
+        self._eof = False
+        self._closed = False
+        self._error: Exception | None = None
+
+    def _wake(self) -> None:
+        # The loop may be gone if the run ended while this thread was blocked reading
+        with suppress(RuntimeError):
+            self._loop.call_soon_threadsafe(self._ready.set)
+
+    def _read(self) -> None:
+        try:
+            for entity in self._it:
+                with self._cond:
+                    while len(self._buffer) >= READ_BATCH and not self._closed:
+                        self._cond.wait()
+                    if self._closed:
+                        return
+                    self._buffer.append(entity)
+                    first = len(self._buffer) == 1
+                if first:
+                    self._wake()
+        except Exception as exc:
+            self._error = exc
+        finally:
+            with self._cond:
+                self._eof = True
+            self._wake()
+
+    async def batches(self) -> AsyncIterator[list[str]]:
+        # A daemon thread rather than asyncio.to_thread: one blocked on an idle stdin must
+        # not hold up the executor shutdown at the end of asyncio.run
+        threading.Thread(target=self._read, name="wib-reader", daemon=True).start()
+        try:
+            while True:
+                await self._ready.wait()
+                with self._cond:
+                    self._ready.clear()
+                    batch, self._buffer = self._buffer, []
+                    eof = self._eof
+                    self._cond.notify()
+                if batch:
+                    yield batch
+                if eof:
+                    if self._error is not None:
+                        raise self._error
+                    return
+        finally:
+            with self._cond:
+                self._closed = True
+                self._cond.notify()
+
+
+async def _one_by_one(entities: AsyncIterable[str]) -> AsyncIterator[list[str]]:
+    # An async source may be slow to produce the next entity
+    async for entity in entities:
+        yield [entity]
+
+
+def iter_batches(entities: Iterable[str] | AsyncIterable[str]) -> AsyncIterator[list[str]]:
+    """Entities in batches of at most READ_BATCH, each passed on as soon as it is read.
+
+    Must be called on the event loop that will consume the batches.
+    """
+    if isinstance(entities, AsyncIterable):
+        return _one_by_one(entities)
+    return _ThreadedReader(entities).batches()
+
+
+class _Pipeline:
+    """Queues shared by the reader, the lookup workers and the consumer."""
+
+    def __init__(self, session: LookupSession, concurrency: int, on_error: OnError | None) -> None:
+        self.session = session
+        self.on_error = on_error
+        self.todo: asyncio.Queue[tuple[int, str]] = asyncio.Queue(maxsize=concurrency)
+        self.done: asyncio.Queue[tuple[int, str, Result | Exception | None]] = asyncio.Queue()
+        # Entities read but whose result has not been handed to the consumer yet
+        self.window = asyncio.Semaphore(4 * concurrency)
+        self.total: int | None = None  # set by the reader once the input is exhausted
+
+    async def read(self, entities: Iterable[str] | AsyncIterable[str]) -> None:
+        count = 0
+        try:
+            async for batch in iter_batches(entities):
+                self.session.prefetch(batch)
+                for entity in batch:
+                    await self.window.acquire()
+                    await self.todo.put((count, entity))
+                    count += 1
+        except Exception as exc:
+            # Input errors surface to the consumer instead of stalling it
+            self.done.put_nowait((_INPUT_ERROR, "", exc))
+        self.total = count
+        self.done.put_nowait((_EOF, "", None))
+
+    async def work(self) -> None:
+        while True:
+            idx, entity = await self.todo.get()
+            try:
+                result: Result | Exception = await self.session.lookup(entity)
+            except Exception as exc:
+                result = exc
+            self.done.put_nowait((idx, entity, result))
+
+    def failed(self, entity: str, exc: Exception) -> None:
+        if self.on_error is None:
+            raise exc
+        self.on_error(entity, exc)
+
+    async def unordered(self) -> AsyncIterator[tuple[str, Result]]:
+        count = 0
+        while self.total is None or count < self.total:
+            idx, entity, item = await self.done.get()
+            if idx == _INPUT_ERROR and isinstance(item, Exception):
+                raise item
+            if idx < 0 or item is None:
+                continue
+            count += 1
+            self.window.release()
+            if isinstance(item, Exception):
+                self.failed(entity, item)
+                continue
+            yield entity, item
+
+    async def ordered(self) -> AsyncIterator[tuple[str, Result]]:
+        pending: dict[int, tuple[str, Result | Exception]] = {}
+        next_idx = 0
+        while self.total is None or next_idx < self.total:
+            if next_idx not in pending:
+                idx, entity, item = await self.done.get()
+                if idx == _INPUT_ERROR and isinstance(item, Exception):
+                    raise item
+                if idx >= 0 and item is not None:
+                    pending[idx] = (entity, item)
+                continue
+            entity, result = pending.pop(next_idx)
+            next_idx += 1
+            self.window.release()
+            if isinstance(result, Exception):
+                self.failed(entity, result)
+                continue
+            yield entity, result
+
+
+@asynccontextmanager
+async def _running(
+    session: LookupSession,
+    entities: Iterable[str] | AsyncIterable[str],
+    concurrency: int,
+    on_error: OnError | None,
+) -> AsyncIterator[_Pipeline]:
+    pipe = _Pipeline(session, concurrency, on_error)
+    tasks = [asyncio.create_task(pipe.read(entities))]
+    tasks += [asyncio.create_task(pipe.work()) for _ in range(concurrency)]
+    try:
+        yield pipe
+    finally:
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with suppress(asyncio.CancelledError):
+                await task
+
+
+async def iter_lookups(
+    session: LookupSession,
+    entities: Iterable[str] | AsyncIterable[str],
+    *,
+    concurrency: int,
+    ordered: bool = True,
+    on_error: OnError | None = None,
+) -> AsyncGenerator[Result, None]:
+    """Look up entities with bounded concurrency, yielding results in input order.
+
+    Reading (in a worker thread, so a slow stdin never blocks the loop; async iterables
+    are consumed on the loop), lookups and the consumer overlap. At most `concurrency`
+    lookups run at once, and at most 4 * concurrency entities are read ahead of the next
+    result to be yielded. This bounds memory regardless of input size, even when one
+    slow lookup holds back the results queued behind it.
+
+    When a lookup fails, on_error(entity, exc) is called in that entity's turn to be
+    yielded and the stream goes on with the next one; without on_error the exception is
+    raised from the iterator instead.
+
+    With ordered=False results are yielded as soon as each lookup finishes, so one slow
+    entity never delays the others.
+    """
+    async with _running(session, entities, concurrency, on_error) as pipe:
+        async for _, result in pipe.ordered() if ordered else pipe.unordered():
+            yield result
+
+
+async def iter_entity_lookups(
+    session: LookupSession,
+    entities: Iterable[str] | AsyncIterable[str],
+    *,
+    concurrency: int,
+    ordered: bool = True,
+    on_error: OnError | None = None,
+) -> AsyncGenerator[tuple[str, Result], None]:
+    """iter_lookups, yielding (entity, result) so results can be matched to their input."""
+    async with _running(session, entities, concurrency, on_error) as pipe:
+        async for pair in pipe.ordered() if ordered else pipe.unordered():
+            yield pair
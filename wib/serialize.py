@@ -0,0 +1,77 @@
+"""JSON and YAML encoding of lookup results.
+
+JSON is written straight from the pydantic models: pydantic-core serializes each model
+in one native pass, where model_dump() + json.dumps(default=str) first builds a dict
+tree and then walks it again in Python. Datetimes come out as ISO 8601. YAML goes
+through libyaml's CSafeDumper when PyYAML was built with it. benchmarks/bench_serialize.py
+compares these paths.
+"""
+
+from __future__ import annotations
+
+import importlib
+import json
+from collections.abc import Sequence
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from pydantic import BaseModel
+
+INDENT = 2
+
+
+def _model_json(data: BaseModel, indent: int | None, depth: int) -> bytes:
+    raw = data.__pydantic_serializer__.to_json(data, indent=indent)
+    if not indent or not depth:
+        return raw
+    # Raw newlines only occur between tokens (inside strings they are escaped as \n),
+    # so shifting every line nests the model's own indented output `depth` levels deep.
+    return raw.replace(b"\n", b"\n" + b" " * (indent * depth))
+
+
+def _record(kind: str, data: BaseModel, indent: int | None, depth: int) -> bytes:
+    kind_json = json.dumps(kind).encode()
+    if not indent:
+        return b'{"kind":' + kind_json + b',"data":' + _model_json(data, None, 0) + b"}"
+    pad = b" " * (indent * depth)
+    inner = pad + b" " * indent
+    return (
+        b"{\n"
+        + inner
+        + b'"kind": '
+        + kind_json
+        + b",\n"
+        + inner
+        + b'"data": '
+        + _model_json(data, indent, depth + 1)
+        + b"\n"
+        + pad
+        + b"}"
+    )
+
+
+def dumps_record(kind: str, data: BaseModel, *, indent: int | None = None) -> bytes:
+    """One {"kind", "data"} object as JSON; compact unless indent is given."""
+    return _record(kind, data, indent, 0)
+
+
+def dumps_records(results: Sequence[tuple[str, BaseModel]], *, indent: int | None = None) -> bytes:
+    """A JSON array of {"kind", "data"} objects; compact unless indent is given."""
+    if not indent:
+        return b"[" + b",".join(_record(k, d, None, 0) for k, d in results) + b"]"
+    if not results:
+        return b"[]"
+    pad = b" " * indent
+    body = b",\n".join(pad + _record(k, d, indent, 1) for k, d in results)
+    return b"[\n" + body + b"\n]"
+
+
+def dumps_yaml(obj: Any) -> str | None:
+    """YAML via libyaml when available; None if PyYAML is not installed."""
+    try:
+        yaml = importlib.import_module("yaml")
+    except Exception:  # pragma: no cover
+        return None
+    dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+    text: str = yaml.dump(obj, Dumper=dumper, sort_keys=False)
+    return text
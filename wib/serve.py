@@ -0,0 +1,324 @@
+"""`wib serve`: a long-running HTTP API over one LookupSession.
+
+Every request goes through the same handlers, RequestManager connection pools and
+result caches, so an indicator looked up before is answered from memory or the local
+SQLite cache without starting a process or opening a connection:
+
+    GET  /ip/{ip}            one {"kind", "data"} record
+    GET  /domain/{domain}    one {"kind", "data"} record
+    POST /lookup             JSON list of entities (or {"entities": [...]}); a JSON array
+                             of records in input order, {"entity", "error"} for failures
+    GET  /healthz            lookups in flight and queued
+    GET  /metrics            the metrics registry in Prometheus text format
+
+At most --max-inflight lookups run at once across all requests, and up to --max-queue
+more wait for a slot; past that requests are refused with 503 and Retry-After rather
+than queued without bound. The HTTP/1.1 handling is deliberately minimal: keep-alive,
+Content-Length bodies, no chunked uploads or TLS (put a reverse proxy in front for that).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import json
+import signal
+import sys
+import time
+from dataclasses import dataclass
+from http import HTTPStatus
+from typing import Any
+from urllib.parse import unquote, urlsplit
+
+from .config import AppConfig, load_config
+from .metrics import MetricsRegistry
+from .pipeline import Result
+from .serialize import dumps_record
+from .session import LookupSession
+from .utils import UserVisibleError, normalize_host_input
+
+JSON = "application/json"
+MAX_HEADERS = 100
+MAX_BODY_BYTES = 1 << 20
+IDLE_TIMEOUT = 30.0  # seconds a keep-alive connection may sit between requests
+RETRY_AFTER_SECONDS = 1
+
+
+class _HttpError(Exception):
+    def __init__(self, status: HTTPStatus, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+@dataclass(frozen=True)
+class _Request:
+    method: str
+    target: str
+    body: bytes
+    keep_alive: bool
+
+
+@dataclass(frozen=True)
+class Reply:
+    status: HTTPStatus
+    body: bytes
+    content_type: str = JSON
+    headers: tuple[tuple[str, str], ...] = ()
+
+    def encode(self, *, keep_alive: bool) -> bytes:
+        lines = [
+            f"HTTP/1.1 {self.status.value} {self.status.phrase}",
+            f"Content-Type: {self.content_type}",
+            f"Content-Length: {len(self.body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+            *(f"{name}: {value}" for name, value in self.headers),
+        ]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + self.body
+
+
+def _json_reply(status: HTTPStatus, obj: Any) -> Reply:
+    return Reply(status, json.dumps(obj, ensure_ascii=False).encode())
+
+
+def _error(status: HTTPStatus, message: str) -> Reply:
+    return _json_reply(status, {"error": message})
+
+
+async def _read_request(reader: asyncio.StreamReader) -> _Request | None:
+    """Parse one request; None when the client closed the connection between requests."""
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, version = line.decode("latin-1").split()
+    except ValueError:
+        raise _HttpError(HTTPStatus.BAD_REQUEST, "Malformed request line") from None
+    headers: dict[str, str] = {}
+    while (header := await reader.readline()) not in (b"\r\n", b"\n", b""):
+        if len(headers) >= MAX_HEADERS:
+            raise _HttpError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Too many headers")
+        name, _, value = header.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        raise _HttpError(HTTPStatus.LENGTH_REQUIRED, "Send the body with Content-Length")
+    try:
+        length = int(headers.get("content-length", "0"))
+    except ValueError:
+        raise _HttpError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length") from None
+    if length > MAX_BODY_BYTES:
+        raise _HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large")
+    body = await reader.readexactly(length) if length > 0 else b""
+    connection = headers.get("connection", "").lower()
+    keep_alive = connection != "close" and (version == "HTTP/1.1" or connection == "keep-alive")
+    return _Request(method.upper(), target, body, keep_alive)
+
+
+class LookupServer:
+    """Routes HTTP requests to a shared LookupSession with bounded concurrency and queueing."""
+
+    def __init__(
+        self, session: LookupSession, *, max_inflight: int, max_queue: int, max_batch: int
+    ) -> None:
+        self.session = session
+        self.max_inflight = max_inflight
+        self.max_queue = max_queue
+        self.max_batch = max_batch
+        self.pending = 0  # admitted lookups: running plus waiting for a slot
+        self._slots = asyncio.Semaphore(max_inflight)
+        self._connections: set[asyncio.StreamWriter] = set()
+
+    @property
+    def metrics(self) -> MetricsRegistry:
+        return self.session.rm.metrics
+
+    # --- connections -------------------------------------------------------------------
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """asyncio.start_server callback: serve requests until the client goes away."""
+        self._connections.add(writer)
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(_read_request(reader), IDLE_TIMEOUT)
+                except _HttpError as e:
+                    writer.write(_error(e.status, e.message).encode(keep_alive=False))
+                    await writer.drain()
+                    break
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+                    # Idle keep-alive, truncated request or a line over the stream limit
+                    break
+                if request is None:
+                    break
+                reply = await self.respond(request.method, request.target, request.body)
+                writer.write(reply.encode(keep_alive=request.keep_alive))
+                await writer.drain()
+                if not request.keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    def close_connections(self) -> None:
+        for writer in list(self._connections):
+            writer.close()
+
+    # --- routing -----------------------------------------------------------------------
+
+    async def respond(self, method: str, target: str, body: bytes = b"") -> Reply:
+        started = time.perf_counter()
+        parts = urlsplit(target).path.strip("/").split("/", 1)
+        route = parts[0] if parts[0] in ("ip", "domain", "lookup", "healthz", "metrics") else ""
+        reply = await self._route(method, route, unquote(parts[1]) if len(parts) > 1 else "", body)
+        self.metrics.inc(
+            "wib_serve_requests_total", route=route or "other", status=str(reply.status.value)
+        )
+        self.metrics.observe("wib_serve_request_seconds", time.perf_counter() - started)
+        return reply
+
+    async def _route(self, method: str, route: str, arg: str, body: bytes) -> Reply:
+        expected = "POST" if route == "lookup" else "GET"
+        if not route or (route in ("healthz", "metrics", "lookup")) != (not arg):
+            return _error(HTTPStatus.NOT_FOUND, "Not found")
+        if method != expected:
+            return Reply(
+                HTTPStatus.METHOD_NOT_ALLOWED,
+                json.dumps({"error": f"Use {expected}"}).encode(),
+                headers=(("Allow", expected),),
+            )
+        if route == "healthz":
+            return _json_reply(
+                HTTPStatus.OK,
+                {"status": "ok", "inflight": self.session.inflight, "pending": self.pending},
+            )
+        if route == "metrics":
+            body = self.metrics.to_prometheus().encode()
+            return Reply(HTTPStatus.OK, body, "text/plain; version=0.0.4")
+        if route == "lookup":
+            return await self._batch(body)
+        return await self._single(route, arg)
+
+    # --- lookups -----------------------------------------------------------------------
+
+    def _admit(self, n: int) -> bool:
+        if self.pending + n > self.max_inflight + self.max_queue:
+            return False
+        self.pending += n
+        return True
+
+    async def _lookup(self, entity: str) -> Result | str:
+        """The lookup result, or an error message; releases one admitted slot."""
+        try:
+            async with self._slots:
+                return await self.session.lookup(entity)
+        except ValueError as e:
+            return str(e)
+        except Exception as e:
+            return f"Lookup failed: {e.__class__.__name__}: {e}"
+        finally:
+            self.pending -= 1
+
+    async def _single(self, route: str, entity: str) -> Reply:
+        try:
+            kind, value = normalize_host_input(entity)
+        except ValueError as e:
+            return _error(HTTPStatus.BAD_REQUEST, str(e))
+        if kind != route:
+            return _error(HTTPStatus.BAD_REQUEST, f"{entity} is not a valid {route} (try /{kind}/)")
+        if not self._admit(1):
+            return _busy()
+        result = await self._lookup(value)
+        if isinstance(result, str):
+            return _error(HTTPStatus.BAD_GATEWAY, result)
+        return Reply(HTTPStatus.OK, dumps_record(*result))
+
+    async def _batch(self, body: bytes) -> Reply:
+        try:
+            payload = json.loads(body or b"null")
+        except ValueError:
+            return _error(HTTPStatus.BAD_REQUEST, "Body is not valid JSON")
+        entities = payload.get("entities") if isinstance(payload, dict) else payload
+        if not isinstance(entities, list) or not all(isinstance(e, str) for e in entities):
+            return _error(
+                HTTPStatus.BAD_REQUEST, 'Send a JSON list of strings or {"entities": [...]}'
+            )
+        if len(entities) > self.max_batch:
+            return _error(
+                HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"At most {self.max_batch} entities per batch"
+            )
+        if not self._admit(len(entities)):
+            return _busy()
+        results = await asyncio.gather(*(self._lookup(e) for e in entities))
+        records = [
+            (
+                json.dumps({"entity": entity, "error": result}, ensure_ascii=False).encode()
+                if isinstance(result, str)
+                else dumps_record(*result)
+            )
+            for entity, result in zip(entities, results, strict=True)
+        ]
+        return Reply(HTTPStatus.OK, b"[" + b",".join(records) + b"]")
+
+
+def _busy() -> Reply:
+    return Reply(
+        HTTPStatus.SERVICE_UNAVAILABLE,
+        b'{"error": "Too many lookups queued, retry later"}',
+        headers=(("Retry-After", str(RETRY_AFTER_SECONDS)),),
+    )
+
+
+async def serve(cfg: AppConfig, *, host: str, port: int, limits: dict[str, int]) -> None:
+    """Serve until SIGINT/SIGTERM, then close connections and the session."""
+    async with LookupSession(cfg) as session:
+        server = LookupServer(session, **limits)
+        listener = await asyncio.start_server(server.handle, host, port)
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            with contextlib.suppress(NotImplementedError):  # Windows
+                loop.add_signal_handler(sig, stop.set)
+        bound = ", ".join(str(s.getsockname()[:2]) for s in listener.sockets)
+        print(f"wib serve: listening on {bound}", file=sys.stderr)
+        async with listener:
+            await stop.wait()
+            listener.close()
+            server.close_connections()
+
+
+def run(argv: list[str]) -> int:
+    p = argparse.ArgumentParser(
+        prog="wib serve",
+        description=(
+            "Serve lookups over HTTP with warm caches and connection pools; "
+            "other wib lookup options (--dns, --geo-service, --timeout, ...) apply"
+        ),
+    )
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8080)
+    p.add_argument(
+        "--max-inflight", type=int, default=32, help="Lookups running at once (default: 32)"
+    )
+    p.add_argument(
+        "--max-queue",
+        type=int,
+        default=1000,
+        help="Lookups waiting for a slot before requests get 503 (default: 1000)",
+    )
+    p.add_argument("--max-batch", type=int, default=1000, help="Entities per POST /lookup")
+    ns, rest = p.parse_known_args(argv)
+    cfg = load_config(rest)
+    if cfg.entities or cfg.input_path:
+        raise UserVisibleError("wib serve takes no entities; send them as HTTP requests")
+    limits = {
+        "max_inflight": max(1, int(ns.max_inflight)),
+        "max_queue": max(0, int(ns.max_queue)),
+        "max_batch": max(1, int(ns.max_batch)),
+    }
+    asyncio.run(serve(cfg, host=ns.host, port=int(ns.port), limits=limits))
+    return 0
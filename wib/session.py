@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import sqlite3
+from collections.abc import Iterable
+from dataclasses import replace
+from http import HTTPStatus
+from types import TracebackType
+
+from .cache import ResultCache
+from .clients import BatchGeoClient, DnsClient, Ip2LocationClient, IpinfoClient
+from .clients.offline_geo import GeoTableError, OfflineGeoClient
+from .config import AppConfig, GeoService
+from .handlers import DomainHandler, IpAddressHandler
+from .http.ratelimit import RateLimit
+from .http.request import RequestManager, RequestSettings
+from .models.common import DomainData, IpData
+from .utils import UserVisibleError, normalize_host_input
+
+
+class LookupSession:
+    """Handlers and one HTTP connection pool shared by every lookup in a run.
+
+    Building the handlers once means all entities go through the same
+    RequestManager: its per-host semaphores apply across the whole batch and
+    keep-alive connections (HTTP/2 when available) are reused between entities.
+    """
+
+    def __init__(self, cfg: AppConfig, *, settings: RequestSettings | None = None) -> None:
+        self.cfg = cfg
+        self.inflight = 0  # lookups started and not finished
+        # Checked first: a missing table or key fails before any resource needs closing
+        self.offline_geo = self._open_offline_geo(cfg)
+        geo_key = self._batch_geo_key(cfg)
+        self.rm = RequestManager(settings or self.request_settings(cfg))
+        self.cache = self._open_cache(cfg)
+        self.ip_handler = IpAddressHandler(
+            timeout=cfg.timeout,
+            rm=self.rm,
+            # Local table lookups are cheaper than the result cache
+            cache=None if self.offline_geo else self.cache,
+            geo=self.offline_geo or self._batch_geo(geo_key),
+        )
+        self.domain_handler = DomainHandler(
+            timeout=cfg.timeout,
+            ip2whois_key=cfg.keys.IP2WHOIS_API_KEY or None,
+            rm=self.rm,
+            cache=self.cache,
+            dns=DnsClient(self.rm, endpoint=cfg.doh_url, wire=cfg.doh_wire),
+            hedge_delay=cfg.hedge_delay,
+        )
+
+    @classmethod
+    def check_config(cls, cfg: AppConfig) -> None:
+        """Raise the UserVisibleError building a session for cfg would, without building one."""
+        offline_geo = cls._open_offline_geo(cfg)
+        if offline_geo is not None:
+            offline_geo.close()
+        cls._batch_geo_key(cfg)
+
+    @staticmethod
+    def request_settings(cfg: AppConfig) -> RequestSettings:
+        settings = RequestSettings(timeout=cfg.timeout)
+        limits = settings.rate_limits
+        for host, (rate, burst) in cfg.rate_limits.items():
+            base = limits.get(host) or RateLimit(rate=rate)
+            limits[host] = replace(base, rate=rate, burst=burst)
+        for host, (count, period) in cfg.quotas.items():
+            # A quota alone leaves the host's rate unlimited unless one is configured
+            base = limits.get(host) or RateLimit(rate=float("inf"))
+            limits[host] = replace(base, quota=count, quota_period=period)
+        return settings
+
+    @staticmethod
+    def _open_cache(cfg: AppConfig) -> ResultCache | None:
+        if cfg.no_cache:
+            return None
+        try:
+            return ResultCache(max_entries=cfg.cache_max_entries, refresh=cfg.refresh)
+        except (OSError, sqlite3.Error):
+            # Unwritable cache dir or corrupt database: run uncached rather than fail.
+            return None
+
+    @staticmethod
+    def _open_offline_geo(cfg: AppConfig) -> OfflineGeoClient | None:
+        if cfg.geo_service != GeoService.offline:
+            return None
+        try:
+            return OfflineGeoClient.open(cfg.geo_db)
+        except GeoTableError as e:
+            raise UserVisibleError(f"{e}; build one with `wib build-geo <dataset>`") from e
+
+    @staticmethod
+    def _batch_geo_key(cfg: AppConfig) -> str | None:
+        """API key for a batching geo service; raises if the selected service has none."""
+        env = {
+            GeoService.ipinfo: ("IPINFO_API_KEY", cfg.keys.IPINFO_API_KEY),
+            GeoService.ip2location: ("IP2LOCATION_API_KEY", cfg.keys.IP2LOCATION_API_KEY),
+        }.get(cfg.geo_service)
+        if env is None:
+            return None
+        if not env[1]:
+            raise UserVisibleError(f"--geo-service {cfg.geo_service.value} needs {env[0]}")
+        return env[1]
+
+    def _batch_geo(self, key: str | None) -> BatchGeoClient | None:
+        if key is None:
+            return None
+        if self.cfg.geo_service == GeoService.ipinfo:
+            return IpinfoClient(self.rm, key)
+        return Ip2LocationClient(self.rm, key)
+
+    def prefetch(self, entities: Iterable[str]) -> None:
+        """Hint upcoming entities so batching clients can group them into one request."""
+        if not isinstance(self.ip_handler.geo, BatchGeoClient):
+            # Nothing to batch: don't normalize every entity twice
+            return
+        ips = []
+        for entity in entities:
+            try:
+                kind, value = normalize_host_input(entity)
+            except ValueError:
+                continue
+            if kind == "ip":
+                ips.append(value)
+        if ips:
+            self.ip_handler.prefetch(ips)
+
+    async def lookup(self, entity: str) -> tuple[str, IpData | DomainData]:
+        kind, value = normalize_host_input(entity)
+        self.inflight += 1
+        try:
+            with self.rm.metrics.timer("wib_stage_seconds", stage=f"{kind}_lookup"):
+                if kind == "ip":
+                    return kind, await self.ip_handler.fetch(value)
+                return kind, await self.domain_handler.fetch(value, include_dns=self.cfg.show_dns)
+        finally:
+            self.inflight -= 1
+
+    def request_errors(self) -> int:
+        """Source requests that failed so far: transport errors, timeouts and 5xx."""
+        errors = 0
+        for labels, n in self.rm.metrics.counters.get("wib_http_requests_total", {}).items():
+            status = dict(labels)["status"]
+            if not status.isdigit() or int(status) >= HTTPStatus.INTERNAL_SERVER_ERROR:
+                errors += int(n)
+        return errors
+
+    async def aclose(self) -> None:
+        await self.ip_handler.aclose()
+        await self.domain_handler.aclose()
+        await self.rm.aclose()
+        if self.offline_geo is not None:
+            self.offline_geo.close()
+        if self.cache is not None:
+            self.cache.close()
+
+    async def __aenter__(self) -> LookupSession:
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        await self.aclose()
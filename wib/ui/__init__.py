@@ -1,3 +1,4 @@
-from .render import render_domain, render_ip
+from .batch import BatchRenderer
+from .render import domain_panels, ip_panels, render_domain, render_ip
 
-__all__ = ["render_domain", "render_ip"]
+__all__ = ["BatchRenderer", "domain_panels", "ip_panels", "render_domain", "render_ip"]
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from types import TracebackType
+
+from rich import box
+from rich.console import Console
+from rich.progress import (
+    BarColumn,
+    MofNCompleteColumn,
+    Progress,
+    ProgressColumn,
+    Task,
+    TextColumn,
+    TimeRemainingColumn,
+)
+from rich.table import Table
+from rich.text import Text
+
+from ..models.common import DomainData, IpData
+from .render import render_domain, render_ip
+
+
+class _CounterColumn(ProgressColumn):
+    """Renders a live count read from a callable at every refresh."""
+
+    def __init__(self, label: str, read: Callable[[], int]) -> None:
+        super().__init__()
+        self.label = label
+        self.read = read
+
+    def render(self, task: Task) -> Text:
+        return Text(f"{self.read()} {self.label}", style="progress.download")
+
+
+class _RateColumn(ProgressColumn):
+    def render(self, task: Task) -> Text:
+        speed = task.finished_speed or task.speed
+        return Text("-/s" if speed is None else f"{speed:.1f}/s", style="progress.data.speed")
+
+
+def _no_activity() -> int:
+    return 0
+
+
+def _dash(value: object) -> str:
+    return "-" if value is None or value == "" else str(value)
+
+
+# Table view: (header, max width); values are cut with an ellipsis rather than wrapped
+_TABLE_COLUMNS = (
+    ("Entity", 32),
+    ("ASN", 10),
+    ("Org / Registrar", 28),
+    ("Location", 22),
+    ("Created", 10),
+    ("Expires", 10),
+    ("Nameservers / Reverse", 36),
+)
+_ONE_COLUMN_TABLE = (("Entity", 40), ("Summary", 80))
+_CELL_PADDING = 2  # one space either side of a cell
+_MIN_CELL = 4
+
+
+def _table_cells(kind: str, data: IpData | DomainData) -> tuple[str, ...]:
+    if isinstance(data, IpData):
+        g = data.geo
+        if g is None:
+            return (data.ip, "-", "-", "-", "-", "-", "-")
+        place = ", ".join(p for p in (g.city, g.country) if p)
+        return (
+            data.ip,
+            _dash(g.asn),
+            _dash(g.org or g.isp),
+            _dash(place),
+            "-",
+            "-",
+            _dash(g.domain),
+        )
+    w = data.whois
+    if w is None:
+        return (data.domain, "-", "-", "-", "-", "-", "-")
+    return (
+        data.domain,
+        "-",
+        _dash(w.registrar),
+        "-",
+        w.created.date().isoformat() if w.created else "-",
+        w.expires.date().isoformat() if w.expires else "-",
+        _dash(", ".join(w.nameservers or [])),
+    )
+
+
+class BatchRenderer:
+    """Rich output for a whole run on one Console.
+
+    Results are printed as they arrive, as panels or (table=True) one table row per
+    entity, above a live progress line: done/total, in-flight lookups, failed source
+    requests, throughput and ETA. Without a total (not known until the input has been
+    read, see set_total) the bar pulses and there is no ETA. The progress line is only
+    drawn on a terminal, and is removed when the run ends.
+
+    With one_column, panels stack vertically and the table is reduced to entity and
+    summary.
+    """
+
+    def __init__(  # noqa: PLR0913 - keyword-only options
+        self,
+        *,
+        one_column: bool = False,
+        no_color: bool = False,
+        table: bool = False,
+        total: int | None = None,
+        inflight: Callable[[], int] = _no_activity,
+        errors: Callable[[], int] = _no_activity,
+        console: Console | None = None,
+    ) -> None:
+        self.console = console or Console(color_system=None if no_color else "auto")
+        self.one_column = one_column
+        self.table = table
+        self._header_printed = False
+        # Rows are printed one at a time, so every column gets a fixed width (scaled down
+        # to fit the console) to keep them aligned with the header
+        columns = _ONE_COLUMN_TABLE if one_column else _TABLE_COLUMNS
+        room = self.console.width - _CELL_PADDING * len(columns)
+        scale = min(1.0, room / sum(width for _, width in columns))
+        self._columns = [(title, max(_MIN_CELL, int(width * scale))) for title, width in columns]
+        self.progress = Progress(
+            TextColumn("[progress.description]{task.description}"),
+            BarColumn(),
+            MofNCompleteColumn(),
+            _CounterColumn("in flight", inflight),
+            _CounterColumn("errors", errors),
+            _RateColumn(),
+            TimeRemainingColumn(),
+            console=self.console,
+            transient=True,
+            disable=not self.console.is_terminal,
+        )
+        self._task = self.progress.add_task("lookups", total=total)
+
+    def __enter__(self) -> BatchRenderer:
+        self.progress.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.progress.stop()
+
+    def set_total(self, total: int) -> None:
+        """Set the number of entities once known; safe to call from the input thread."""
+        self.progress.update(self._task, total=total)
+
+    def add(self, kind: str, data: IpData | DomainData) -> None:
+        if self.table:
+            self._print_row(kind, data)
+        elif isinstance(data, IpData):
+            render_ip(data, one_column=self.one_column, console=self.console)
+        else:
+            render_domain(data, one_column=self.one_column, console=self.console)
+        self.progress.advance(self._task)
+
+    def _row_table(self, *, header: bool) -> Table:
+        table = Table(box=box.SIMPLE_HEAD if header else None, show_header=header, pad_edge=False)
+        for title, width in self._columns:
+            table.add_column(title, width=width, no_wrap=True, overflow="ellipsis")
+        return table
+
+    def _print_row(self, kind: str, data: IpData | DomainData) -> None:
+        if not self._header_printed:
+            self.console.print(self._row_table(header=True))
+            self._header_printed = True
+        cells = _table_cells(kind, data)
+        table = self._row_table(header=False)
+        if self.one_column:
+            table.add_row(cells[0], " | ".join(c for c in cells[1:] if c != "-") or "-")
+        else:
+            table.add_row(*cells)
+        self.console.print(table)
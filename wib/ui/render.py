@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+import functools
+
 from rich import box
+from rich.columns import Columns
 from rich.console import Console
-from rich.layout import Layout
 from rich.panel import Panel
 from rich.table import Table
 
@@ -77,23 +79,37 @@ def _dns_panel(dns: DomainDns) -> Panel:
     return Panel(table, title="DNS", box=box.ROUNDED)
 
 
-def render_ip(data: IpData, *, one_column: bool, no_color: bool = False) -> None:
-    console = Console(color_system=None if no_color else "auto")
-    layout = Layout()
-    layout.split_row(Layout(name="left"), Layout(name="right"))
-    left_panels = [_ip_panel(data)]
-    panels = left_panels
-    for p in panels:
-        console.print(p)
+def ip_panels(data: IpData) -> list[Panel]:
+    return [_ip_panel(data)]
 
 
-def render_domain(data: DomainData, *, one_column: bool, no_color: bool = False) -> None:
-    console = Console(color_system=None if no_color else "auto")
-    layout = Layout()
-    layout.split_row(Layout(name="left"), Layout(name="right"))
-    left_panels = [_whois_panel(data)]
+def domain_panels(data: DomainData) -> list[Panel]:
+    panels = [_whois_panel(data)]
     if data.dns:
-        left_panels.append(_dns_panel(data.dns))
-    panels = left_panels
-    for p in panels:
+        panels.append(_dns_panel(data.dns))
+    return panels
+
+
+@functools.lru_cache(maxsize=2)
+def _console(no_color: bool) -> Console:
+    return Console(color_system=None if no_color else "auto")
+
+
+def render_ip(
+    data: IpData, *, one_column: bool, no_color: bool = False, console: Console | None = None
+) -> None:
+    console = console or _console(no_color)
+    for p in ip_panels(data):
         console.print(p)
+
+
+def render_domain(
+    data: DomainData, *, one_column: bool, no_color: bool = False, console: Console | None = None
+) -> None:
+    console = console or _console(no_color)
+    panels = domain_panels(data)
+    if one_column or len(panels) == 1:
+        for p in panels:
+            console.print(p)
+    else:
+        console.print(Columns(panels, equal=True, expand=True))
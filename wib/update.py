@@ -0,0 +1,81 @@
+"""`wib update-data`: refresh the lookup tables wib keeps under the user cache dir."""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from http import HTTPStatus
+
+from .clients.rdap_bootstrap import RdapBootstrap
+from .clients.whois import Port43WhoisClient
+from .clients.whois_servers import WhoisServerTable
+from .http.request import RequestManager, RequestSettings
+from .utils.psl import PublicSuffixList
+
+TLD_LIST_URL = "https://data.iana.org/TLD/tlds-alpha-by-domain.txt"
+
+
+async def _refresh_whois_servers(rm: RequestManager, *, timeout: float, concurrency: int) -> str:
+    resp = await rm.get(TLD_LIST_URL)
+    if resp.status_code != HTTPStatus.OK:
+        return f"whois servers: could not fetch TLD list (HTTP {resp.status_code})"
+    tlds = [
+        line.strip().lower()
+        for line in resp.text.splitlines()
+        if line.strip() and not line.startswith("#")
+    ]
+    table = WhoisServerTable.shared()
+    client = Port43WhoisClient(timeout=timeout, servers=table)
+    sem = asyncio.Semaphore(concurrency)
+
+    async def refresh(tld: str) -> bool:
+        async with sem:
+            server = await client.query_iana(tld)
+        if server is None:
+            return False
+        table.set(tld, server, save=False)
+        return True
+
+    done = await asyncio.gather(*(refresh(t) for t in tlds))
+    table.save()
+    return f"whois servers: {sum(done)}/{len(tlds)} TLDs refreshed -> {table.path}"
+
+
+async def _refresh_rdap_bootstrap(rm: RequestManager) -> str:
+    bootstrap = RdapBootstrap.shared()
+    if not await bootstrap.refresh(rm):
+        return f"rdap bootstrap: could not fetch {bootstrap.URL}"
+    return f"rdap bootstrap: refreshed -> {bootstrap.path}"
+
+
+async def _refresh_public_suffixes(rm: RequestManager) -> str:
+    psl = PublicSuffixList.shared()
+    resp = await rm.get(psl.URL)
+    if resp.status_code != HTTPStatus.OK or not psl.store(resp.text):
+        return f"public suffix list: could not fetch {psl.URL}"
+    return f"public suffix list: refreshed -> {psl.path}"
+
+
+async def _update(timeout: float, concurrency: int) -> list[str]:
+    rm = RequestManager(RequestSettings(timeout=timeout))
+    try:
+        return [
+            await _refresh_rdap_bootstrap(rm),
+            await _refresh_public_suffixes(rm),
+            await _refresh_whois_servers(rm, timeout=timeout, concurrency=concurrency),
+        ]
+    finally:
+        await rm.aclose()
+
+
+def run(argv: list[str]) -> int:
+    p = argparse.ArgumentParser(
+        prog="wib update-data",
+        description="Refresh cached registry data (RDAP bootstrap, public suffixes, WHOIS servers)",
+    )
+    p.add_argument("--timeout", type=float, default=10.0)
+    p.add_argument("--concurrency", type=int, default=16, help="Parallel IANA queries")
+    ns = p.parse_args(argv)
+    for line in asyncio.run(_update(float(ns.timeout), max(1, int(ns.concurrency)))):
+        print(line)
+    return 0
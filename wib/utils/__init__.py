@@ -1,5 +1,7 @@
 from .defang import defang, refang
 from .errors import UserVisibleError
+from .paths import cache_dir
+from .psl import PublicSuffixList, registrable_domain
 from .validators import is_domain, is_ip, normalize_host_input
 
 __all__ = [
@@ -9,4 +11,7 @@ __all__ = [
     "is_domain",
     "normalize_host_input",
     "UserVisibleError",
+    "cache_dir",
+    "PublicSuffixList",
+    "registrable_domain",
 ]
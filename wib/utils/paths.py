@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import contextlib
+import os
+import sys
+from collections.abc import Iterator
+from pathlib import Path
+from typing import BinaryIO
+
+
+def cache_dir() -> Path:
+    """Per-user directory for wib's persistent caches and downloaded data.
+
+    WIB_CACHE_DIR wins; otherwise %LOCALAPPDATA%\\wib on Windows and
+    $XDG_CACHE_HOME/wib (default ~/.cache/wib) elsewhere. The directory is not
+    created here; writers create it on demand.
+    """
+    override = os.environ.get("WIB_CACHE_DIR")
+    if override:
+        return Path(override).expanduser()
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA")
+        if base:
+            return Path(base) / "wib"
+    xdg = os.environ.get("XDG_CACHE_HOME")
+    return (Path(xdg) if xdg else Path.home() / ".cache") / "wib"
+
+
+@contextlib.contextmanager
+def atomic_open(path: Path) -> Iterator[BinaryIO]:
+    """Open path for writing in binary mode, replacing it only once the file is complete.
+
+    Data goes to a hidden temporary file beside path that is renamed over it on success
+    (and removed on failure), so concurrent wib processes never read a torn file. The
+    parent directory is created if needed; OSError is left to the caller.
+    """
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        with open(tmp, "wb") as f:
+            yield f
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            tmp.unlink()
+        raise
+
+
+def atomic_write_text(path: Path, text: str) -> None:
+    """Replace path with UTF-8 text, atomically (see atomic_open)."""
+    with atomic_open(path) as f:
+        f.write(text.encode("utf-8"))
@@ -0,0 +1,135 @@
+"""Public Suffix List lookups: FQDN -> registrable domain (eTLD+1).
+
+Only the ICANN section of the list is used: private suffixes such as github.io are
+hosting platforms, not registries, so WHOIS for foo.github.io belongs to github.io.
+"""
+
+from __future__ import annotations
+
+from importlib import resources
+from pathlib import Path
+from typing import Any
+
+from .paths import atomic_write_text, cache_dir
+
+# Trie node: child label -> node; _RULE marks where a rule ends
+Node = dict[str, Any]
+
+_RULE = "\0"
+_NORMAL = 1
+_EXCEPTION = 0
+_WILDCARD = "*"
+_ICANN_END = "// ===END ICANN DOMAINS==="
+
+
+def _ascii(label: str) -> str | None:
+    if label.isascii():
+        return label
+    try:
+        return label.encode("idna").decode("ascii")
+    except UnicodeError:
+        return None
+
+
+def compile_rules(text: str) -> Node:
+    """Build the suffix trie (labels right to left) from public_suffix_list.dat text."""
+    root: Node = {}
+    for raw in text.splitlines():
+        line = raw.strip()
+        if line.startswith(_ICANN_END):
+            break
+        if not line or line.startswith("//"):
+            continue
+        rule = line.split()[0].lower()
+        kind = _NORMAL
+        if rule.startswith("!"):
+            kind, rule = _EXCEPTION, rule[1:]
+        labels = [_ascii(label) for label in rule.split(".")]
+        node = root
+        for label in reversed(labels):
+            if label is None:
+                break
+            node = node.setdefault(label, {})
+        else:
+            node[_RULE] = kind
+    return root
+
+
+class PublicSuffixList:
+    """Compiled Public Suffix List.
+
+    Rules come from the copy downloaded by `wib update-data` under the user cache dir, or
+    else from the snapshot bundled in wib/data. The trie is built on first use.
+    """
+
+    URL = "https://publicsuffix.org/list/public_suffix_list.dat"
+    FILENAME = "public_suffix_list.dat"
+
+    _shared: PublicSuffixList | None = None
+
+    def __init__(self, path: Path | str | None = None) -> None:
+        self.path = Path(path) if path is not None else cache_dir() / self.FILENAME
+        self._root: Node | None = None
+
+    @classmethod
+    def shared(cls) -> PublicSuffixList:
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    def _read(self) -> str:
+        try:
+            return self.path.read_text(encoding="utf-8")
+        except OSError:
+            pass
+        try:
+            return resources.files("wib").joinpath(f"data/{self.FILENAME}").read_text("utf-8")
+        except OSError:
+            return ""
+
+    @property
+    def root(self) -> Node:
+        if self._root is None:
+            self._root = compile_rules(self._read())
+        return self._root
+
+    def store(self, text: str) -> bool:
+        """Save a freshly downloaded list and use it from now on; False if it is unusable."""
+        root = compile_rules(text)
+        if not root:
+            return False
+        try:
+            atomic_write_text(self.path, text)
+        except OSError:
+            return False
+        self._root = root
+        return True
+
+    def suffix_len(self, labels: list[str]) -> int:
+        """Number of trailing labels forming the public suffix (unlisted TLDs count as 1)."""
+        length = 1
+        node = self.root
+        for depth, label in enumerate(reversed(labels), 1):
+            child = node.get(label)
+            if child is not None and child.get(_RULE) == _EXCEPTION:
+                return depth - 1
+            if _WILDCARD in node:
+                length = depth
+            if child is None:
+                break
+            if child.get(_RULE) == _NORMAL:
+                length = depth
+            node = child
+        return length
+
+    def registrable_domain(self, host: str) -> str | None:
+        """ "a.cdn.example.co.uk" -> "example.co.uk"; None if host is itself a public suffix."""
+        labels = host.lower().strip(".").split(".")
+        n = self.suffix_len(labels)
+        if len(labels) <= n:
+            return None
+        return ".".join(labels[-(n + 1) :])
+
+
+def registrable_domain(host: str) -> str | None:
+    return PublicSuffixList.shared().registrable_domain(host)
@@ -0,0 +1,336 @@
+"""`--workers N`: shard a bulk run across processes, each with its own event loop.
+
+One event loop spends its CPU on input normalization, WHOIS text parsing, pydantic
+validation and serialization. With --workers the parent only reads the input and merges
+results: it hands chunks of up to READ_BATCH entities (whatever has been read, so a live
+feed is not held back) to worker processes through a shared queue, each worker runs a
+LookupSession and the usual pipeline (--concurrency lookups at once) over the chunks it
+takes, and sends its results back as pickled models.
+
+- Results are merged back into input order, or passed on as they arrive with --unordered.
+  Failed lookups are sent back too and reported by the parent, as without --workers.
+- Provider rate limits and the remaining quotas are split evenly between the workers, so
+  N processes together stay within them. Connection pools, per-host connection limits
+  and in-memory caches are per worker; the SQLite result cache is shared.
+- Worker metrics are merged into the parent's registry when each worker finishes, so
+  --stats covers the whole run.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import multiprocessing
+import pickle
+import queue
+from collections import deque
+from collections.abc import AsyncGenerator, Callable, Iterable, Iterator
+from dataclasses import replace
+from multiprocessing.process import BaseProcess
+from types import TracebackType
+from typing import Any, NamedTuple
+
+from .config import AppConfig
+from .http.ratelimit import QuotaCounter
+from .http.request import RequestSettings
+from .metrics import MetricsRegistry
+from .pipeline import READ_BATCH, OnError, Result, iter_batches, iter_lookups
+from .session import LookupSession
+
+# Worker -> parent: results are sent at least this often while lookups complete
+FLUSH_SECONDS = 0.05
+# How long a blocking queue read waits before the caller re-checks for cancellation
+_POLL_SECONDS = 0.1
+# Entities handed out but not yet merged, per worker, in READ_BATCH units
+_CHUNKS_PER_WORKER = 4
+_JOIN_SECONDS = 5.0
+
+_Message = tuple[Any, ...]
+
+
+class _Failure(NamedTuple):
+    """A failed lookup, sent back in the failed entity's place."""
+
+    entity: str
+    error: Exception
+
+
+def _worker_settings(cfg: AppConfig, workers: int, index: int) -> RequestSettings:
+    """This worker's share of the run's rate limits and remaining quotas."""
+    settings = LookupSession.request_settings(cfg)
+    counter = QuotaCounter()
+    for host, limit in settings.rate_limits.items():
+        quota = limit.quota
+        if quota is not None:
+            used = counter.used(host, limit.quota_period)
+            left = max(0, quota - used)
+            quota = used + left // workers + (1 if index < left % workers else 0)
+        settings.rate_limits[host] = replace(
+            limit, rate=limit.rate / workers, burst=max(1, limit.burst // workers), quota=quota
+        )
+    return settings
+
+
+def _chunks(tasks: Any, starts: deque[int] | None) -> Iterator[str]:
+    while (chunk := tasks.get()) is not None:
+        start, entities = chunk
+        if starts is not None:
+            starts.extend(range(start, start + len(entities)))
+        yield from entities
+
+
+def _picklable(exc: Exception) -> Exception:
+    try:
+        pickle.dumps(exc)
+    except Exception:
+        return RuntimeError(f"{exc.__class__.__name__}: {exc}")
+    return exc
+
+
+async def _work(index: int, workers: int, cfg: AppConfig, tasks: Any, results: Any) -> None:
+    ordered = not cfg.unordered
+    # Input index of each entity taken, in order; unordered runs need none
+    starts: deque[int] | None = deque() if ordered else None
+    try:
+        session = LookupSession(cfg, settings=_worker_settings(cfg, workers, index))
+    except Exception as exc:
+        # e.g. a missing API key: the parent reports it as it would without --workers
+        results.put(("error", index, _picklable(exc)))
+        return
+    async with session:
+        batch: list[tuple[int, Result | _Failure]] = []
+
+        def flush() -> None:
+            results.put(("results", index, batch[:], session.inflight, session.request_errors()))
+            batch.clear()
+
+        async def flush_periodically() -> None:
+            # Results held back while this worker waits for more input would stall the
+            # parent's in-order merge, so nothing sits in the batch for long.
+            while True:
+                await asyncio.sleep(FLUSH_SECONDS)
+                flush()
+
+        def add(item: Result | _Failure) -> None:
+            batch.append((-1 if starts is None else starts.popleft(), item))
+            if len(batch) >= READ_BATCH:
+                flush()
+
+        flusher = asyncio.create_task(flush_periodically())
+        try:
+            lookups = iter_lookups(
+                session,
+                _chunks(tasks, starts),
+                concurrency=cfg.concurrency,
+                ordered=ordered,
+                on_error=lambda entity, exc: add(_Failure(entity, _picklable(exc))),
+            )
+            async for result in lookups:
+                add(result)
+        except Exception as exc:
+            results.put(("error", index, _picklable(exc)))
+        finally:
+            flusher.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await flusher
+        flush()
+    results.put(("done", index, session.rm.metrics))
+
+
+def _worker_main(
+    index: int,
+    workers: int,
+    cfg: AppConfig,
+    queues: tuple[Any, Any],
+    initializer: Callable[[], None] | None,
+) -> None:
+    if initializer is not None:
+        initializer()
+    with contextlib.suppress(KeyboardInterrupt):  # the parent handles Ctrl-C
+        asyncio.run(_work(index, workers, cfg, *queues))
+
+
+def _in_order(
+    pending: dict[int, Result | _Failure],
+    batch: list[tuple[int, Result | _Failure]],
+    next_index: int,
+) -> tuple[list[Result | _Failure], int]:
+    """Add batch to pending; the run of items from next_index on and the new next_index."""
+    pending.update(batch)
+    ready = []
+    while next_index in pending:
+        ready.append(pending.pop(next_index))
+        next_index += 1
+    return ready, next_index
+
+
+def _unwrap(item: Result | _Failure, on_error: OnError | None) -> Result | None:
+    """The result, or None once a failure has been reported (raised without on_error)."""
+    if not isinstance(item, _Failure):
+        return item
+    if on_error is None:
+        raise item.error
+    on_error(item.entity, item.error)
+    return None
+
+
+class _Window:
+    """Bounds the entities handed to the workers whose results are not merged yet."""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.outstanding = 0
+        self._room = asyncio.Event()
+
+    async def acquire(self, n: int) -> None:
+        while self.outstanding >= self.limit:
+            self._room.clear()
+            await self._room.wait()
+        self.outstanding += n
+
+    def release(self, n: int) -> None:
+        self.outstanding -= n
+        if self.outstanding < self.limit:
+            self._room.set()
+
+
+def _receive(results: Any) -> _Message | None:
+    try:
+        message: _Message = results.get(timeout=_POLL_SECONDS)
+    except queue.Empty:
+        return None
+    return message
+
+
+class WorkerPool:
+    """Worker processes that together look up one stream of entities.
+
+    Stands in for a LookupSession in main: async context manager, inflight and
+    request_errors() for the progress line, and lookups() in place of iter_lookups.
+    """
+
+    # Run at the start of every worker, e.g. to repoint clients the way the parent was
+    # (must be picklable; the workers are spawned, not forked)
+    initializer: Callable[[], None] | None = None
+
+    def __init__(self, cfg: AppConfig, workers: int) -> None:
+        self.cfg = cfg
+        self.workers = workers
+        self._context = multiprocessing.get_context("spawn")
+        self._tasks: Any = self._context.Queue()
+        self._results: Any = self._context.Queue()
+        self._processes: list[BaseProcess] = []
+        self._complete = False  # every worker reported done
+        # Latest progress report from each worker
+        self._inflight: dict[int, int] = {}
+        self._errors: dict[int, int] = {}
+
+    @property
+    def inflight(self) -> int:
+        return sum(self._inflight.values())
+
+    def request_errors(self) -> int:
+        return sum(self._errors.values())
+
+    def _start(self) -> None:
+        # Configuration errors fail here, before any worker is spawned
+        LookupSession.check_config(self.cfg)
+        for index in range(self.workers):
+            process = self._context.Process(
+                target=_worker_main,
+                args=(
+                    index,
+                    self.workers,
+                    self.cfg,
+                    (self._tasks, self._results),
+                    self.initializer,
+                ),
+                name=f"wib-worker-{index}",
+                daemon=True,
+            )
+            process.start()
+            self._processes.append(process)
+
+    async def _feed(self, entities: Iterable[str], window: _Window) -> None:
+        start = 0
+        async for chunk in iter_batches(entities):
+            await window.acquire(len(chunk))
+            self._tasks.put((start, chunk))
+            start += len(chunk)
+        for _ in range(self.workers):
+            self._tasks.put(None)
+
+    async def lookups(
+        self, entities: Iterable[str], *, on_error: OnError | None = None
+    ) -> AsyncGenerator[Result, None]:
+        """Results for entities, in input order unless cfg.unordered.
+
+        Failed lookups go to on_error(entity, exc), or are raised without it, as in
+        iter_lookups.
+        """
+        ordered = not self.cfg.unordered
+        self._start()
+        window = _Window(_CHUNKS_PER_WORKER * self.workers * READ_BATCH)
+        feeder = asyncio.create_task(self._feed(entities, window))
+        pending: dict[int, Result | _Failure] = {}
+        next_index = 0
+        finished = 0
+        try:
+            while finished < self.workers:
+                if feeder.done() and feeder.exception() is not None:
+                    await feeder  # input errors surface here
+                message = await asyncio.to_thread(_receive, self._results)
+                if message is None:
+                    self._check_alive()
+                    continue
+                tag, index, *payload = message
+                if tag == "error":
+                    raise payload[0]
+                if tag == "done":
+                    MetricsRegistry.shared().merge(payload[0])
+                    finished += 1
+                    self._inflight[index] = 0
+                    continue
+                batch, self._inflight[index], self._errors[index] = payload
+                if ordered:
+                    ready, next_index = _in_order(pending, batch, next_index)
+                else:
+                    ready = [item for _, item in batch]
+                window.release(len(ready))
+                for item in ready:
+                    result = _unwrap(item, on_error)
+                    if result is not None:
+                        yield result
+            self._complete = True
+        finally:
+            feeder.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await feeder
+
+    def _check_alive(self) -> None:
+        for process in self._processes:
+            if process.exitcode not in (None, 0):
+                raise RuntimeError(f"{process.name} exited with code {process.exitcode}")
+
+    async def aclose(self) -> None:
+        for process in self._processes:
+            if self._complete:
+                await asyncio.to_thread(process.join, _JOIN_SECONDS)
+            # After an error or an early stop the workers may be waiting for input
+            if process.is_alive():
+                process.terminate()
+                await asyncio.to_thread(process.join)
+        for q in (self._tasks, self._results):
+            q.cancel_join_thread()
+            q.close()
+
+    async def __aenter__(self) -> WorkerPool:
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        await self.aclose()